@@ -0,0 +1,74 @@
+"""
+File: display.py
+Purpose: Bounded queues decoupling display consumers from the serial thread
+"""
+
+from collections import deque
+from itertools import islice
+import threading
+
+# Overload policies, what a full queue does on put():
+#   summarize    drop the new item (shown later as "N lines skipped")
+#   drop_oldest  drop the oldest queued item
+#   decimate     drop every other queued item, thinning evenly
+POLICIES = ("summarize", "drop_oldest", "decimate")
+
+
+class DisplayQueue:
+    """Bounded queue put from the serial thread and drained in batches
+    by the GUI, so a slow display never stalls reading or logging.
+    Items dropped by the overload policy are counted, see drain()."""
+    def __init__(self, maxlen=2000, policy="summarize"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overload policy: {policy}")
+        self.maxlen = maxlen
+        self.policy = policy
+        self.total_skipped = 0
+        self._items = deque()
+        self._skipped = 0  # since last drain
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def set_policy(self, policy):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overload policy: {policy}")
+        self.policy = policy
+
+    def put(self, item):
+        with self._lock:
+            items = self._items
+            if len(items) >= self.maxlen:
+                if self.policy == "summarize":
+                    skipped = 1
+                elif self.policy == "drop_oldest":
+                    items.popleft()
+                    skipped = 1
+                else:
+                    self._items = items = deque(islice(items, 0, None, 2))
+                    skipped = self.maxlen - len(items)
+                self._skipped += skipped
+                self.total_skipped += skipped
+                if self.policy == "summarize":
+                    return
+            items.append(item)
+
+    def drain(self, limit=None) -> tuple[list, int]:
+        """Take up to limit (default all) queued items, oldest first,
+        and the number of items skipped since the last drain"""
+        with self._lock:
+            items = self._items
+            if limit is None or limit >= len(items):
+                batch = list(items)
+                items.clear()
+            else:
+                batch = [items.popleft() for _ in range(limit)]
+            skipped = self._skipped
+            self._skipped = 0
+        return batch, skipped
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._skipped = 0
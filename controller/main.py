@@ -1,11 +1,34 @@
 
 from model.main import Model
+from model.process import ProcessModel
+from model.frames import FramedModel
+from model.baud import BaudDetector, BAUD_RATES
+from model.base import MAIN_LOOP, WORKER
+from model.store import ChannelStore
+from model.metrics import MetricsEngine, Calibration, ChannelSummary
+from model.alarms import AlarmEngine, Alarm, load_rules
 from .panel import PanelController
 from view.main import View
-from logger import SerialLogger
-from .probe import ProbeThread
+from logger import SerialLogger, StructuredLogger
+from journal import Journal
+from .probe import ProbeThread, Probe
+from .script import ScriptThread, ScriptError, parse_script
+from .display import DisplayQueue
+from .publish import PublishServer
+from perf import STATS, timed
+import time
 import re
 
+# RX line prefix of each probed statistic, to readout name
+STAT_PREFIXES = (
+    ("PVM state :", "PVM"),
+    ("CTC state :", "CTC"),
+    ("Last CV   :", "Last CV"),
+    ("Last CV DN:", "Last CV DN"),
+    ("Err count :", "Errs"),
+    ("Last Error:", "Last Err"),
+)
+
 class Controller:
     """VSB Controller"""
     def __init__(self, view: View):
@@ -14,16 +37,52 @@ class Controller:
         self.panel_controller = PanelController(view)  # subcontroller
         
         self.probe_thread = None
+        self.remove_listeners = []  # of the current model
+        self.script_thread = None
+        self.baud_detector = None
+        self.publisher = None  # see serve()
+        self.journal = None  # see open_journal()
         self.logger = None
+        self.log_path = None  # of the raw logger, reopened on reconnect
+        self.wide_logger = None
         self.generic_regex = False
+        self.store = ChannelStore()
+        self.view.set_graph_store(self.store)
+        self.metrics = MetricsEngine()
+        self.metrics_period = 1.0  # seconds between metric updates
+        self.metrics_time = 0.0
+        self.summary = ChannelSummary()  # per-channel readouts
+        self.view.set_channel_summary(self.summary)
+        self.alarms = AlarmEngine(calibration=self.metrics.calibration,
+                                  on_alarm=self._alarm_listener,
+                                  on_clear=self._alarm_clear_listener)
+        self.alarm_period = 1000  # ms between stale checks
+        # display consumers drained by the GUI, logging stays inline (lossless)
+        self.cli_queue = DisplayQueue(maxlen=2000, policy="summarize")
+        self.graph_queue = DisplayQueue(maxlen=50000, policy="drop_oldest")  # not decimate, channels interleave
+        self.display_period = 50  # ms between display drains
+        self.worker_queue = 4096  # events queued per worker listener
+        self.cli_batch = 500  # max terminal lines per drain
+        STATS.gauge("cli queue", lambda: len(self.cli_queue))
+        STATS.gauge("graph queue", lambda: len(self.graph_queue))
+        self.rx_latency = STATS.stage("rx latency")  # capture to listener
+        self.display_latency = STATS.stage("graph latency")  # capture to graph
         
         self._bind_once()
+        self.view.schedule(self.alarm_period, self._check_alarms)
+        self.view.schedule(self.display_period, self._drain_display)
     
     def _bind_once(self):
         self.view.bind_mode_button(self._toggle_generic_regex)
         self.view.bind_cli_send(lambda _: self._send_data(self.view.get_cli_entry()))
         self.view.bind_connect(self._reconnect)
         self.view.bind_log(self._toggle_logging)
+        self.view.bind_script(self._toggle_script)
+        self.view.bind_export(self._export_store)
+        self.view.bind_calibration(self._load_calibration)
+        self.view.bind_alarms(self._load_alarms)
+        self.view.bind_overload_policy(self.cli_queue.set_policy)
+        self.view.bind_channel_reset(self.summary.reset_extremes)
         self.panel_controller.clear_bindings()
         
     def _bind_each_connect(self, model: Model):
@@ -33,34 +92,174 @@ class Controller:
             
     def start(self):
         self.view.start()
+        self._shutdown()
+    
+    def _shutdown(self):
+        """Stop the threads using the loggers and journal, then close them"""
+        if self.script_thread:
+            self.script_thread.stop()
+        if self.baud_detector:
+            self.baud_detector.cancel()
+        self._stop_probe()
+        if self.model:
+            self.model.stop()
+            self._remove_listeners()
+        if self.publisher:
+            self.publisher.stop()
+        for logger in (self.logger, self.wide_logger):
+            if logger:
+                logger.close()
+        if self.journal:
+            self.journal.close()
+        
+    def open_journal(self, path):
+        """Record state changes (LEDs, probed readouts, alarms and
+        connection) to the SQLite journal at path"""
+        try:
+            self.journal = Journal(path)
+        except Exception as e:  # sqlite3.Error or OSError
+            print(f"Journal Error: {e}")
+            return
+        self.panel_controller.set_journal(self.journal)
+        self.view.set_journal(self.journal)
+        
+    def serve(self, port, host="127.0.0.1", token=None):
+        """Publish lines and samples to local clients (see PublishServer),
+        accepting TX from clients authorized by token"""
+        self.publisher = PublishServer(port, host, token, on_tx=self._send_data)
+        self.publisher.start()
+        self.publisher.ready.wait(5)
+        if self.publisher.error:
+            self.publisher = None
+        else:
+            print(f"Publishing on {host}:{self.publisher.port}")
     
     def _add_event_listeners(self, model: Model):
-        """Register all event listeners"""
-        model.add_event_listener('rx', self._rx_listener)
-        model.add_event_listener('tx', self._tx_listener)
-        model.add_event_listener('connected', self._connected_listener)
-        model.add_event_listener('disconnected', self._disconnected_listener)
+        """Register all event listeners (and queue depth gauges)"""
+        STATS.gauge("rx backlog bytes", model.rx_backlog)
+        STATS.gauge("tx queue", model.tx_backlog)
+        STATS.gauge("pending requests", lambda: len(model.requests))
+        # inline (in order with the raw log), widget updates are posted to
+        # the GUI thread by MAIN_LOOP.call
+        listeners = (
+            ('rx', self._rx_listener),
+            ('tx', self._tx_listener),
+            ('connected', self._connected_listener),
+            ('disconnected', self._disconnected_listener),
+            ('dropped', self._dropped_listener),
+            ('reconnected', self._reconnected_listener),
+        )
+        for event, listener in listeners:
+            self.remove_listeners.append(model.add_event_listener(event, listener))
+        # slow stages (panel, journal, wide log, metrics, alarms, publisher)
+        # off the serial thread, which blocks when a queue is full (lossless)
+        workers = (
+            ('rx', self._rx_worker_listener),
+            ('samples', self._samples_listener),
+        )
+        for event, listener in workers:
+            self.remove_listeners.append(model.add_event_listener(
+                event, listener, mode=WORKER, maxlen=self.worker_queue, block=True))
+    
+    def _remove_listeners(self):
+        """Remove the current model's listeners, after their queued events"""
+        for remove in self.remove_listeners:
+            remove()
+        self.remove_listeners = []
 
     def _toggle_generic_regex(self):
         self.generic_regex = not self.generic_regex
         self.view.set_mode(self.generic_regex)
+        if isinstance(self.model, ProcessModel):
+            self.model.set_sample_filter(None if self.generic_regex else b"DBG CV")
         
     def _toggle_logging(self):
-        if self.logger:
-            self.logger.close()
+        if self.logger or self.wide_logger:
+            for logger in (self.logger, self.wide_logger):
+                if logger:
+                    logger.close()
             self.logger = None
+            self.log_path = None
+            self.wide_logger = None
         else:
             path = str(self.view.log.get_path())
             if not path.endswith(('.csv', '.txt')):
                 print(f"Invalid log extension: {path}. Must be .csv or .txt")
                 return
-            self.logger = SerialLogger(path)
-        self.view.log.set_button_state(self.logger is not None)
+            log_format = self.view.get_log_format()
+            if log_format in ('raw', 'both'):
+                self.log_path = path
+                self.logger = self.model.open_logger(path) if self.model else SerialLogger(path)
+            readouts = self.view.get_readout_names()
+            if log_format == 'wide':
+                self.wide_logger = StructuredLogger(path, readouts=readouts)
+            elif log_format == 'both':
+                stem, ext = path.rsplit('.', 1)
+                self.wide_logger = StructuredLogger(f"{stem}_wide.{ext}", readouts=readouts)
+        self.view.log.set_button_state(self.logger is not None or self.wide_logger is not None)
+        
+    def _toggle_script(self):
+        """Run selected script file, or stop the running one"""
+        if self.script_thread and self.script_thread.is_alive():
+            self.script_thread.stop()
+            return
+        if not self.model:
+            self.view.script.insert("Script Error: not connected")
+            return
+        path = self.view.script.get_path()
+        try:
+            with open(path, 'r') as file:
+                source = file.read()
+            steps = parse_script(source)
+        except (OSError, ScriptError) as e:
+            self.view.script.insert(f"Script Error: {e}")
+            return
+        total = len(source.splitlines())
+        
+        # called on the script thread, widgets updated in the GUI thread
+        def on_step(step):
+            MAIN_LOOP.call(self.view.script.set_progress, step.line_no, total, step.text)
+        def on_echo(text):
+            MAIN_LOOP.call(self.view.script.insert, text)
+        def on_done(error):
+            MAIN_LOOP.call(self.view.script.insert, f"Script Error: {error}" if error else "Script done")
+            MAIN_LOOP.call(self.view.script.set_running, False)
+            
+        self.view.script.insert(f"Running {path}")
+        self.script_thread = ScriptThread(self.model, steps, on_step=on_step, 
+                                          on_echo=on_echo, on_done=on_done)
+        self.view.script.set_running(True)
+        self.script_thread.start()
+    
+    def _load_calibration(self, path):
+        try:
+            calibration = Calibration.from_csv(path)
+        except (OSError, ValueError) as e:
+            print(f"Calibration Error: {e}")
+            return
+        self.metrics.set_calibration(calibration)
+        self.alarms.set_calibration(calibration)
+    
+    def _load_alarms(self, path):
+        try:
+            self.alarms.set_rules(load_rules(path))
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Alarms Error: {e}")
+            return
+        self.view.set_alert("Alarm", False)
+        self.view.set_readout("Alarm", "")
+    
+    def _export_store(self, path):
+        try:
+            self.store.export(path)
+        except (OSError, ImportError, ValueError) as e:
+            print(f"Export Error: {e}")
     
     def _start_probe(self, model):
         """Probe thread to fetch statistics periodically"""
         if not self.probe_thread:
-            self.probe_thread = ProbeThread(model, 2)
+            probes = [Probe("SS", 2, reply="Last Error:")]
+            self.probe_thread = ProbeThread(model, probes)
             self.probe_thread.start()
             
     def _stop_probe(self):
@@ -73,60 +272,238 @@ class Controller:
             self.model.write(data.strip() + '\n')
             
     def _reconnect(self):
+        if self.script_thread:
+            self.script_thread.stop()
+        if self.baud_detector:
+            self.baud_detector.cancel()
+            self.baud_detector = None
         if self.model:
             self._stop_probe()
             self.model.stop()
+            self._remove_listeners()
+            MAIN_LOOP.pump()  # show 'disconnected' before the next connection
+        port = self.view.get_port()
+        baud = self.view.get_baud()
+        if baud == "Auto":
+            self.view.append_cli(f"Detecting baud rate of {port}...")
+            self.baud_detector = BaudDetector(port)
+            self.baud_detector.start()
+            self.view.schedule(50, self._baud_detected)
+        else:
+            self._connect(port, int(baud))
+    
+    def _baud_detected(self):
+        """Periodic (GUI thread) check of baud detection, connects when done"""
+        detector = self.baud_detector
+        if detector is None:
+            return  # cancelled
+        if not detector.done.is_set():
+            self.view.schedule(50, self._baud_detected)
+            return
+        self.baud_detector = None
+        if detector.error:
+            print(f"SerialController Error: {detector.error}")
+            return
+        scores = ", ".join(f"{rate}: {s:.2f}" for rate, s in detector.scores.items())
+        if detector.rate:
+            self.view.append_cli(f"Detected baud {detector.rate} ({scores})")
+        else:
+            detector.ser.baudrate = BAUD_RATES[0]
+            self.view.append_cli(f"Baud not detected ({scores}), using {detector.ser.baudrate}")
+        self._connect(detector.port, detector.ser.baudrate, detector.ser)
+    
+    def _connect(self, port, baud: int, ser=None):
+        """Connect a new model, reusing the open port ser if given"""
         try:
-            port = self.view.get_port()
-            baud = self.view.get_baud()
-            self.model = Model(port, int(baud))
+            if self.view.get_capture_process():
+                model_class = ProcessModel
+            elif self.view.get_binary_frames():
+                model_class = FramedModel
+            else:
+                model_class = Model
+            self.model = model_class(port, baud, ser)
+            if isinstance(self.model, ProcessModel) and self.generic_regex:
+                self.model.set_sample_filter(None)
+            if self.logger:  # raw log of the new model
+                self.logger.close()
+                self.logger = self.model.open_logger(self.log_path)
             self._add_event_listeners(self.model)
             self._bind_each_connect(self.model)
             self._start_probe(self.model)
             self.model.start()
         except Exception as e:
             print(f"SerialController Error: {e}")
+            if ser is not None:
+                ser.close()  # e.g. of baud detection, else the port stays locked
     
+    @timed("stat listener")
     def _stat_listener(self, model: Model):
         """RX listener on probed statistics"""
-        if "PVM state :" in model.last_rx:
-            self.view.set_readout("PVM", model.last_rx.split(':')[-1])
-        elif "CTC state :" in model.last_rx:
-            self.view.set_readout("CTC", model.last_rx.split(':')[-1])
-        elif "Last CV   :" in model.last_rx:
-            self.view.set_readout("Last CV", model.last_rx.split(':')[-1])
-        elif "Last CV DN:" in model.last_rx:
-            self.view.set_readout("Last CV DN", model.last_rx.split(':')[-1])
-        elif "Err count :" in model.last_rx:
-            self.view.set_readout("Errs", model.last_rx.split(':')[-1])
-        elif "Last Error:" in model.last_rx:
-            self.view.set_readout("Last Err", model.last_rx.split(':')[-1])
+        for prefix, name in STAT_PREFIXES:
+            if prefix in model.last_rx:
+                readout = model.last_rx.split(':')[-1]
+                MAIN_LOOP.call(self.view.set_readout, name, readout)
+                if self.wide_logger:
+                    self.wide_logger.readout(name, readout, model.last_rx_time)
+                if self.journal:
+                    self.journal.record(name, readout, model.last_rx_time)
+                self.alarms.readout(name, readout, model.last_rx_time)
+                return
 
+    @timed("graph listener")
     def _graphing_listener(self, model: Model):
         """RX listener"""
+        if model.parses_samples:
+            return  # see _samples_listener
         if re.search(r"\d+:\s+\d+", model.last_rx):
             # FIXME hardcoded "DBG CV"
             if (not self.generic_regex and "DBG CV" in model.last_rx) or self.generic_regex:
                 channel, val = re.findall(r"\d+", model.last_rx)[-2:]
-                self.view.append_graph(int(channel), int(val))
+                self._add_sample(int(channel), int(val), model.last_rx_time)
+    
+    @timed("samples listener")
+    def _samples_listener(self, model: Model):
+        """Samples parsed by the model (capture process or binary frames)"""
+        for t, channel, val in model.last_samples.tolist():
+            self._add_sample(int(channel), int(val), t)
+    
+    def _add_sample(self, channel: int, val: int, t: float):
+        self.store.append(channel, t, val)
+        if self.wide_logger:
+            self.wide_logger.sample(channel, val, t)
+        self.metrics.add(channel, t, val)
+        self.summary.add(channel, t, val)
+        self.alarms.add(channel, t, val)
+        self.graph_queue.put((channel, val, t))
+        if self.publisher:
+            self.publisher.publish_sample(channel, val, t)
+        if t - self.metrics_time >= self.metrics_period:
+            self.metrics_time = t
+            self._metrics_update(t)
+    
+    def _metrics_update(self, t):
+        """Publish derived metrics to readouts (in the GUI thread), store
+        and wide log, from the sample listener"""
+        m = self.metrics.snapshot(t)
+        derived = (  # readout name, store series, value
+            ("Min V", "min_v", float(m.min.min())),
+            ("Max V", "max_v", float(m.max.max())),
+            ("Mean V", "mean_v", float(m.mean.mean())),
+            ("Imbalance", "imbalance", m.imbalance),
+            ("Max dV/dt", "max_dvdt", float(m.dvdt[abs(m.dvdt).argmax()])),
+        )
+        for name, series, value in derived:
+            MAIN_LOOP.call(self.view.set_readout, name, f"{value:.4g}")
+            self.store.append(series, t, value)
+            if self.wide_logger:
+                self.wide_logger.readout(name, f"{value:.6g}", t)
+    
+    def _check_alarms(self):
+        """Periodic (GUI thread) check for stale channels"""
+        self.alarms.check_stale(time.time())
+        self.view.schedule(self.alarm_period, self._check_alarms)
+    
+    def _alarm_listener(self, alarm: Alarm):
+        """Triggered alarm, from the sample worker or GUI thread"""
+        def show(text):
+            self.view.set_readout("Alarm", text)
+            self.view.set_alert("Alarm", True)
+            self.view.append_cli(f"ALARM {text}")
+        MAIN_LOOP.call(show, str(alarm))
+        if self.logger:
+            self.logger.log_alarm(str(alarm))
+        if self.wide_logger:
+            self.wide_logger.readout("Alarm", str(alarm), alarm.t)
+        self._journal_alarm(alarm, f"{alarm.value:.4g}", alarm.t)
+        if alarm.rule.command:
+            self._send_data(alarm.rule.command)
+    
+    def _alarm_clear_listener(self, alarm: Alarm):
+        def show(text):
+            self.view.append_cli(f"Alarm cleared: {text}")
+            if not self.alarms.active:
+                self.view.set_alert("Alarm", False)
+        MAIN_LOOP.call(show, str(alarm))
+        if self.logger:
+            self.logger.log_alarm_clear(str(alarm))
+        self._journal_alarm(alarm, "clear")
+    
+    def _journal_alarm(self, alarm: Alarm, value, t=None):
+        if self.journal:
+            where = f" ch{alarm.channel}" if alarm.channel is not None else ""
+            self.journal.record(f"Alarm {alarm.rule.name}{where}", value, t)
+    
+    def _journal_connection(self, state):
+        if self.journal:
+            self.journal.record("Connection", state)
+    
+    def _drain_display(self):
+        """Periodic (GUI thread) update of display consumers"""
+        lines, skipped = self.cli_queue.drain(self.cli_batch)
+        if skipped:
+            STATS.count("cli skipped", skipped)
+            lines.append(f"... {skipped} lines skipped")
+        if lines:
+            self.view.append_cli_lines(lines)
+        samples, skipped = self.graph_queue.drain()
+        if skipped:
+            STATS.count("graph skipped", skipped)
+        if samples:
+            self.view.append_graph_batch(samples)
+            self.display_latency.record(int((time.time() - samples[-1][2]) * 1e9))
+        MAIN_LOOP.pump()
+        if self.journal:
+            self.journal.flush_due()  # changes of a quiet bench too
+        self.view.schedule(self.display_period, self._drain_display)
     
     def _rx_listener(self, model: Model):
-        self.view.append_cli(model.last_rx)
+        self.rx_latency.record(time.monotonic_ns() - model.last_rx_ns)
+        self.cli_queue.put(model.last_rx)
         if self.logger:
-            self.logger.log_rx(model.last_rx)
+            self.logger.log_rx(model.last_rx_raw, model.last_rx_time)
+    
+    def _rx_worker_listener(self, model: Model):
+        """RX listener on a worker thread, model is a snapshot"""
+        if self.publisher:
+            self.publisher.publish_line('rx', model.last_rx, model.last_rx_time)
         self.panel_controller.rx_listener(model)
-        self._graphing_listener(model)
         self._stat_listener(model)
+        self._graphing_listener(model)
         
     def _tx_listener(self, model: Model):
-        self.view.append_cli(model.last_tx)
+        self.cli_queue.put(model.last_tx)
         if self.logger:
-            self.logger.log_tx(model.last_tx)
+            self.logger.log_tx(model.last_tx, model.last_tx_time)
+        if self.publisher:
+            self.publisher.publish_line('tx', model.last_tx.rstrip('\n'), model.last_tx_time)
             
     def _connected_listener(self, model: Model):
-        self.view.set_connected(True)
+        MAIN_LOOP.call(self.view.set_connected, True)
+        self._journal_connection("connected")
         
     def _disconnected_listener(self, model: Model):
-        self.view.set_connected(False)
+        MAIN_LOOP.call(self.view.set_connected, False)
+        self._journal_connection("disconnected")
+        
+    def _dropped_listener(self, model: Model):
+        """Port lost, pause probing until reconnected"""
+        if self.logger:  # in order with RX lines
+            self.logger.log_gap(model.last_error)
+        self._journal_connection(f"dropped: {model.last_error}")
+        def show(error):
+            self._stop_probe()
+            self.view.set_connected(False)
+            self.view.append_cli(f"Connection lost: {error}")
+        MAIN_LOOP.call(show, model.last_error)
+    
+    def _reconnected_listener(self, model: Model):
+        if self.logger:
+            self.logger.log_reconnect(model.last_downtime)
+        self._journal_connection("reconnected")
+        def show(downtime):
+            self.view.set_connected(True)
+            self.view.append_cli(f"Reconnected after {downtime:.3f}s")
+            self._start_probe(self.model)
+        MAIN_LOOP.call(show, model.last_downtime)
         
         
@@ -1,10 +1,13 @@
 from model.main import Model
+from model.base import MAIN_LOOP
 from view.main import View
+from perf import timed
 
 class PanelController:
     """Specifically for VSB button panel"""
     def __init__(self, view: View):
         self.view = view.controls
+        self.journal = None  # of LED changes, see set_journal
         
     def bind_buttons(self, model: Model):
         def send(led_name: str, if_true: str, if_false: str):
@@ -26,6 +29,15 @@ class PanelController:
         set_sender("Info", "", "SH")
         set_sender("Error", "DE", "EE")
         
+    def set_journal(self, journal):
+        self.journal = journal
+        
+    def _set_led(self, model: Model, name, state: bool):
+        """Set LED (in the GUI thread) and journal it, from the RX listener"""
+        MAIN_LOOP.call(self.view.set_led, name, state)
+        if self.journal:
+            self.journal.record(f"LED {name}", "on" if state else "off", model.last_rx_time)
+        
     def clear_bindings(self):
         self.view.set_button_command("Run", lambda: None)
         self.view.set_button_command("Stop", lambda: None)
@@ -40,6 +52,7 @@ class PanelController:
         self.view.set_button_command("Info", lambda: None)
         self.view.set_button_command("Error", lambda: None)
         
+    @timed("panel listener")
     def rx_listener(self, model: Model):
         self._run_listener(model)
         self._stop_listener(model)
@@ -56,62 +69,62 @@ class PanelController:
     
     def _run_listener(self, model: Model):
         if "RN:" in model.last_rx:
-            self.view.set_led("Run", True)
-            self.view.set_led("Stop", False)
+            self._set_led(model, "Run", True)
+            self._set_led(model, "Stop", False)
             
     def _stop_listener(self, model: Model):
         if "ST:" in model.last_rx:
-            self.view.set_led("Run", False)
-            self.view.set_led("Stop", True)
+            self._set_led(model, "Run", False)
+            self._set_led(model, "Stop", True)
     
     def _balance_listener(self, model: Model):
         d = model.last_rx
         if "EB:" in d and "enabled" in d:
-            self.view.set_led("Balance", True)
+            self._set_led(model, "Balance", True)
         elif "DB:" in d and "disabled" in d:
-            self.view.set_led("Balance", False)
+            self._set_led(model, "Balance", False)
             
     def _extbus_listener(self, model: Model):
         d = model.last_rx
         if "XE:" in d and "on" in d:
-            self.view.set_led("ExtBus", True)
+            self._set_led(model, "ExtBus", True)
         elif "XD:" in d and "off" in d:
-            self.view.set_led("ExtBus", False)
+            self._set_led(model, "ExtBus", False)
             
     def _mq_dump_listener(self, model: Model):
         d = model.last_rx
         if "EQ:" in d and "enabled" in d:
-            self.view.set_led("MQ Dump", True)
+            self._set_led(model, "MQ Dump", True)
         elif "DQ:" in d and "disabled" in d:
-            self.view.set_led("MQ Dump", False)
+            self._set_led(model, "MQ Dump", False)
             
     def _show_dn_listener(self, model: Model):
         d = model.last_rx
         if "SN:" in d and "-> ON" in d:
-            self.view.set_led("Show DN", True)
+            self._set_led(model, "Show DN", True)
         elif "SN:" in d and "-> OFF" in d:
-            self.view.set_led("Show DN", False)
+            self._set_led(model, "Show DN", False)
             
     def _debug_listener(self, model: Model):
         d = model.last_rx
         if "ED:" in d and "enabled" in d:
-            self.view.set_led("Debug", True)
+            self._set_led(model, "Debug", True)
         elif "DD:" in d and "disabled" in d:
-            self.view.set_led("Debug", False)
+            self._set_led(model, "Debug", False)
     
     def _debug2_listener(self, model: Model):
         d = model.last_rx
         if "E2:" in d and "enabled" in d:
-            self.view.set_led("Debug2", True)
+            self._set_led(model, "Debug2", True)
         elif "D2:" in d and "disabled" in d:
-            self.view.set_led("Debug2", False)
+            self._set_led(model, "Debug2", False)
     
     def _trace_listener(self, model: Model):
         d = model.last_rx
         if "TA:" in d and "active" in d:
-            self.view.set_led("Trace", True)
+            self._set_led(model, "Trace", True)
         elif "DT:" in d and "disabled" in d:
-            self.view.set_led("Trace", False)
+            self._set_led(model, "Trace", False)
     
     def _trace2_listener(self, model: Model):
         pass # TODO
@@ -119,14 +132,14 @@ class PanelController:
     def _info_listener(self, model: Model):
         data = model.last_rx
         if data == "AD n         Immediate ADC DAQ from channel n":
-            self.view.set_led("Info", True)
+            self._set_led(model, "Info", True)
         elif data == "XE           Enable extension bus":
-            self.view.set_led("Info", False)
+            self._set_led(model, "Info", False)
             
     def _error_listener(self, model: Model):
         d = model.last_rx
         if "EE:" in d and "enabled" in d:
-            self.view.set_led("Error", True)
+            self._set_led(model, "Error", True)
         elif "DE:" in d and "disabled" in d:
-            self.view.set_led("Error", False)
+            self._set_led(model, "Error", False)
     
\ No newline at end of file
@@ -1,27 +1,90 @@
-
 import threading
+import random
 import time
 
+class Probe:
+    """Command sent periodically by ProbeThread.
+    
+    Args:
+        command (str): Command sent, without newline.
+        interval (float): Seconds between sends.
+        reply (str): Regex of the RX line ending the reply. While
+            a reply is outstanding the probe is skipped, not resent.
+        timeout (float): Seconds to wait on a reply before giving up.
+            Defaults to interval.
+    """
+    def __init__(self, command, interval, reply=None, timeout=None):
+        self.command = command
+        self.interval = interval
+        self.reply = reply
+        self.timeout = timeout if timeout is not None else interval
+        self.due = 0.0
+        self.future = None  # Model.request of outstanding reply
+        self.skipped = 0
+        
+    def is_outstanding(self):
+        return self.future is not None and not self.future.done()
+
 class ProbeThread(threading.Thread):
-    """Stoppable thread for probing stats every N seconds"""
-    def __init__(self, model, sec_freq):
+    """Stoppable thread sending probes on individual schedules.
+    
+    Each interval is randomized by +/- jitter (fraction of interval) and
+    stretched while the model is backlogged, so probes never pile up
+    behind heavy streaming.
+    """
+    def __init__(self, model, probes: list[Probe], jitter=0.1, 
+                 rx_limit=1024, tx_limit=4, max_slowdown=8):
         super().__init__()
         self.model = model
-        self.sec_freq = sec_freq
-        self.running = False
+        self.probes = probes
+        self.jitter = jitter
+        self.rx_limit = rx_limit  # bytes unread before slowing down
+        self.tx_limit = tx_limit  # queued writes before skipping
+        self.max_slowdown = max_slowdown
+        self.slowdown = 1
         self.daemon = True
+        self._stop_event = threading.Event()
+        
+    def _adapt(self):
+        """Double slowdown while RX is backlogged, else decay to 1"""
+        if self.model.rx_backlog() > self.rx_limit:
+            self.slowdown = min(self.slowdown * 2, self.max_slowdown)
+        else:
+            self.slowdown = max(self.slowdown // 2, 1)
+    
+    def _reschedule(self, probe: Probe, now):
+        spread = random.uniform(-self.jitter, self.jitter)
+        probe.due = now + probe.interval * (self.slowdown + spread)
+    
+    def _send(self, probe: Probe):
+        if probe.is_outstanding() or self.model.tx_backlog() > self.tx_limit:
+            probe.skipped += 1
+            return
+        if probe.reply:
+            probe.future = self.model.request(probe.command, expect=probe.reply,
+                                              timeout=probe.timeout)
+        else:
+            self.model.write(probe.command + "\n")
         
     def run(self):
         print("ProbeThread: Running")
-        self.running = True
-        while self.running:
-            self.model.write("SS\n")  # FIXME hardcoded
-            time.sleep(self.sec_freq)
+        start = time.monotonic()
+        for probe in self.probes:
+            probe.due = start
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            self._adapt()
+            for probe in self.probes:
+                if now >= probe.due:
+                    self._send(probe)
+                    self._reschedule(probe, now)
+            wait = min(probe.due for probe in self.probes) - time.monotonic()
+            self._stop_event.wait(max(wait, 0))
         print("ProbeThread: Stopped")
             
     def stop(self):
-        self.running = False
-        del self
+        """Stop immediately, without waiting out the current interval"""
+        self._stop_event.set()
         
     def __del__(self):
         self.stop()
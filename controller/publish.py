@@ -0,0 +1,256 @@
+"""
+File: publish.py
+Purpose: Local TCP/WebSocket server publishing the capture to other tools
+
+Clients connect to one port with raw TCP (JSON lines) or WebSocket (a
+JSON text message each, detected by the HTTP upgrade request). Messages
+published to clients:
+    {"type": "rx", "t": 1715.1, "line": "..."}
+    {"type": "tx", "t": 1715.1, "line": "..."}
+    {"type": "samples", "rows": [[t, channel, value], ...]}
+Messages accepted from clients:
+    {"type": "subscribe", "topics": ["rx", "tx", "samples"]}
+    {"type": "auth", "token": "..."}
+    {"type": "tx", "line": "..."}  (authorized clients only)
+WebSocket clients may also authorize by a ?token=... query.
+"""
+
+from collections import deque
+from urllib.parse import urlsplit, parse_qs
+from perf import STATS
+import threading
+import asyncio
+import hashlib
+import base64
+import struct
+import json
+import hmac
+
+TOPICS = ("rx", "tx", "samples")
+WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def ws_frame(payload: bytes, opcode=0x1) -> bytes:
+    """Unmasked (server to client) WebSocket frame"""
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return header + payload
+
+
+class Client:
+    """Connected subscriber with its bounded send queue"""
+    def __init__(self, reader, writer, websocket, maxlen):
+        self.reader = reader
+        self.writer = writer
+        self.websocket = websocket
+        self.queue = asyncio.Queue(maxlen)
+        self.topics = set(TOPICS)
+        self.authorized = False
+        self.peer = writer.get_extra_info("peername")
+
+    def encode(self, text: str) -> bytes:
+        data = text.encode("utf-8")
+        return ws_frame(data) if self.websocket else data + b"\n"
+
+    async def receive(self):
+        """Next message text from the client, None when closed"""
+        if not self.websocket:
+            line = await self.reader.readline()
+            return line.decode("utf-8", "replace") if line else None
+        while True:
+            head = await self.reader.readexactly(2)
+            opcode, n = head[0] & 0x0F, head[1] & 0x7F
+            if n == 126:
+                n, = struct.unpack("!H", await self.reader.readexactly(2))
+            elif n == 127:
+                n, = struct.unpack("!Q", await self.reader.readexactly(8))
+            mask = await self.reader.readexactly(4) if head[1] & 0x80 else b"\0\0\0\0"
+            data = await self.reader.readexactly(n)
+            data = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+            if opcode == 0x8:  # close
+                return None
+            if opcode == 0x9:  # ping
+                self.writer.write(ws_frame(data, 0xA))
+            elif opcode in (0x1, 0x2):  # ignores fragmented messages
+                return data.decode("utf-8", "replace")
+
+
+class PublishServer(threading.Thread):
+    """asyncio server on its own thread publishing lines and samples.
+
+    publish_line() and publish_sample() only append to a deque, so they
+    are cheap from the serial thread; the loop flushes every interval
+    seconds, encoding each message once for all clients. A client whose
+    queue of maxlen messages is full is too slow and is disconnected.
+
+    Args:
+        token (str): Token authorizing clients to send TX, None to
+            accept no TX.
+        on_tx (function): Called with each TX line of an authorized client,
+            from the server thread.
+    """
+    def __init__(self, port, host="127.0.0.1", token=None, on_tx=None,
+                 maxlen=1000, interval=0.02):
+        super().__init__()
+        self.daemon = True  # threading.Thread
+        self.host = host
+        self.port = port
+        self.token = token
+        self.on_tx = on_tx
+        self.maxlen = maxlen
+        self.interval = interval
+        self.greeting = 0.5  # seconds to wait for a WebSocket request
+        self.clients: set[Client] = set()
+        self.dropped = 0  # slow clients disconnected
+        self.error = None
+        self.ready = threading.Event()  # listening, or error
+        self._pending = deque()  # messages (dicts) to flush
+        self._samples = deque()  # [t, channel, value] rows to flush
+        self._loop = None
+        self._stopping = None
+        STATS.gauge("publish clients", lambda: len(self.clients))
+
+    def publish_line(self, kind, line: str, t: float):
+        """Publish an 'rx' or 'tx' line, from any thread"""
+        self._pending.append({"type": kind, "t": t, "line": line})
+
+    def publish_sample(self, channel, value, t: float):
+        """Publish a sample (batched per flush), from any thread"""
+        self._samples.append([t, channel, value])
+
+    def run(self):
+        try:
+            asyncio.run(self._main())
+        except OSError as e:
+            self.error = str(e)
+            print(f"PublishServer Error: {e}")
+        self.ready.set()
+
+    def stop(self):
+        if self._loop and self._stopping:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]  # if port 0
+        self.ready.set()
+        async with server:
+            while not self._stopping.is_set():
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._flush()
+        for client in list(self.clients):
+            client.writer.close()
+
+    def _flush(self):
+        """Encode pending messages once and queue them to subscribers"""
+        messages = [self._pending.popleft() for _ in range(len(self._pending))]
+        rows = [self._samples.popleft() for _ in range(len(self._samples))]
+        if rows:
+            messages.append({"type": "samples", "rows": rows})
+        if not messages or not self.clients:
+            return
+        for message in messages:
+            text = json.dumps(message)
+            encoded = {}  # websocket to bytes
+            for client in list(self.clients):
+                if message["type"] not in client.topics:
+                    continue
+                data = encoded.get(client.websocket)
+                if data is None:
+                    data = encoded[client.websocket] = client.encode(text)
+                try:
+                    client.queue.put_nowait(data)
+                except asyncio.QueueFull:
+                    self._drop(client)
+
+    def _drop(self, client: Client):
+        """Disconnect a client too slow to keep up"""
+        self.dropped += 1
+        STATS.count("publish clients dropped")
+        self.clients.discard(client)
+        client.writer.close()
+
+    async def _serve(self, reader, writer):
+        client = None
+        try:
+            try:  # WebSocket clients speak first, TCP subscribers may not
+                first = await asyncio.wait_for(reader.readline(), self.greeting)
+            except asyncio.TimeoutError:
+                first = b""
+            websocket = first.startswith(b"GET ")
+            client = Client(reader, writer, websocket, self.maxlen)
+            if websocket:
+                await self._handshake(client, first)
+            elif first:
+                self._handle(client, first.decode("utf-8", "replace"))
+            self.clients.add(client)
+            sender = asyncio.ensure_future(self._send(client))
+            try:
+                while client in self.clients:
+                    text = await client.receive()
+                    if text is None:
+                        break
+                    self._handle(client, text)
+            finally:
+                sender.cancel()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # client gone or not speaking the protocol
+        except asyncio.CancelledError:
+            pass  # server stopped
+        finally:
+            self.clients.discard(client)
+            writer.close()
+
+    async def _send(self, client: Client):
+        try:
+            while True:
+                client.writer.write(await client.queue.get())
+                await client.writer.drain()
+        except ConnectionError:
+            self.clients.discard(client)
+
+    async def _handshake(self, client: Client, request: bytes):
+        """Accept the WebSocket upgrade request"""
+        headers = {}
+        while True:
+            line = await client.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        key = headers.get("sec-websocket-key")
+        if not key:
+            raise ValueError("not a WebSocket request")
+        accept = base64.b64encode(hashlib.sha1(key.encode() + WS_GUID).digest()).decode()
+        client.writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                             f"Connection: Upgrade\r\nSec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+        target = request.split()[1].decode("latin-1") if len(request.split()) > 1 else "/"
+        token = parse_qs(urlsplit(target).query).get("token", [None])[0]
+        client.authorized = self._check_token(token)
+
+    def _check_token(self, token) -> bool:
+        return bool(self.token) and token is not None and hmac.compare_digest(str(token), self.token)
+
+    def _handle(self, client: Client, text: str):
+        """Act on a client message, unknown ones are ignored"""
+        try:
+            message = json.loads(text)
+            kind = message.get("type")
+        except (ValueError, AttributeError):
+            return
+        if kind == "auth":
+            client.authorized = self._check_token(message.get("token"))
+        elif kind == "subscribe":
+            client.topics = set(message.get("topics", TOPICS)) & set(TOPICS)
+        elif kind == "tx" and client.authorized and self.on_tx:
+            self.on_tx(str(message.get("line", "")))
@@ -0,0 +1,229 @@
+"""
+Command scripts for automated test sequences.
+
+One statement per line, '#' starts a comment:
+    send CMD              write CMD
+    send CMD => REGEX     write CMD and wait for a reply line matching REGEX
+    await REGEX           wait for an RX line matching REGEX
+    timeout SEC           timeout of following waits (default 5, > 0)
+    wait SEC              sleep SEC seconds
+    at SEC                sleep until SEC seconds after script start
+    loop N ... end        repeat block N times
+    if A OP B ... [else ...] end
+                          compare variables or numbers (< <= == != >= >)
+    echo TEXT             report TEXT, {name} is replaced by variable name
+    abort TEXT            stop the script with an error
+
+Named regex groups, e.g. (?P<errs>\\d+), store their match as a variable,
+converted to a number when possible.
+"""
+
+import threading
+import operator
+import time
+import re
+
+COMPARATORS = {
+    "<": operator.lt, "<=": operator.le, "==": operator.eq,
+    "!=": operator.ne, ">=": operator.ge, ">": operator.gt,
+}
+
+
+class ScriptError(Exception):
+    """Script could not be parsed or failed while running"""
+    def __init__(self, line_no, msg):
+        super().__init__(f"line {line_no}: {msg}")
+        self.line_no = line_no
+
+
+class ScriptStopped(Exception):
+    """Script was stopped before completion"""
+
+
+class Step:
+    """Single parsed statement, with nested blocks for loop/if"""
+    def __init__(self, line_no, op, args, text):
+        self.line_no = line_no
+        self.op = op
+        self.args = args
+        self.text = text
+        self.body: list[Step] = []
+        self.orelse: list[Step] = []
+
+
+def _number(token: str, line_no):
+    try:
+        return float(token)
+    except ValueError:
+        raise ScriptError(line_no, f"expected a number, got '{token}'")
+
+
+def _to_number(value):
+    """Convert str to int or float if possible, else unchanged"""
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except (TypeError, ValueError):
+            pass
+    return value
+
+
+def _regex(pattern: str, line_no):
+    try:
+        return re.compile(pattern)
+    except re.error as e:
+        raise ScriptError(line_no, f"bad regex '{pattern}': {e}")
+
+
+def _parse_line(line_no, text) -> Step:
+    op, _, rest = text.partition(" ")
+    rest = rest.strip()
+    if op == "send":
+        cmd, arrow, pattern = rest.partition("=>")
+        args = (cmd.strip(), _regex(pattern.strip(), line_no) if arrow else None)
+    elif op == "await":
+        args = (_regex(rest, line_no),)
+    elif op in ("timeout", "wait", "at"):
+        args = (_number(rest, line_no),)
+        if op == "timeout" and args[0] <= 0:  # a request timeout of 0 never expires
+            raise ScriptError(line_no, f"timeout must be positive, got '{rest}'")
+    elif op == "loop":
+        args = (int(_number(rest, line_no)),)
+    elif op == "if":
+        tokens = rest.split()
+        if len(tokens) != 3 or tokens[1] not in COMPARATORS:
+            raise ScriptError(line_no, f"expected 'if A OP B', got '{text}'")
+        args = tuple(tokens)
+    elif op in ("echo", "abort", "else", "end"):
+        args = (rest,)
+    else:
+        raise ScriptError(line_no, f"unknown statement '{op}'")
+    return Step(line_no, op, args, text)
+
+
+def parse_script(source: str) -> list[Step]:
+    """Parse script text into a list of Steps"""
+    root: list[Step] = []
+    blocks = [root]  # innermost block last
+    openers: list[Step] = []
+    for line_no, line in enumerate(source.splitlines(), start=1):
+        text = line.split("#", 1)[0].strip()
+        if not text:
+            continue
+        step = _parse_line(line_no, text)
+        if step.op == "else":
+            if not openers or openers[-1].op != "if" or blocks[-1] is openers[-1].orelse:
+                raise ScriptError(line_no, "'else' without 'if'")
+            blocks[-1] = openers[-1].orelse
+        elif step.op == "end":
+            if not openers:
+                raise ScriptError(line_no, "'end' without 'loop' or 'if'")
+            openers.pop()
+            blocks.pop()
+        else:
+            blocks[-1].append(step)
+            if step.op in ("loop", "if"):
+                openers.append(step)
+                blocks.append(step.body)
+    if openers:
+        raise ScriptError(openers[-1].line_no, f"'{openers[-1].op}' without 'end'")
+    return root
+
+
+class ScriptThread(threading.Thread):
+    """Stoppable thread running parsed script steps against a Model.
+
+    Args:
+        on_step (function): Called with each Step before it runs.
+        on_echo (function): Called with the text of echo statements.
+        on_done (function): Called with None on success, else the exception.
+    """
+    def __init__(self, model, steps: list[Step], on_step=None, on_echo=None, on_done=None):
+        super().__init__()
+        self.model = model
+        self.steps = steps
+        self.on_step = on_step if on_step else lambda step: None
+        self.on_echo = on_echo if on_echo else print
+        self.on_done = on_done if on_done else lambda error: None
+        self.variables: dict[str, object] = {}
+        self.timeout = 5.0
+        self.daemon = True
+        self._start_time = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        error = None
+        self._start_time = time.monotonic()
+        try:
+            self._run_block(self.steps)
+        except Exception as e:
+            error = e
+        self.on_done(error)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _sleep(self, seconds):
+        if self._stop_event.wait(max(seconds, 0)):
+            raise ScriptStopped("Script stopped")
+
+    def _await(self, future, step: Step):
+        while not future.done():
+            self._sleep(0.01)
+        try:
+            line = future.result()[-1]
+        except (TimeoutError, ConnectionError) as e:
+            raise ScriptError(step.line_no, e)
+        for name, value in step.args[-1].search(line).groupdict().items():
+            self.variables[name] = _to_number(value)
+
+    def _value(self, token, step: Step):
+        if token in self.variables:
+            return self.variables[token]
+        try:
+            return float(token)
+        except ValueError:
+            raise ScriptError(step.line_no, f"unknown variable '{token}'")
+
+    def _format(self, text):
+        return re.sub(r"\{(\w+)\}",
+                      lambda m: str(self.variables.get(m.group(1), m.group(0))), text)
+
+    def _run_block(self, steps: list[Step]):
+        for step in steps:
+            if self._stop_event.is_set():
+                raise ScriptStopped("Script stopped")
+            self.on_step(step)
+            self._run_step(step)
+
+    def _run_step(self, step: Step):
+        if step.op == "send":
+            cmd, pattern = step.args
+            if pattern is None:
+                self.model.write(cmd + "\n")
+            else:
+                future = self.model.request(cmd, expect=pattern.pattern, timeout=self.timeout)
+                self._await(future, step)
+        elif step.op == "await":
+            future = self.model.expect(step.args[0].pattern, timeout=self.timeout)
+            self._await(future, step)
+        elif step.op == "timeout":
+            self.timeout = step.args[0]
+        elif step.op == "wait":
+            self._sleep(step.args[0])
+        elif step.op == "at":
+            self._sleep(self._start_time + step.args[0] - time.monotonic())
+        elif step.op == "loop":
+            for _ in range(step.args[0]):
+                self._run_block(step.body)
+        elif step.op == "if":
+            a, op, b = step.args
+            try:
+                result = COMPARATORS[op](self._value(a, step), self._value(b, step))
+            except TypeError:
+                raise ScriptError(step.line_no, f"cannot compare '{a}' and '{b}'")
+            self._run_block(step.body if result else step.orelse)
+        elif step.op == "echo":
+            self.on_echo(self._format(step.args[0]))
+        elif step.op == "abort":
+            raise ScriptError(step.line_no, self._format(step.args[0]) or "aborted")
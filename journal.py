@@ -0,0 +1,169 @@
+"""
+SQLite journal of device state changes (LEDs, probed readouts, alarms,
+connection), one row per change instead of every line of the raw log.
+
+Rows (t, field, value, previous) are inserted in batches into a WAL mode
+database, indexed by time and by (field, time), so the history of a
+field or its value at any time is found without scanning.
+
+Usage:
+    python journal.py DB [--field NAME] [--start START] [--end END]
+    python journal.py DB --at TIME
+START, END and TIME are ISO datetimes, e.g. "2024-05-01 13:00:00".
+"""
+
+import threading
+import argparse
+import datetime
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    t REAL NOT NULL,
+    field TEXT NOT NULL,
+    value TEXT,
+    previous TEXT
+);
+CREATE INDEX IF NOT EXISTS journal_t ON journal (t);
+CREATE INDEX IF NOT EXISTS journal_field_t ON journal (field, t);
+"""
+
+
+class Journal:
+    """Records changes of named fields, see module.
+
+    Changes are buffered and inserted every flush_rows rows or
+    flush_interval seconds (checked on record and by flush_due), and
+    before queries.
+
+    Args:
+        path (str): Database file, created if missing. The latest value
+            of every field is read back, so a restart records no change.
+    """
+    def __init__(self, path, flush_rows=100, flush_interval=1.0):
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints, WAL is safe
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()  # records from serial and GUI threads
+        self._pending = []
+        self._flushed = time.monotonic()
+        self.last = dict(self._db.execute(
+            "SELECT field, value FROM journal GROUP BY field HAVING t = MAX(t)"))
+
+    def record(self, field: str, value, t: float = None):
+        """Record value of field at t (seconds since epoch, default now)
+        if it changed"""
+        value = None if value is None else str(value).strip()
+        with self._lock:
+            previous = self.last.get(field)
+            if value == previous and field in self.last:
+                return
+            self.last[field] = value
+            self._pending.append((time.time() if t is None else t, field, value, previous))
+            if (len(self._pending) >= self.flush_rows
+                    or time.monotonic() - self._flushed >= self.flush_interval):
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def flush_due(self):
+        """Flush if flush_interval passed, call periodically so changes
+        are written without waiting for the next record"""
+        with self._lock:
+            if self._pending and time.monotonic() - self._flushed >= self.flush_interval:
+                self._flush()
+
+    def _flush(self):
+        """Insert pending changes, a database error (e.g. locked or
+        corrupt) is reported and loses them rather than the caller's
+        thread (e.g. the serial thread)"""
+        if self._pending:
+            try:
+                with self._db:  # one transaction
+                    self._db.executemany("INSERT INTO journal VALUES (?, ?, ?, ?)", self._pending)
+            except sqlite3.Error as e:
+                print(f"Journal Error: {e}, {len(self._pending)} changes lost")
+            self._pending = []
+        self._flushed = time.monotonic()
+
+    def fields(self) -> list:
+        self.flush()
+        with self._lock:
+            return [row[0] for row in self._db.execute(
+                "SELECT DISTINCT field FROM journal ORDER BY field")]
+
+    def query(self, field=None, t0=None, t1=None, limit=10000) -> list:
+        """Get (t, field, value, previous) changes of field (default all)
+        from t0 to t1 (default unbounded), oldest first"""
+        where, args = [], []
+        if field is not None:
+            where.append("field = ?")
+            args.append(field)
+        if t0 is not None:
+            where.append("t >= ?")
+            args.append(t0)
+        if t1 is not None:
+            where.append("t <= ?")
+            args.append(t1)
+        sql = "SELECT t, field, value, previous FROM journal"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        self.flush()
+        with self._lock:
+            return self._db.execute(sql + " ORDER BY t LIMIT ?", args + [limit]).fetchall()
+
+    def state_at(self, t: float) -> dict:
+        """Get the value of every field in effect at t"""
+        self.flush()
+        with self._lock:
+            fields = [row[0] for row in self._db.execute("SELECT DISTINCT field FROM journal")]
+            state = {}
+            for field in fields:  # one index seek each
+                row = self._db.execute("SELECT value FROM journal WHERE field = ? AND t <= ? "
+                                       "ORDER BY t DESC LIMIT 1", (field, t)).fetchone()
+                if row:
+                    state[field] = row[0]
+            return state
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._db.close()
+
+
+def format_time(t: float) -> str:
+    return datetime.datetime.fromtimestamp(t).isoformat(sep=' ', timespec='milliseconds')
+
+
+def _parse_datetime(text):
+    return datetime.datetime.fromisoformat(text).timestamp()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query a VSB state journal")
+    parser.add_argument('db')
+    parser.add_argument('--field')
+    parser.add_argument('--start', type=_parse_datetime)
+    parser.add_argument('--end', type=_parse_datetime)
+    parser.add_argument('--at', type=_parse_datetime, help="print every field's value at AT")
+    args = parser.parse_args(argv)
+
+    journal = Journal(args.db)
+    if args.at is not None:
+        for field, value in sorted(journal.state_at(args.at).items()):
+            print(f"{field}: {value}")
+    else:
+        for t, field, value, previous in journal.query(args.field, args.start, args.end):
+            print(f"{format_time(t)}  {field}: {previous} -> {value}")
+    journal.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""
+Sparse timestamp index of SerialLogger/StructuredLogger CSV logs.
+
+The index is a sidecar file '<log>.idx' of (timestamp, byte offset) pairs,
+one per stride bytes of log, so a time range is found by bisecting the
+index and seeking instead of scanning the whole log.
+
+Usage:
+    python log_index.py build LOG [--stride BYTES]
+    python log_index.py query LOG START END [--channels 1,2,...]
+START and END are ISO datetimes, e.g. "2024-05-01 13:00:00".
+"""
+
+import argparse
+import datetime
+import bisect
+import array
+import sys
+import os
+import re
+
+DEFAULT_STRIDE = 65536
+CV_REGEX = re.compile(rb"(\d+):\s+(\d+)\s*$")  # channel, value of 'DBG CV n: value'
+_second_cache: dict[bytes, float] = {}  # 'YYYY-MM-DD HH:MM:SS' to epoch
+
+
+def index_path(log_path) -> str:
+    return str(log_path) + '.idx'
+
+
+def parse_timestamp(line: bytes):
+    """Get seconds since epoch of a log line, None if it has no timestamp"""
+    try:
+        stamp = line[:line.index(b',')]
+        second = stamp[:19]
+        base = _second_cache.get(second)
+        if base is None:
+            if len(_second_cache) > 4096:
+                _second_cache.clear()
+            base = _second_cache[second] = datetime.datetime.fromisoformat(second.decode()).timestamp()
+        return base + float(stamp[19:]) if len(stamp) > 19 else base
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class IndexWriter:
+    """Appends index entries while logging, at most one per stride bytes.
+    NOTE: Resets the index if the log is empty (new or truncated)."""
+    def __init__(self, log_path, offset, stride=DEFAULT_STRIDE):
+        self.stride = stride
+        self.file = open(index_path(log_path), 'ab' if offset > 0 else 'wb')
+        self.next_offset = offset
+
+    def offer(self, t: float, offset: int):
+        """Offer a line starting at offset with timestamp t"""
+        if offset >= self.next_offset:
+            array.array('d', (t, offset)).tofile(self.file)
+            self.file.flush()
+            self.next_offset = offset + self.stride
+
+    def close(self):
+        try:
+            if self.file:
+                self.file.close()
+        except Exception:
+            pass  # File already closed
+
+
+def _sample_range(log_path, start, end, stride):
+    """Index entries of the first timestamped line after each stride in [start, end)"""
+    entries = []
+    with open(log_path, 'rb') as file:
+        pos = start
+        while pos < end:
+            file.seek(max(pos - 1, 0))
+            if pos > 0:
+                file.readline()  # to start of next line
+            for _ in range(8):  # skip header or garbled lines
+                offset = file.tell()
+                line = file.readline()
+                if not line:
+                    return entries
+                t = parse_timestamp(line)
+                if t is not None:
+                    entries.append((t, offset))
+                    break
+            pos = max(pos + stride, file.tell())
+    return entries
+
+
+def build_index(log_path, stride=DEFAULT_STRIDE):
+    """Build or extend the index of a log. Only one line per stride bytes
+    is read (seeking between them), so this is I/O bound.
+
+    Returns:
+        LogIndex: Index of the log.
+    """
+    index = LogIndex(log_path)
+    size = os.path.getsize(log_path)
+    start = int(index.offsets[-1]) + stride if len(index.offsets) else 0
+    if len(index.offsets) and index.offsets[-1] >= size:
+        start = 0  # log truncated since indexed, rebuild
+    entries = _sample_range(log_path, start, size, stride)
+    with open(index_path(log_path), 'ab' if start > 0 else 'wb') as file:
+        array.array('d', [v for e in entries for v in e]).tofile(file)
+    return LogIndex(log_path)
+
+
+class LogIndex:
+    """Time range queries on a log using its sidecar index.
+    NOTE: Assumes timestamps increase through the log."""
+    def __init__(self, log_path):
+        self.log_path = log_path
+        pairs = array.array('d')
+        if os.path.exists(index_path(log_path)):
+            with open(index_path(log_path), 'rb') as file:
+                data = file.read()
+            pairs.frombytes(data[:len(data) - len(data) % 16])
+        self.times = pairs[0::2]
+        self.offsets = pairs[1::2]
+
+    def _header(self, file):
+        """Wide CSV column names, None if a raw log"""
+        file.seek(0)
+        first = file.readline()
+        if first.startswith(b'timestamp,'):
+            return first.rstrip(b'\r\n').split(b',')
+        return None
+
+    def samples(self, t0=float('-inf'), t1=float('inf')):
+        """Yield (timestamp, channel, value) of graphed samples, i.e. 'DBG CV' 
+        RX lines of a raw log or the channel columns of a wide CSV"""
+        with open(self.log_path, 'rb') as file:
+            header = self._header(file)
+        if header:
+            columns = [(i, int(name[2:])) for i, name in enumerate(header)
+                       if name.startswith(b'ch') and name[2:].isdigit()]
+        for line in self.query(t0, t1):
+            t = parse_timestamp(line)
+            if header:
+                cells = line.split(b',')
+                for i, channel in columns:
+                    if i < len(cells) and cells[i]:
+                        yield t, channel, float(cells[i])
+            elif b',RX,' in line and b'DBG CV' in line:
+                match = CV_REGEX.search(line)
+                if match:
+                    yield t, int(match.group(1)), float(match.group(2))
+    
+    def query(self, t0: float, t1: float, channels=None):
+        """Yield log lines (bytes, newline stripped) with t0 <= timestamp <= t1.
+
+        Args:
+            t0, t1 (float): Seconds since epoch.
+            channels (set[int]): Only these channels, i.e. the 'DBG CV'
+                lines of a raw log or the columns of a wide CSV.
+        """
+        ndx = bisect.bisect_right(self.times, t0) - 1
+        offset = int(self.offsets[ndx]) if ndx >= 0 else 0
+        with open(self.log_path, 'rb') as file:
+            header = self._header(file)
+            columns = None
+            if header and channels is not None:
+                keep = {f'ch{ch}'.encode() for ch in channels}
+                columns = [i for i, name in enumerate(header)
+                           if i == 0 or not name.startswith(b'ch') or name in keep]
+            file.seek(offset)
+            for line in file:
+                t = parse_timestamp(line)
+                if t is None or t < t0:
+                    continue
+                if t > t1:
+                    return
+                line = line.rstrip(b'\r\n')
+                if columns is not None:
+                    cells = line.split(b',')  # NOTE: readouts with quoted commas may shift
+                    line = b','.join(cells[i] for i in columns if i < len(cells))
+                elif channels is not None:
+                    match = CV_REGEX.search(line)
+                    if not match or int(match.group(1)) not in channels:
+                        continue
+                yield line
+
+
+def _parse_datetime(text):
+    return datetime.datetime.fromisoformat(text).timestamp()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index and query VSB logs by time")
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help="build or extend LOG.idx")
+    build.add_argument('log')
+    build.add_argument('--stride', type=int, default=DEFAULT_STRIDE)
+    query = sub.add_parser('query', help="print lines between START and END")
+    query.add_argument('log')
+    query.add_argument('start', type=_parse_datetime)
+    query.add_argument('end', type=_parse_datetime)
+    query.add_argument('--channels', type=lambda s: {int(c) for c in s.split(',')})
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        index = build_index(args.log, args.stride)
+        print(f"{len(index.times)} entries in {index_path(args.log)}")
+    else:
+        if not os.path.exists(index_path(args.log)):
+            build_index(args.log)
+        out = sys.stdout.buffer
+        for line in LogIndex(args.log).query(args.start, args.end, args.channels):
+            out.write(line + b'\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,36 +1,253 @@
 
 import datetime
+import threading
+import csv
+import time
+import numpy as np
+from log_index import IndexWriter, DEFAULT_STRIDE
+from perf import STATS
 
 class SerialLogger:
-    """Class for logging serial RX/TX data to file"""
-    def __init__(self, filepath, mode='a'):
+    """Class for logging serial RX/TX data to file.
+    NOTE: Data may be str or bytes-like, bytes are written as is.
+    
+    Unless index_stride is None, a sparse time index for log_index.py is
+    kept up to date alongside the log (<filepath>.idx).
+    """
+    def __init__(self, filepath, mode='ab', index_stride=DEFAULT_STRIDE):
         if not filepath or filepath == '':
             raise OSError("SerialLogger null path: {}".format(filepath))
         elif not filepath.endswith(('.csv', '.txt')):
             raise OSError("SerialLogger invalid file extension: {}".format(filepath))
         else:
             self.file = open(filepath, mode)
-        
-    def __format_entry(self, data, direction):
-        return f'{datetime.datetime.now()},{direction},{data}\n'
+        self.offset = self.file.tell()
+        self._stage = STATS.stage("log write")
+        self._lock = threading.Lock()  # writes and close() from different threads
+        self._second = None
+        self._second_prefix = b''
+        self.index = None
+        if index_stride:
+            self.index = IndexWriter(filepath, self.offset, index_stride)
     
-    def __log(self, data, direction):
-        if self.file.closed:
-            raise Exception('Logger is closed')
-        self.file.write(self.__format_entry(data, direction))
+    def __timestamp(self, t) -> bytes:
+        """Format t as datetime str does, the date and time of day
+        formatted once per second"""
+        second = int(t)
+        if second != self._second:
+            self._second = second
+            self._second_prefix = datetime.datetime.fromtimestamp(second).strftime(
+                '%Y-%m-%d %H:%M:%S').encode()
+        return b'%s.%06d' % (self._second_prefix, int((t - second) * 1e6))
+    
+    def __log(self, data, direction, t=None):
+        with self._lock, self._stage:
+            if self.file.closed:
+                raise Exception('Logger is closed')
+            if isinstance(data, str):
+                data = data.encode('utf-8')
+            if t is None:
+                t = time.time()
+            if self.index:
+                self.index.offer(t, self.offset)
+            prefix = b'%s,%s,' % (self.__timestamp(t), direction.encode())
+            self.file.write(prefix)
+            self.file.write(data)
+            self.file.write(b'\n')
+            self.offset += len(prefix) + len(data) + 1
     
-    def log_tx(self, data):
-        self.__log(data, 'TX')
+    def log_tx(self, data, t=None):
+        """Log TX data sent at t seconds since epoch, default now"""
+        self.__log(data, 'TX', t)
     
-    def log_rx(self, data):
-        self.__log(data, 'RX')
+    def log_rx(self, data, t=None):
+        """Log RX data captured at t seconds since epoch, default now"""
+        self.__log(data, 'RX', t)
+    
+    def log_gap(self, reason):
+        """Mark the start of a gap in data (connection lost)"""
+        self.__log(reason, 'GAP')
+    
+    def log_reconnect(self, downtime):
+        """Mark the end of a gap, with its duration in seconds"""
+        self.__log(f'{downtime:.3f}s', 'RECONNECT')
+    
+    def log_alarm(self, text):
+        """Mark an alarm triggering"""
+        self.__log(text, 'ALARM')
+    
+    def log_alarm_clear(self, text):
+        """Mark an alarm clearing"""
+        self.__log(text, 'CLEAR')
     
     def close(self):
+        """Close the log, waiting for a write in progress (e.g. of the
+        serial thread when closed from the GUI)"""
         try:
-            if self.file:
+            with self._lock:
+                if self.index:
+                    self.index.close()
+                if self.file:
+                    self.file.close()
+        except Exception:
+            pass  # File already closed
+    
+    def __del__(self):
+        self.close()
+
+
+def _csv_field(text: str) -> str:
+    """Quote text for CSV if necessary"""
+    if any(c in text for c in ',"\n'):
+        return '"{}"'.format(text.replace('"', '""'))
+    return text
+
+
+class StructuredLogger:
+    """Class for logging parsed samples to a wide CSV file.
+    
+    One row per sample period: timestamp, one column per channel (mean
+    of the period's samples, blank if none) and the latest readouts. 
+    Rows are buffered and written in bulk every flush_rows rows.
+    Appending to an existing log keeps the columns of its header.
+    
+    Args:
+        period (float): Seconds per row.
+        channels (list): Channel columns, default the channels seen
+            before the first flush (later new channels are ignored).
+        readouts (list): Readout columns, see VSBControls.stat_names.
+    """
+    def __init__(self, filepath, period=1.0, channels=None,
+                 readouts=("PVM", "CTC", "Last CV", "Last CV DN", "Last Err", "Errs"),
+                 flush_rows=60, mode='a'):
+        if not filepath or filepath == '':
+            raise OSError("StructuredLogger null path: {}".format(filepath))
+        elif not filepath.endswith(('.csv', '.txt')):
+            raise OSError("StructuredLogger invalid file extension: {}".format(filepath))
+        else:
+            self.file = open(filepath, mode)
+        self.period = period
+        self.flush_rows = flush_rows
+        self._lock = threading.Lock()  # samples and readouts from different threads
+        if self.file.tell() > 0:
+            try:
+                channels, readouts = self.__read_header(filepath)
+            except OSError:
                 self.file.close()
+                raise
+        self.readout_names = list(readouts)
+        self.readouts = {name: '' for name in readouts}
+        self.channels = list(channels) if channels else []
+        self.is_fixed = channels is not None
+        self._index = {ch: i for i, ch in enumerate(self.channels)}
+        self._sums = np.zeros(len(self.channels))
+        self._counts = np.zeros(len(self.channels))
+        self._row_start = None
+        self._rows = []  # (start, means, readouts)
+        
+    @staticmethod
+    def __read_header(filepath) -> tuple[list, list]:
+        """Get (channels, readout names) of an existing log's header"""
+        with open(filepath, 'r', newline='') as file:
+            columns = next(csv.reader(file), [])
+        if not columns or columns[0] != 'timestamp':
+            raise OSError("StructuredLogger not a wide CSV log: {}".format(filepath))
+        channels = []
+        for column in columns[1:]:
+            if not (column.startswith('ch') and column[2:].isdigit()):
+                break
+            channels.append(int(column[2:]))
+        return channels, columns[1 + len(channels):]
+    
+    def __align(self, t):
+        return t - (t % self.period)
+    
+    def __advance(self, t):
+        """Close current row if t is past its period"""
+        if self._row_start is None:
+            self._row_start = self.__align(t)
+        elif t >= self._row_start + self.period:
+            self.__close_row()
+            self._row_start = self.__align(t)
+    
+    def __close_row(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = self._sums / self._counts  # nan if no samples
+        self._rows.append((self._row_start, means, 
+                           [self.readouts[name] for name in self.readout_names]))
+        self._sums = np.zeros(len(self.channels))
+        self._counts = np.zeros(len(self.channels))
+        if len(self._rows) >= self.flush_rows:
+            self.__flush()
+    
+    def sample(self, channel, value, t):
+        """Add channel sample at t seconds since epoch"""
+        with self._lock:
+            self.__advance(t)
+            ndx = self._index.get(channel)
+            if ndx is None:
+                if self.is_fixed:
+                    return
+                ndx = self._index[channel] = len(self.channels)
+                self.channels.append(channel)
+                self._sums = np.append(self._sums, 0.0)
+                self._counts = np.append(self._counts, 0.0)
+            self._sums[ndx] += value
+            self._counts[ndx] += 1
+        
+    def readout(self, name, text, t):
+        """Set latest readout at t seconds since epoch"""
+        if name in self.readouts:
+            with self._lock:
+                self.__advance(t)
+                self.readouts[name] = _csv_field(text.strip())
+    
+    def __write_header(self):
+        order = sorted(range(len(self.channels)), key=lambda i: self.channels[i])
+        self.channels = [self.channels[i] for i in order]
+        self._index = {ch: i for i, ch in enumerate(self.channels)}
+        self._sums = self._sums[order]
+        self._counts = self._counts[order]
+        self._rows = [(start, np.append(means, [np.nan] * (len(order) - len(means)))[order], r)
+                      for start, means, r in self._rows]
+        self.is_fixed = True
+        if self.file.tell() == 0:
+            columns = ['timestamp'] + [f'ch{ch}' for ch in self.channels] + self.readout_names
+            self.file.write(','.join(map(_csv_field, columns)) + '\n')
+    
+    def flush(self):
+        """Write buffered rows to file"""
+        with self._lock:
+            self.__flush()
+    
+    def __flush(self):
+        if self.file.closed:
+            raise Exception('Logger is closed')
+        if not self.is_fixed:
+            self.__write_header()
+        if not self._rows:
+            return
+        block = np.vstack([means for _, means, _ in self._rows])
+        cells = np.char.mod('%.6g', block)
+        cells[np.isnan(block)] = ''
+        lines = []
+        for (start, _, readouts), values in zip(self._rows, cells):
+            stamp = datetime.datetime.fromtimestamp(start).isoformat(sep=' ', timespec='milliseconds')
+            lines.append(','.join([stamp, *values, *readouts]) + '\n')
+        self.file.writelines(lines)
+        self._rows.clear()
+    
+    def close(self):
+        try:
+            with self._lock:
+                if self.file and not self.file.closed:
+                    if self._row_start is not None:
+                        self.__close_row()
+                        self._row_start = None
+                    self.__flush()
+                    self.file.close()
         except Exception:
             pass  # File already closed
     
     def __del__(self):
-        self.close()
\ No newline at end of file
+        self.close()
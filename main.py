@@ -3,7 +3,27 @@
 
 from controller.main import Controller
 from view.main import View
+import argparse
+import os
 
-view = View()
-controller = Controller(view)
-controller.start()
\ No newline at end of file
+if __name__ == "__main__":  # capture processes re-import this module
+    parser = argparse.ArgumentParser(description="VSB Logger")
+    parser.add_argument("--graph", choices=("matplotlib", "canvas"), default="matplotlib",
+                        help="live graph renderer, canvas is lighter on slow machines")
+    parser.add_argument("--serve", type=int, metavar="PORT",
+                        help="publish lines and samples to TCP/WebSocket clients on PORT")
+    parser.add_argument("--serve-host", default="127.0.0.1",
+                        help="address to publish on (default local only)")
+    parser.add_argument("--serve-token", default=os.environ.get("VSB_SERVE_TOKEN"),
+                        help="token authorizing clients to send TX (default $VSB_SERVE_TOKEN, "
+                             "none accepts no TX)")
+    parser.add_argument("--journal", metavar="DB",
+                        help="record state changes to the SQLite journal DB (default none)")
+    args = parser.parse_args()
+    view = View(graph_backend=args.graph)
+    controller = Controller(view)
+    if args.journal:
+        controller.open_journal(args.journal)
+    if args.serve is not None:
+        controller.serve(args.serve, args.serve_host, args.serve_token)
+    controller.start()
@@ -0,0 +1,260 @@
+import threading
+import json
+import numpy as np
+from .metrics import Calibration
+
+
+class Alarm:
+    """Active (or momentary) alarm of a rule on a channel"""
+    def __init__(self, rule: 'Rule', channel, t, value):
+        self.rule = rule
+        self.channel = channel
+        self.t = t
+        self.value = value
+
+    def __str__(self):
+        where = f" ch{self.channel}" if self.channel is not None else ""
+        return f"{self.rule.name}{where}: {self.value:.4g}"
+
+
+class Rule:
+    """Base of alarm rules.
+
+    Args:
+        name (str): Shown in alarms and log markers.
+        channels (list[int]): Channels checked, None for all.
+        command (str): Sent to the VSB when the alarm triggers.
+    """
+    kind = None
+
+    def __init__(self, name, channels=None, command=None):
+        self.name = name
+        self.channels = set(channels) if channels is not None else None
+        self.command = command
+
+    def applies(self, channels: np.ndarray) -> np.ndarray:
+        if self.channels is None:
+            return np.ones(len(channels), dtype=bool)
+        return np.isin(channels, list(self.channels))
+
+
+class ThresholdRule(Rule):
+    """Volts outside low to high"""
+    kind = 'threshold'
+
+    def __init__(self, name, low=None, high=None, **kwargs):
+        super().__init__(name, **kwargs)
+        self.low = low if low is not None else -np.inf
+        self.high = high if high is not None else np.inf
+
+    def violations(self, channels, volts, dvdt):
+        return self.applies(channels) & ((volts < self.low) | (volts > self.high))
+
+
+class RateRule(Rule):
+    """Absolute dV/dt between consecutive samples above max_rate V/s"""
+    kind = 'rate'
+
+    def __init__(self, name, max_rate, **kwargs):
+        super().__init__(name, **kwargs)
+        self.max_rate = max_rate
+
+    def violations(self, channels, volts, dvdt):
+        return self.applies(channels) & (np.abs(dvdt) > self.max_rate)
+
+
+class StaleRule(Rule):
+    """No sample of a channel for timeout seconds"""
+    kind = 'stale'
+
+    def __init__(self, name, timeout, **kwargs):
+        super().__init__(name, **kwargs)
+        self.timeout = timeout
+
+
+class CounterRule(Rule):
+    """Numeric readout (e.g. Errs) increased"""
+    kind = 'counter'
+
+    def __init__(self, name, readout="Errs", **kwargs):
+        super().__init__(name, **kwargs)
+        self.readout = readout
+        self.last = None
+
+
+RULE_TYPES = {cls.kind: cls for cls in (ThresholdRule, RateRule, StaleRule, CounterRule)}
+
+
+def load_rules(path) -> list[Rule]:
+    """Load rules from a JSON list of objects with a 'type' of threshold,
+    rate, stale or counter and that rule's arguments, e.g.
+    {"type": "threshold", "name": "Cell OV", "high": 4.25, "command": "ST"}"""
+    with open(path, 'r') as file:
+        specs = json.load(file)
+    rules = []
+    for spec in specs:
+        spec = dict(spec)
+        kind = spec.pop('type', None)
+        if kind not in RULE_TYPES:
+            raise ValueError(f"Unknown alarm rule type: {kind}")
+        rules.append(RULE_TYPES[kind](**spec))
+    return rules
+
+
+class AlarmEngine:
+    """Evaluates alarm rules on incoming samples.
+
+    Samples are queued by add() and evaluated together, vectorized, once
+    batch_size samples are queued or max_delay seconds passed. An alarm
+    triggers when a channel first violates a rule and clears when the
+    channel's latest sample no longer does. Batches are queued and
+    evaluated under one lock, so flushes from the GUI thread (see
+    check_stale) keep samples in order. Listeners are called outside it.
+
+    Args:
+        on_alarm (function): Called with each triggered Alarm.
+        on_clear (function): Called with each cleared Alarm.
+    """
+    def __init__(self, rules: list[Rule] = None, calibration: Calibration = None,
+                 on_alarm=None, on_clear=None, batch_size=64, max_delay=0.05):
+        self.rules = rules if rules is not None else default_rules()
+        self.calibration = calibration if calibration else Calibration()
+        self.on_alarm = on_alarm if on_alarm else lambda alarm: None
+        self.on_clear = on_clear if on_clear else lambda alarm: None
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.active: dict[tuple, Alarm] = {}  # (rule name, channel) to alarm
+        self.last_seen: dict[int, tuple] = {}  # channel to (t, volts)
+        self._pending = ([], [], [])
+        self._batch_t = None
+        self._lock = threading.Lock()
+
+    def set_rules(self, rules: list[Rule]):
+        with self._lock:
+            self.rules = rules
+            self.active.clear()
+
+    def set_calibration(self, calibration: Calibration):
+        self.calibration = calibration
+
+    def add(self, channel, t, dn):
+        """Queue a sample, evaluating the queue when due"""
+        with self._lock:
+            channels, times, dns = self._pending
+            channels.append(channel)
+            times.append(t)
+            dns.append(dn)
+            if self._batch_t is None:
+                self._batch_t = t
+            due = len(channels) >= self.batch_size or t - self._batch_t >= self.max_delay
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Evaluate queued samples"""
+        with self._lock:
+            channels, times, dns = self._pending
+            if not channels:
+                return
+            self._pending = ([], [], [])
+            self._batch_t = None
+            triggered, cleared = self._evaluate(np.array(channels), np.array(times, dtype=np.float64),
+                                                np.array(dns, dtype=np.float64))
+        self._notify(triggered, cleared)
+
+    def add_batch(self, channels: np.ndarray, times: np.ndarray, dns: np.ndarray):
+        """Evaluate a batch of samples, in time order"""
+        with self._lock:
+            triggered, cleared = self._evaluate(channels, times, dns)
+        self._notify(triggered, cleared)
+
+    def _evaluate(self, channels, times, dns) -> tuple[list, list]:
+        """Get (triggered, cleared) alarms of a batch, under the lock"""
+        volts = self.calibration.to_volts(channels, dns)
+        dvdt = self._dvdt(channels, times, volts)
+        # index of the last sample of each channel in the batch
+        uniq, rev_first = np.unique(channels[::-1], return_index=True)
+        last = len(channels) - 1 - rev_first
+        triggered, cleared = [], []
+        for rule in self.rules:
+            if not hasattr(rule, 'violations'):
+                continue
+            mask = rule.violations(channels, volts, dvdt)
+            if mask.any():  # first violation of each channel
+                viol = np.flatnonzero(mask)
+                viol_channels, first = np.unique(channels[viol], return_index=True)
+                for channel, ndx in zip(viol_channels, viol[first]):
+                    key = (rule.name, int(channel))
+                    if key not in self.active:
+                        alarm = Alarm(rule, key[1], times[ndx], volts[ndx])
+                        self.active[key] = alarm
+                        triggered.append(alarm)
+            if self.active:
+                for channel, ndx in zip(uniq, last):
+                    key = (rule.name, int(channel))
+                    if not mask[ndx] and key in self.active:
+                        cleared.append(self.active.pop(key))
+        for channel, ndx in zip(uniq, last):
+            self.last_seen[int(channel)] = (times[ndx], volts[ndx])
+        return triggered, cleared
+
+    def _dvdt(self, channels, times, volts):
+        """dV/dt of each sample from the previous sample of its channel"""
+        order = np.argsort(channels, kind='stable')
+        ch, t, v = channels[order], times[order], volts[order]
+        prev_t, prev_v = np.roll(t, 1), np.roll(v, 1)
+        firsts = np.flatnonzero(np.concatenate(([True], ch[1:] != ch[:-1])))
+        for ndx in firsts:  # previous batch's last sample, per channel
+            prev_t[ndx], prev_v[ndx] = self.last_seen.get(int(ch[ndx]), (np.inf, 0.0))
+        dt = t - prev_t
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rates = np.where(dt > 0, (v - prev_v) / dt, 0.0)
+        dvdt = np.empty(len(channels))
+        dvdt[order] = rates
+        return dvdt
+
+    def check_stale(self, now):
+        """Evaluate stale rules, call periodically"""
+        self.flush()
+        triggered, cleared = [], []
+        with self._lock:
+            for rule in self.rules:
+                if not isinstance(rule, StaleRule):
+                    continue
+                for channel, (t, _) in self.last_seen.items():
+                    if rule.channels is not None and channel not in rule.channels:
+                        continue
+                    key = (rule.name, channel)
+                    age = now - t
+                    if age > rule.timeout and key not in self.active:
+                        self.active[key] = Alarm(rule, channel, now, age)
+                        triggered.append(self.active[key])
+                    elif age <= rule.timeout and key in self.active:
+                        cleared.append(self.active.pop(key))
+        self._notify(triggered, cleared)
+
+    def readout(self, name, text, t):
+        """Evaluate counter rules on a readout"""
+        try:
+            value = float(text)
+        except ValueError:
+            return
+        triggered = []
+        with self._lock:
+            for rule in self.rules:
+                if isinstance(rule, CounterRule) and rule.readout == name:
+                    if rule.last is not None and value > rule.last:
+                        triggered.append(Alarm(rule, None, t, value))
+                    rule.last = value
+        self._notify(triggered, [])
+
+    def _notify(self, triggered, cleared):
+        for alarm in triggered:
+            self.on_alarm(alarm)
+        for alarm in cleared:
+            self.on_clear(alarm)
+
+
+def default_rules() -> list[Rule]:
+    """Rules not needing cell specific limits"""
+    return [StaleRule("Stale", timeout=10), CounterRule("Errors", readout="Errs")]
@@ -1,7 +1,145 @@
 from typing import Callable, TypeVar, Any
+from collections import deque
+import threading
 
 Self = TypeVar("Self", bound="ObservableModel")
 
+# Listener delivery modes
+INLINE = "inline"  # called on the emitting thread
+WORKER = "worker"  # called on the listener's own thread
+MAIN = "main"      # called by MainLoopPump.pump(), e.g. from the Tk main loop
+
+
+class EventSnapshot:
+    """Copy of a model's event fields for deferred listeners, other
+    attributes (e.g. methods) are those of the model"""
+    def __init__(self, model, **fields):
+        self._model = model
+        self.__dict__.update(fields)
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+class Subscription:
+    """Listener of an event with its delivery mode and bounded queue.
+
+    Args:
+        maxlen (int): Deferred deliveries queued at most.
+        block (bool): Block the emitter when the queue is full, else
+            drop the oldest delivery (counted in dropped).
+    """
+    def __init__(self, fn, mode=INLINE, priority=0, maxlen=1024, block=False):
+        if mode not in (INLINE, WORKER, MAIN):
+            raise ValueError(f"Unknown delivery mode: {mode}")
+        self.fn = fn
+        self.mode = mode
+        self.priority = priority
+        self.maxlen = maxlen
+        self.block = block
+        self.dropped = 0
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.worker = None  # ListenerWorker of a WORKER subscription
+
+    def put(self, arg):
+        with self._cond:
+            if len(self._queue) >= self.maxlen:
+                if self.block:
+                    self._cond.wait_for(lambda: len(self._queue) < self.maxlen or self._closed)
+                else:
+                    self._queue.popleft()
+                    self.dropped += 1
+            self._queue.append(arg)
+            self._cond.notify_all()
+
+    def take(self, limit=None, timeout=None) -> list:
+        """Take up to limit queued deliveries, waiting up to timeout
+        for one if empty (0 to not wait)"""
+        with self._cond:
+            if not self._queue and timeout != 0:
+                self._cond.wait_for(lambda: self._queue or self._closed, timeout)
+            n = len(self._queue) if limit is None else min(limit, len(self._queue))
+            batch = [self._queue.popleft() for _ in range(n)]
+            if batch:
+                self._cond.notify_all()  # unblock emitters
+            return batch
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class ListenerWorker(threading.Thread):
+    """Thread delivering a WORKER subscription's queue in order, until
+    closed and drained"""
+    def __init__(self, sub: Subscription):
+        super().__init__()
+        self.sub = sub
+        self.daemon = True  # threading.Thread
+        self.start()
+
+    def run(self):
+        sub = self.sub
+        while True:
+            batch = sub.take(timeout=0.5)
+            if not batch and sub._closed:
+                break
+            for arg in batch:
+                try:
+                    sub.fn(arg)
+                except Exception as e:
+                    print(f"Listener Error: {e}")
+
+
+class MainLoopPump:
+    """Deliveries of MAIN subscriptions and posted calls (see call()),
+    run by calling pump() from the main (GUI) thread, higher priority
+    subscriptions first"""
+    def __init__(self):
+        self.subs: tuple[Subscription, ...] = ()
+        self._calls = deque()  # (fn, args), lossless
+        self._lock = threading.Lock()
+
+    def add(self, sub: Subscription):
+        with self._lock:
+            self.subs = tuple(sorted(self.subs + (sub,), key=lambda s: -s.priority))
+
+    def remove(self, sub: Subscription):
+        with self._lock:
+            self.subs = tuple(s for s in self.subs if s is not sub)
+
+    def call(self, fn, *args):
+        """Call fn(*args) on the next pump(), from any thread (e.g.
+        widget updates of listeners running on the serial thread)"""
+        self._calls.append((fn, args))
+
+    def pump(self, limit=1000) -> int:
+        """Deliver up to limit queued events per subscription, then the
+        posted calls, return count. A listener error is reported and
+        does not stop the other deliveries."""
+        count = 0
+        for sub in self.subs:
+            for arg in sub.take(limit, timeout=0):
+                self._run(sub.fn, arg)
+                count += 1
+        for _ in range(len(self._calls)):
+            fn, args = self._calls.popleft()
+            self._run(fn, *args)
+            count += 1
+        return count
+
+    def _run(self, fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"Listener Error: {e}")
+
+
+MAIN_LOOP = MainLoopPump()
+
 
 class ObservableModel:
     """Models that can have event listeners.
@@ -10,12 +148,23 @@ class ObservableModel:
     When any data changes, relavent events can be triggered.
     This allows all the controllers that depends on the current state of those data to
     react to the changes.
+
+    Listeners are called inline on the emitting thread by default, or
+    deferred to their own worker thread or the main loop (see MAIN_LOOP)
+    with a snapshot of the model's event fields (see snapshot()).
+    Listener lists are copy-on-write, so listeners may be added or
+    removed while an event is being delivered. A listener error is
+    reported and does not stop the other listeners or the emitter.
     """
+    snapshot_fields: tuple[str, ...] = ()  # attributes copied for deferred listeners
 
     def __init__(self):
-        self._event_listeners: dict[str, list[Callable[[Any], None]]] = {}
+        self._event_listeners: dict[str, tuple[Subscription, ...]] = {}
+        self._deferred: dict[str, bool] = {}  # event to any non-inline listener
+        self._listeners_lock = threading.Lock()
 
-    def add_event_listener(self, event: str, fn: Callable[[Self], None]) -> Callable:
+    def add_event_listener(self, event: str, fn: Callable[[Self], None], mode=INLINE,
+                           priority=0, maxlen=1024, block=False) -> Callable:
         """Registers event callback functions.
 
         Adds a callback function to the list of listeners of the specified event and
@@ -24,21 +173,60 @@ class ObservableModel:
         Args:
             event (str): Name of the event.
             fn (function): Callback function to be registered.
-                The function will be called with the model instance as the argument.
+                The function will be called with the model instance as the argument
+                (a snapshot of it if not INLINE).
+            mode (str): INLINE, WORKER or MAIN delivery.
+            priority (int): Higher priority listeners are called first.
+            maxlen (int): Deferred deliveries queued at most, see Subscription.
+            block (bool): Block the emitter when the queue is full, else drop
+                the oldest delivery.
 
         Returns:
-            function: Function to remove the listener function.
+            function: Function to remove the listener function (waiting up
+                to 1 s for the queued deliveries of a WORKER listener).
         """
-        try:
-            self._event_listeners[event].append(fn)
-        except KeyError:
-            self._event_listeners[event] = [fn]
+        sub = Subscription(fn, mode, priority, maxlen, block)
+        if mode == WORKER:
+            sub.worker = ListenerWorker(sub)
+        elif mode == MAIN:
+            MAIN_LOOP.add(sub)
+        with self._listeners_lock:
+            subs = self._event_listeners.get(event, ()) + (sub,)
+            self._event_listeners[event] = tuple(sorted(subs, key=lambda s: -s.priority))
+            self._deferred[event] = any(s.mode != INLINE for s in self._event_listeners[event])
+
+        return lambda: self._remove_event_listener(event, sub)
+
+    def _remove_event_listener(self, event: str, sub: Subscription):
+        with self._listeners_lock:
+            subs = tuple(s for s in self._event_listeners.get(event, ()) if s is not sub)
+            self._event_listeners[event] = subs
+            self._deferred[event] = any(s.mode != INLINE for s in subs)
+        if sub.mode == MAIN:
+            MAIN_LOOP.remove(sub)
+        sub.close()
+        if sub.worker and sub.worker is not threading.current_thread():
+            sub.worker.join(1.0)  # queued deliveries, e.g. log writes
 
-        return lambda: self._event_listeners[event].remove(fn)
+    def snapshot(self, event: str):
+        """Copy of snapshot_fields for deferred listeners of event"""
+        fields = {}
+        for name in self.snapshot_fields:
+            value = getattr(self, name)
+            fields[name] = bytes(value) if isinstance(value, memoryview) else value
+        return EventSnapshot(self, **fields)
 
     def trigger_event(self, event: str) -> None:
-        if event not in self._event_listeners.keys():
+        subs = self._event_listeners.get(event)
+        if not subs:
             return
 
-        for func in self._event_listeners[event]:
-            func(self)
+        snapshot = self.snapshot(event) if self._deferred[event] else None
+        for sub in subs:
+            if sub.mode == INLINE:
+                try:
+                    sub.fn(self)
+                except Exception as e:  # not an error of the emitter, e.g. the serial port
+                    print(f"Listener Error: {e}")
+            else:
+                sub.put(snapshot)
@@ -0,0 +1,129 @@
+"""
+File: baud.py
+Purpose: Baud rate detection by scoring the received byte stream
+
+At the wrong rate, bytes arrive as framing garbage: mostly outside
+printable ASCII and without regular line endings. Each candidate rate
+is tried on one open port handle (pyserial reconfigures in place), for
+at most dwell seconds, stopping at the first convincing rate.
+"""
+
+import threading
+import time
+import serial
+from .network import open_port
+
+BAUD_RATES = (115200, 57600, 38400, 19200, 9600)  # most likely first
+TEXT_BYTES = bytes(range(0x20, 0x7F)) + b'\t\r\n'
+
+
+def score(data: bytes, max_line=200) -> float:
+    """0 (garbage) to 1 (printable lines) likelihood data is text"""
+    if not data:
+        return 0.0
+    printable = 1 - len(data.translate(None, TEXT_BYTES)) / len(data)
+    lines = data.count(b'\n')
+    if lines:
+        structure = 1.0 if len(data) / lines <= max_line else 0.5
+    else:
+        structure = 0.75 if len(data) <= max_line else 0.25
+    return printable * structure
+
+
+def sample(ser, dwell, probe=None, min_bytes=64) -> bytes:
+    """Read from ser for up to dwell seconds or min_bytes, writing probe
+    once if nothing arrived in the first half of dwell"""
+    data = bytearray()
+    start = time.monotonic()
+    probed = probe is None
+    while len(data) < min_bytes:
+        elapsed = time.monotonic() - start
+        if elapsed >= dwell:
+            break
+        waiting = ser.in_waiting
+        if waiting:
+            data += ser.read(waiting)
+        elif not probed and elapsed >= dwell / 2:
+            ser.write(probe)
+            probed = True
+        else:
+            time.sleep(0.005)
+    return bytes(data)
+
+
+def detect_baud(ser, rates=BAUD_RATES, dwell=0.2, probe=b"SS\n", min_bytes=64,
+                accept=0.95, threshold=0.8, cancelled=None):
+    """Find the baud rate of text received on an open port.
+
+    Args:
+        ser (serial.Serial): Open port, left set to the detected rate.
+        dwell (float): Seconds at most per rate, so detection takes at
+            most len(rates) * dwell.
+        probe (bytes): Harmless command written to a quiet port, None
+            to only listen.
+        accept (float): Score of min_bytes ending detection at once.
+        threshold (float): Lowest score of a detected rate.
+        cancelled (threading.Event): Set to stop early.
+
+    Returns:
+        tuple: (rate or None, {rate: score} of the rates tried)
+    """
+    scores = {}
+    for rate in rates:
+        if cancelled is not None and cancelled.is_set():
+            break
+        ser.baudrate = rate
+        ser.reset_input_buffer()
+        data = sample(ser, dwell, probe, min_bytes)
+        scores[rate] = score(data[1:])  # first byte may be cut by the switch
+        if scores[rate] >= accept and len(data) >= min_bytes:
+            break
+    best = max(scores, key=scores.get, default=None)
+    if best is None or scores[best] < threshold:
+        return None, scores
+    ser.baudrate = best
+    ser.reset_input_buffer()
+    return best, scores
+
+
+class BaudDetector(threading.Thread):
+    """Opens port and detects its baud rate (see detect_baud) off the
+    GUI thread. When done is set: rate (None if undetected), scores,
+    ser (the open port, to reuse) or error."""
+    def __init__(self, port, **kwargs):
+        super().__init__()
+        self.daemon = True  # threading.Thread
+        self.port = port
+        self.kwargs = kwargs
+        self.rate = None
+        self.scores = {}
+        self.ser = None
+        self.error = None
+        self.done = threading.Event()
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()  # port closed by run or cancel
+
+    def run(self):
+        try:
+            self.ser = open_port(self.port, BAUD_RATES[0])
+            self.rate, self.scores = detect_baud(self.ser, cancelled=self._cancelled, **self.kwargs)
+        except (serial.SerialException, OSError) as e:
+            self.error = str(e)
+            if self.ser:
+                self.ser.close()
+                self.ser = None
+        with self._lock:
+            self._close_if_cancelled()
+            self.done.set()
+
+    def cancel(self):
+        """Stop detection, closing the port"""
+        with self._lock:
+            self._cancelled.set()
+            if self.done.is_set():
+                self._close_if_cancelled()
+
+    def _close_if_cancelled(self):
+        if self._cancelled.is_set() and self.ser:
+            self.ser.close()
+            self.ser = None
@@ -0,0 +1,208 @@
+"""
+File: frames.py
+Purpose: Binary framed telemetry decoding, interleaved with ASCII lines
+
+Frame layout (little-endian):
+    SYNC (0xA5) | LEN (u8) | TYPE (u8) | PAYLOAD (LEN bytes) | CRC (u16)
+CRC is CRC-16/CCITT (poly 0x1021, init 0xFFFF) of LEN, TYPE and PAYLOAD.
+A TYPE_SAMPLES payload is (u16 channel, u16 value) pairs.
+
+Bytes outside frames are ASCII text split into lines, so the terminal
+keeps working while samples arrive framed. SYNC is not ASCII, so text
+never starts a frame, and "lines" with non-ASCII or NUL bytes are the
+remains of frames with a corrupted SYNC, dropped.
+"""
+
+import binascii
+import struct
+import numpy as np
+from .main import SerialThread, Model
+from perf import STATS
+
+SYNC = 0xA5
+TYPE_SAMPLES = 0x01
+OVERHEAD = 5  # SYNC, LEN, TYPE and CRC bytes
+SAMPLE_DTYPE = np.dtype([('channel', '<u2'), ('value', '<u2')])
+
+
+def crc16(data) -> int:
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+def encode_frame(ftype: int, payload: bytes) -> bytes:
+    """Frame payload, e.g. to simulate the firmware"""
+    body = struct.pack('<BB', len(payload), ftype) + payload
+    return bytes([SYNC]) + body + struct.pack('<H', crc16(body))
+
+
+def encode_samples(channels, values) -> bytes:
+    """Frames of (channel, value) samples, at most 63 per frame"""
+    pairs = np.empty(len(channels), dtype=SAMPLE_DTYPE)
+    pairs['channel'] = channels
+    pairs['value'] = values
+    return b''.join(encode_frame(TYPE_SAMPLES, pairs[i:i + 63].tobytes())
+                    for i in range(0, len(pairs), 63))
+
+
+class FrameDecoder:
+    """Reusable read buffer splitting a byte stream into frames and
+    ASCII lines, keeping partial frames and lines for the next read.
+
+    A frame failing its CRC (counted in crc_errors) is skipped to where
+    its CRC matches if LEN has a bit error, else the bytes up to the next
+    SYNC are split as text, the line of the bad frame dropped as not
+    ASCII. Decoding resynchronizes by itself, keeping the lines after.
+    """
+    def __init__(self, size=65536):
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+        self.fill = 0  # bytes of partial frame or text at start of buffer
+        self.text = bytearray()  # partial line of text between frames
+        self.frames = 0
+        self.crc_errors = 0
+        self.malformed = 0  # valid frames of unknown type or bad length
+        self.garbage = 0  # lines dropped as not text
+        self.overflows = 0
+
+    def read(self, ser, waiting) -> int:
+        """Read up to waiting bytes from ser, return bytes read"""
+        n = ser.readinto(self.view[self.fill:min(self.fill + waiting, len(self.buf))])
+        self.fill += n
+        return n
+
+    def feed(self, data: bytes):
+        """Append data as if read (at most the free buffer space)"""
+        n = min(len(data), len(self.buf) - self.fill)
+        self.buf[self.fill:self.fill + n] = data[:n]
+        self.fill += n
+
+    def decode(self) -> tuple[list, np.ndarray]:
+        """Get (complete text lines as bytes, samples with 'channel' and
+        'value' fields) of the buffer"""
+        buf, view, fill = self.buf, self.view, self.fill
+        lines, payloads = [], []
+        pos = 0
+        while pos < fill:
+            sync = buf.find(SYNC, pos, fill)
+            if sync == -1:
+                self._text(view[pos:fill], lines)
+                pos = fill
+                break
+            if sync > pos:
+                self._text(view[pos:sync], lines)
+            if fill - sync < 2:
+                pos = sync
+                break  # length not read yet
+            end = sync + buf[sync + 1] + OVERHEAD
+            if end > fill:
+                pos = sync
+                break  # rest of frame not read yet
+            crc = buf[end - 2] | buf[end - 1] << 8
+            if crc16(view[sync + 1:end - 2]) != crc:
+                self.crc_errors += 1
+                pos = self._length_error_end(sync, fill)
+                if pos is None:  # not (only) LEN corrupt, e.g. SYNC in noise
+                    pos = buf.find(SYNC, sync + 1, fill)
+                    if pos == -1:
+                        pos = fill
+                    self._text(view[sync:pos], lines)
+                continue
+            self.frames += 1
+            if self.text and not (self.text.isascii() and 0 not in self.text):
+                self.garbage += 1  # remains of a bad frame end at a good one
+                self.text.clear()
+            if buf[sync + 2] == TYPE_SAMPLES and buf[sync + 1] % SAMPLE_DTYPE.itemsize == 0:
+                payloads.append(view[sync + 3:end - 2])
+            else:
+                self.malformed += 1
+            pos = end
+
+        samples = np.frombuffer(b''.join(payloads), dtype=SAMPLE_DTYPE)
+        if pos == 0 and fill == len(buf):
+            self.overflows += 1  # cannot happen with frames under 260 bytes
+            pos = fill
+        buf[:fill - pos] = view[pos:fill]  # keep partial frame
+        self.fill = fill - pos
+        return lines, samples
+
+    def _length_error_end(self, sync, fill):
+        """End of the frame at sync if its CRC matches with one bit of
+        LEN flipped, None if not (or not read yet)"""
+        buf = self.buf
+        for bit in range(8):
+            length = buf[sync + 1] ^ (1 << bit)
+            end = sync + length + OVERHEAD
+            if end <= fill and (crc16(bytes([length]) + buf[sync + 2:end - 2])
+                                == buf[end - 2] | buf[end - 1] << 8):
+                return end
+        return None
+
+    def _text(self, data, lines: list):
+        """Split text data into lines, continuing the partial line"""
+        raw = bytes(data)
+        start = 0
+        end = raw.find(b'\n')
+        while end != -1:
+            self.text += raw[start:end]
+            if self.text.isascii() and 0 not in self.text:
+                lines.append(bytes(self.text.rstrip(b'\r')))
+            else:
+                self.garbage += 1
+            self.text.clear()
+            start = end + 1
+            end = raw.find(b'\n', start)
+        self.text += raw[start:]
+        if len(self.text) >= len(self.buf):
+            self.overflows += 1
+            lines.append(bytes(self.text))
+            self.text.clear()
+
+    def reset(self):
+        self.fill = 0
+        self.text.clear()
+
+
+class FramedSerialThread(SerialThread):
+    """SerialThread decoding binary sample frames, with text lines
+    between frames delivered as 'rx' as usual"""
+    def __init__(self, port, baudrate, model: 'FramedModel', **kwargs):
+        super().__init__(port, baudrate, model, **kwargs)
+        self._rx = FrameDecoder(len(self._rx.buf))
+
+    def _deliver(self, t_ns) -> int:
+        rx = self._rx
+        crc_errors, malformed, garbage = rx.crc_errors, rx.malformed, rx.garbage
+        lines, samples = rx.decode()
+        for line in lines:
+            self.model.set_rx(line, t_ns)
+        if len(samples):
+            rows = np.empty((len(samples), 3))
+            rows[:, 0] = self.model.clock.to_wall(t_ns)
+            rows[:, 1] = samples['channel']
+            rows[:, 2] = samples['value']
+            self.model.last_samples = rows
+            STATS.count("rx samples", len(rows))
+            self.model.trigger_event('samples')
+        if rx.crc_errors != crc_errors:
+            STATS.count("frame crc errors", rx.crc_errors - crc_errors)
+        if rx.malformed != malformed:
+            STATS.count("frames malformed", rx.malformed - malformed)
+        if rx.garbage != garbage:
+            STATS.count("rx garbage lines", rx.garbage - garbage)
+        return len(lines)
+
+
+class FramedModel(Model):
+    """Model of a device sending CV samples in binary frames (see
+    FrameDecoder) between its ASCII lines.
+
+    Samples arrive by the 'samples' event as last_samples, an array of
+    (t, channel, value) rows, like ProcessModel. last_rx_raw is bytes.
+    """
+    thread_class = FramedSerialThread
+    parses_samples = True
+    snapshot_fields = Model.snapshot_fields + ('last_samples',)
+
+    def __init__(self, port, baudrate, ser=None):
+        super().__init__(port, baudrate, ser)
+        self.last_samples = np.empty((0, 3))
@@ -3,60 +3,208 @@ import queue
 import serial
 import time
 from .base import ObservableModel
+from .network import open_port
+from .request import PendingRequest, RequestTracker
+from concurrent.futures import Future
+from perf import STATS
+from logger import SerialLogger
+
+
+class Backoff:
+    """Exponential backoff delays in seconds, capped at maximum"""
+    def __init__(self, initial=0.05, maximum=1.0, factor=2.0):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.delay = initial
+        
+    def next(self) -> float:
+        """Get the next delay and grow it for the following call"""
+        delay = self.delay
+        self.delay = min(self.delay * self.factor, self.maximum)
+        return delay
+    
+    def reset(self):
+        self.delay = self.initial
+
+
+class CaptureClock:
+    """Capture timestamps: monotonic ns (immune to clock changes, for
+    latency) convertible to wall clock seconds by a fixed anchor"""
+    def __init__(self):
+        self.anchor_wall_ns = time.time_ns()
+        self.anchor_mono_ns = time.monotonic_ns()
+        
+    def to_wall(self, mono_ns: int) -> float:
+        """Seconds since epoch of a monotonic ns timestamp"""
+        return (self.anchor_wall_ns + mono_ns - self.anchor_mono_ns) / 1e9
+    
+    def from_wall(self, t: float) -> int:
+        """Monotonic ns timestamp of seconds since epoch"""
+        return int(t * 1e9) - self.anchor_wall_ns + self.anchor_mono_ns
+
+
+class LineBuffer:
+    """Reusable read buffer splitting bulk serial reads into lines,
+    keeping a partial line for the next read"""
+    def __init__(self, size=65536):
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+        self.fill = 0  # bytes of partial line at start of buffer
+        self.overflows = 0
+    
+    def read(self, ser, waiting) -> int:
+        """Read up to waiting bytes from ser, return bytes read"""
+        n = ser.readinto(self.view[self.fill:min(self.fill + waiting, len(self.buf))])
+        self.fill += n
+        return n
+    
+    def lines(self):
+        """Yield memoryviews (valid until the next read) of complete
+        lines without line endings, a line overflowing the buffer as is"""
+        buf, view, fill = self.buf, self.view, self.fill
+        start = 0
+        end = buf.find(b'\n', start, fill)
+        while end != -1:
+            stop = end - 1 if end > start and buf[end - 1] == 0x0D else end  # CRLF
+            yield view[start:stop]
+            start = end + 1
+            end = buf.find(b'\n', start, fill)
+        
+        if start == 0 and fill == len(buf):
+            self.overflows += 1
+            yield view[:fill]
+            start = fill
+        buf[:fill - start] = view[start:fill]  # keep partial line
+        self.fill = fill - start
+    
+    def reset(self):
+        self.fill = 0
 
 
 class SerialThread(threading.Thread):
     """Thread that allows asynchronous send and 
     synchronous (code-blocking) receive.
+    
+    Supervises the connection: if the port drops, it is reopened
+    with exponential backoff until success or stop().
+    
+    NOTE: ser, if given, is an already open port to use. port may be
+    a network URL, see network.open_port.
     """
     
-    def __init__(self, port, baudrate, model: 'Model'):
+    def __init__(self, port, baudrate, model: 'Model', backoff: Backoff = None,
+                 buffer_size=65536, ser: serial.Serial = None):
         super().__init__()
         self.model = model
         self.tx_q = queue.Queue()
         self.daemon = True  # threading.Thread
-        self.ser = serial.Serial(port, baudrate)
+        self.backoff = backoff if backoff else Backoff()
+        self._stop_event = threading.Event()
+        self._rx = LineBuffer(buffer_size)  # reused for every read
+        self._read_stage = STATS.stage("serial read")
+        self._rx_stage = STATS.stage("rx listeners")
+        self.ser = ser if ser is not None else open_port(port, baudrate)
     
     def __get_rx(self):
-        try:
-            if self.ser.in_waiting > 0:
-                data = self.ser.readline().decode('utf-8').strip()
-                self.model.last_rx = data
-                self.model.trigger_event('rx')
-                return True
-        except OSError as e:
-            pass  # related to in_waiting after serial close
-        except UnicodeDecodeError as e:
-            e.reason = "(possible baud mismatch) " + e.reason
-            print(f"SerialThread Error: {e}")
-        return False
+        """Read all waiting bytes in bulk, then trigger 'rx' per line 
+        with a memoryview into the read buffer (no per-line copies)"""
+        waiting = self.ser.in_waiting
+        if waiting <= 0:
+            return False
+        with self._read_stage:
+            read = self._rx.read(self.ser, waiting)
+        t_ns = time.monotonic_ns()  # capture time of every line read
+        
+        overflows = self._rx.overflows
+        with self._rx_stage:
+            lines = self._deliver(t_ns)
+        if self._rx.overflows != overflows:
+            STATS.count("rx overflows")
+        STATS.count("rx bytes", read)
+        STATS.count("rx lines", lines)
+        return True
+    
+    def _deliver(self, t_ns) -> int:
+        """Notify the model of what was read, return lines delivered"""
+        lines = 0
+        for line in self._rx.lines():
+            self.model.set_rx(line, t_ns)
+            lines += 1
+        return lines
     
     def __get_tx(self):
-        try:
-            if not self.tx_q.empty():
-                data = self.tx_q.get()
-                self.ser.write(str(data).encode('utf-8'))
-                self.model.last_tx = data
-                self.model.trigger_event('tx')
-                return True
-        except serial.SerialException as e:
-            print(f"SerialThread Error: {e}")
+        if not self.tx_q.empty():
+            data = self.tx_q.get()
+            self.ser.write(str(data).encode('utf-8'))
+            STATS.count("tx lines")
+            self.model.last_tx_ns = time.monotonic_ns()
+            self.model.last_tx = data
+            self.model.trigger_event('tx')
+            return True
         return False
     
+    def __recover(self, error):
+        """Reopen the port with backoff, notifying 'dropped' and 'reconnected'"""
+        down_since = time.monotonic()
+        self.model.last_error = str(error)
+        self.model.requests.fail_all(ConnectionError(str(error)))
+        STATS.count("port drops")
+        self.model.trigger_event('dropped')
+        self._rx.reset()  # partial line lost with the port
+        try:
+            self.ser.close()
+        except Exception:
+            pass  # port already gone
+        
+        self.backoff.reset()
+        while not self._stop_event.wait(self.backoff.next()):
+            try:
+                self.ser.open()
+            except (serial.SerialException, OSError) as e:
+                self.model.last_error = str(e)
+                continue
+            self.model.last_downtime = time.monotonic() - down_since
+            self.model.trigger_event('reconnected')
+            return
+    
     def run(self):
         self.model.trigger_event('connected')
-        while self.ser.is_open:
-            t = self.__get_tx()
-            r = self.__get_rx()
+        while not self._stop_event.is_set():
+            try:
+                if not self.ser.is_open:
+                    raise serial.SerialException("port closed unexpectedly")
+                t = self.__get_tx()
+                r = self.__get_rx()
+            except (serial.SerialException, OSError) as e:
+                if self._stop_event.is_set():
+                    break  # related to in_waiting after serial close
+                print(f"SerialThread Error: {e}")
+                self.__recover(e)
+                continue
+            self.model.requests.expire()
             if not t and not r:
-                time.sleep(0.02)
+                self._stop_event.wait(0.02)
         
     def write(self, data: str):
         self.tx_q.put(data)
+    
+    def rx_backlog(self) -> int:
+        """Bytes received but not yet read"""
+        try:
+            return self.ser.in_waiting
+        except (serial.SerialException, OSError):
+            return 0
+    
+    def tx_backlog(self) -> int:
+        """Writes queued but not yet sent"""
+        return self.tx_q.qsize()
         
     def stop(self):
-        if self.is_alive():
+        self._stop_event.set()
+        if self.ser.is_open:
             self.ser.close()
+        self.model.requests.fail_all(ConnectionError("Serial port stopped"))
         self.model.trigger_event('disconnected')
         
     def __del__(self):
@@ -65,19 +213,117 @@ class SerialThread(threading.Thread):
 class Model(ObservableModel):
     """ObservableModel for serial send and receive.
     NOTE: Code-blocking on RX to call registered listener functions
+    
+    On 'rx', last_rx_raw is a memoryview of the line bytes which is only
+    valid during the event (copy with bytes() to keep). last_rx decodes
+    it to str on first access. Lines are stamped once when read, 
+    last_rx_ns (monotonic ns, see clock) and last_rx_time (wall clock
+    seconds) are the times to use downstream. Likewise for TX.
+    
+    Events: 'rx', 'tx', 'connected', 'disconnected',
+    'dropped' (port lost, see last_error) and 
+    'reconnected' (port reopened, see last_downtime)
+    
+    NOTE: ser, if given, is an already open port (e.g. of baud 
+    detection) to use instead of opening port.
     """
+    thread_class = SerialThread
+    parses_samples = False  # True if samples arrive by 'samples' event
+    snapshot_fields = ('last_rx', 'last_rx_raw', 'last_rx_ns', 'last_rx_time', 
+                       'last_tx', 'last_tx_ns', 'last_tx_time', 'last_error', 'last_downtime')
     
-    def __init__(self, port, baudrate):
+    def __init__(self, port, baudrate, ser=None):
         super().__init__()
-        self._thread = SerialThread(port, baudrate, self)
-        self.last_rx = None
+        self.clock = CaptureClock()
+        self.requests = RequestTracker()
+        self.add_event_listener('rx', lambda model: self.requests.feed(model.last_rx))
+        self._thread = self.thread_class(port, baudrate, self, ser=ser)
+        self.last_rx_raw = None
+        self._last_rx = None
+        self.last_rx_ns = 0
         self.last_tx = None
+        self.last_tx_ns = 0
+        self.last_error = None
+        self.last_downtime = None
+        
+    @property
+    def last_rx(self) -> str:
+        """Last RX line as str, decoded on demand"""
+        if self._last_rx is None and self.last_rx_raw is not None:
+            try:
+                self._last_rx = str(self.last_rx_raw, 'utf-8').strip()
+            except UnicodeDecodeError as e:
+                print(f"SerialThread Error: (possible baud mismatch) {e}")
+                self._last_rx = str(self.last_rx_raw, 'utf-8', 'replace').strip()
+        return self._last_rx
+    
+    @property
+    def last_rx_time(self) -> float:
+        """Capture time of last RX line, seconds since epoch"""
+        return self.clock.to_wall(self.last_rx_ns)
+    
+    @property
+    def last_tx_time(self) -> float:
+        """Send time of last TX line, seconds since epoch"""
+        return self.clock.to_wall(self.last_tx_ns)
+    
+    def set_rx(self, raw, t_ns: int = None):
+        """Set last RX line bytes captured at t_ns (monotonic ns, 
+        default now) and notify 'rx' listeners"""
+        self.last_rx_raw = raw
+        self._last_rx = None
+        self.last_rx_ns = t_ns if t_ns is not None else time.monotonic_ns()
+        self.trigger_event('rx')
         
     def write(self, data: str):
         self._thread.write(data)
+    
+    def expect(self, expect: str, until: str = None, timeout: float = 1.0,
+               body: str = None) -> Future:
+        """Await a response without writing.
+        
+        Args:
+            expect (str): Regex matching the first line of the response.
+            until (str): Regex matching the last line of a multiline 
+                response, else the response is the single expect line.
+            timeout (float): Seconds before the future fails with
+                TimeoutError, None to wait indefinitely.
+            body (str): Regex matching the lines of a multiline response 
+                between its first and last, else every line in between 
+                not of another request (e.g. streamed samples too).
+        
+        Returns:
+            Future: Resolves with the list of response lines.
+        """
+        req = PendingRequest(expect, until, timeout, body)
+        self.requests.add(req)
+        return req.future
+    
+    def request(self, data: str, expect: str, until: str = None, 
+                timeout: float = 1.0, body: str = None) -> Future:
+        """Write data and await its response, see expect().
+        NOTE: Newline appended to data if missing."""
+        future = self.expect(expect, until, timeout, body)
+        self.write(data if data.endswith('\n') else data + '\n')
+        return future
+    
+    def rx_backlog(self) -> int:
+        """Bytes received but not yet read"""
+        return self._thread.rx_backlog()
+    
+    def open_logger(self, filepath) -> SerialLogger:
+        """Logger of this model's RX/TX lines"""
+        return SerialLogger(filepath)
+    
+    def tx_backlog(self) -> int:
+        """Writes queued but not yet sent"""
+        return self._thread.tx_backlog()
         
     def start(self):
         self._thread.start()
         
     def stop(self):
+        """Stop the serial thread, waiting (up to 1 s) for its listeners"""
         self._thread.stop()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(1.0)
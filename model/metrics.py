@@ -0,0 +1,172 @@
+import threading
+import csv
+import numpy as np
+
+
+class Calibration:
+    """DN to volts conversion per channel.
+
+    Channels with a table are converted by piecewise linear interpolation
+    of their (dn, volts) points, others by the default linear scale.
+    """
+    def __init__(self, full_scale_volts=5.0, full_scale_dn=4095, tables=None):
+        self.scale = full_scale_volts / full_scale_dn
+        self.tables: dict[int, tuple[np.ndarray, np.ndarray]] = tables if tables else {}
+
+    @classmethod
+    def from_csv(cls, path, **kwargs):
+        """Load tables from CSV rows of channel,dn,volts (header optional)"""
+        points: dict[int, list] = {}
+        with open(path, 'r', newline='') as file:
+            for row in csv.reader(file):
+                try:
+                    channel, dn, volts = int(row[0]), float(row[1]), float(row[2])
+                except (ValueError, IndexError):
+                    continue  # header or blank
+                points.setdefault(channel, []).append((dn, volts))
+        tables = {}
+        for channel, pts in points.items():
+            pts.sort()
+            tables[channel] = (np.array([p[0] for p in pts]), np.array([p[1] for p in pts]))
+        return cls(tables=tables, **kwargs)
+
+    def to_volts(self, channels: np.ndarray, dns: np.ndarray) -> np.ndarray:
+        """Convert DN values of the given channels to volts"""
+        volts = dns * self.scale
+        for channel, (dn_pts, volt_pts) in self.tables.items():
+            mask = channels == channel
+            if mask.any():
+                volts[mask] = np.interp(dns[mask], dn_pts, volt_pts)
+        return volts
+
+
+class Metrics:
+    """Snapshot of MetricsEngine results, arrays indexed like channels"""
+    def __init__(self, t, channels, volts, mean, minimum, maximum, std, dvdt):
+        self.t = t
+        self.channels = channels
+        self.volts = volts
+        self.mean = mean
+        self.min = minimum
+        self.max = maximum
+        self.std = std
+        self.dvdt = dvdt  # volts per second over the window
+
+    @property
+    def imbalance(self) -> float:
+        """Max - min of latest cell volts across the pack"""
+        return float(np.nanmax(self.volts) - np.nanmin(self.volts)) if len(self.volts) else np.nan
+
+
+class MetricsEngine:
+    """Rolling statistics of the last window samples of every channel.
+
+    Samples are written into per-channel ring buffers as they arrive and
+    statistics are computed for all channels at once on snapshot().
+    """
+    def __init__(self, window=64, calibration: Calibration = None, capacity=16):
+        self.window = window
+        self.calibration = calibration if calibration else Calibration()
+        self.index: dict[int, int] = {}  # channel to row
+        self._times = np.full((capacity, window), np.nan)
+        self._dns = np.full((capacity, window), np.nan)
+        self._pos = np.zeros(capacity, dtype=np.int64)  # next write column
+        self._lock = threading.Lock()
+
+    def _row(self, channel) -> int:
+        row = self.index.get(channel)
+        if row is None:
+            row = self.index[channel] = len(self.index)
+            if row >= len(self._pos):  # grow capacity
+                grow = len(self._pos)
+                self._times = np.vstack((self._times, np.full((grow, self.window), np.nan)))
+                self._dns = np.vstack((self._dns, np.full((grow, self.window), np.nan)))
+                self._pos = np.concatenate((self._pos, np.zeros(grow, dtype=np.int64)))
+        return row
+
+    def add(self, channel, t, dn):
+        with self._lock:
+            row = self._row(channel)
+            col = self._pos[row] % self.window
+            self._times[row, col] = t
+            self._dns[row, col] = dn
+            self._pos[row] += 1
+
+    def set_calibration(self, calibration: Calibration):
+        self.calibration = calibration
+
+    def clear(self):
+        with self._lock:
+            self.index.clear()
+            self._times[:] = np.nan
+            self._dns[:] = np.nan
+            self._pos[:] = 0
+
+    def snapshot(self, t=None) -> Metrics:
+        with self._lock:
+            n = len(self.index)
+            channels = np.array(list(self.index.keys()))
+            times = self._times[:n].copy()
+            dns = self._dns[:n].copy()
+            pos = self._pos[:n].copy()
+        rows = np.arange(n)
+        newest = (pos - 1) % self.window
+        oldest = np.where(pos > self.window, pos % self.window, 0)
+        volts = self.calibration.to_volts(np.repeat(channels, self.window),
+                                          dns.ravel()).reshape(dns.shape)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.nanmean(volts, axis=1) if n else np.empty(0)
+            std = np.nanstd(volts, axis=1) if n else np.empty(0)
+            dt = times[rows, newest] - times[rows, oldest]
+            dvdt = np.where(dt > 0, (volts[rows, newest] - volts[rows, oldest]) / dt, 0.0)
+        return Metrics(t, channels, volts[rows, newest], mean,
+                       np.nanmin(volts, axis=1) if n else np.empty(0),
+                       np.nanmax(volts, axis=1) if n else np.empty(0), std, dvdt)
+
+
+class ChannelSummary:
+    """Latest value, min/max since reset and latest time of every
+    channel, cheap to add to and to snapshot for any channel count.
+    NOTE: Channels are rows in order of discovery."""
+    def __init__(self, capacity=64):
+        self.index: dict[int, int] = {}  # channel to row
+        self.version = 0  # incremented by every add
+        self._values = np.full((4, capacity), np.nan)  # last, min, max, time
+        self._lock = threading.Lock()
+
+    def add(self, channel, t, value):
+        with self._lock:
+            row = self.index.get(channel)
+            if row is None:
+                row = self.index[channel] = len(self.index)
+                if row >= self._values.shape[1]:  # grow capacity
+                    self._values = np.hstack((self._values, np.full(self._values.shape, np.nan)))
+            v = self._values[:, row]
+            v[0] = value
+            if not value >= v[1]:  # also when nan
+                v[1] = value
+            if not value <= v[2]:
+                v[2] = value
+            v[3] = t
+            self.version += 1
+
+    def reset_extremes(self):
+        """Restart min/max from the latest values"""
+        with self._lock:
+            self._values[1] = self._values[0]
+            self._values[2] = self._values[0]
+            self.version += 1
+
+    def clear(self):
+        with self._lock:
+            self.index.clear()
+            self._values[:] = np.nan
+            self.version += 1
+
+    def snapshot(self):
+        """Get (channels, last, min, max, time) arrays indexed by row"""
+        with self._lock:
+            n = len(self.index)
+            channels = np.fromiter(self.index.keys(), dtype=np.int64, count=n)
+            last, minimum, maximum, times = self._values[:, :n].copy()
+        return channels, last, minimum, maximum, times
@@ -0,0 +1,131 @@
+"""
+File: network.py
+Purpose: Network serial ports (serial-to-Ethernet bridges) for SerialThread
+
+Ports named by URL: socket://host:port is raw TCP (NetworkPort),
+rfc2217://host:port a Telnet COM port server (pyserial's rfc2217,
+which also forwards baud rate changes to the bridge).
+"""
+
+from urllib.parse import urlsplit
+import socket
+import select
+import struct
+import serial
+
+try:
+    import fcntl
+    import termios
+except ImportError:  # Windows
+    fcntl = None
+
+NETWORK_SCHEMES = ("socket://", "rfc2217://")
+CHUNK = 4096  # bytes reported waiting when the OS cannot count them
+
+
+def open_port(port: str, baudrate: int):
+    """Open a serial port by device name or network URL, see module"""
+    if port.startswith("socket://"):
+        return NetworkPort(port, baudrate)
+    if port.startswith("rfc2217://"):
+        ser = serial.serial_for_url(port, baudrate)
+        if getattr(ser, "_socket", None):
+            ser._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return ser
+    return serial.Serial(port, baudrate)
+
+
+class NetworkPort:
+    """Raw TCP port with the serial.Serial interface SerialThread uses.
+
+    The socket is nonblocking: readinto() returns whatever arrived,
+    in_waiting counts it (FIONREAD). Nagle is disabled so short
+    commands go out at once, and the receive buffer is enlarged for
+    bulk telemetry. A closed connection raises SerialException, so
+    SerialThread reconnects (open()) as for a dropped port.
+
+    NOTE: baudrate is the bridge's own setting, kept for reference.
+    """
+    def __init__(self, url, baudrate=115200, rcvbuf=1 << 20, timeout=5.0, do_not_open=False):
+        parts = urlsplit(url)
+        if parts.scheme != "socket" or not parts.hostname or not parts.port:
+            raise serial.SerialException(f"Expected socket://host:port, got {url}")
+        self.port = url
+        self.address = (parts.hostname, parts.port)
+        self.baudrate = baudrate
+        self.rcvbuf = rcvbuf
+        self.timeout = timeout  # connect and write, seconds
+        self._socket = None
+        if not do_not_open:
+            self.open()
+
+    @property
+    def is_open(self) -> bool:
+        return self._socket is not None
+
+    def open(self):
+        try:
+            sock = socket.create_connection(self.address, timeout=self.timeout)
+        except OSError as e:
+            raise serial.SerialException(f"could not connect to {self.port}: {e}")
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
+        sock.setblocking(False)
+        self._socket = sock
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def _sock(self) -> socket.socket:
+        if self._socket is None:
+            raise serial.PortNotOpenError()
+        return self._socket
+
+    @property
+    def in_waiting(self) -> int:
+        """Bytes received but not read, at least 1 at end of stream so
+        the next read reports the disconnect"""
+        sock = self._sock()
+        if not select.select([sock], [], [], 0)[0]:
+            return 0
+        if fcntl is None:
+            return CHUNK
+        waiting = struct.unpack("i", fcntl.ioctl(sock, termios.FIONREAD, b"\0\0\0\0"))[0]
+        return max(waiting, 1)
+
+    def readinto(self, b) -> int:
+        """Read what arrived into b, without waiting"""
+        try:
+            n = self._sock().recv_into(b)
+        except BlockingIOError:
+            return 0
+        except OSError as e:
+            raise serial.SerialException(f"read failed: {e}")
+        if n == 0 and len(b):
+            raise serial.SerialException("socket disconnected")
+        return n
+
+    def read(self, size=1) -> bytes:
+        buf = bytearray(size)
+        return bytes(buf[:self.readinto(buf)])
+
+    def write(self, data) -> int:
+        sock = self._sock()
+        view = memoryview(data)
+        while view:
+            try:
+                view = view[sock.send(view):]
+            except BlockingIOError:
+                if not select.select([], [sock], [], self.timeout)[1]:
+                    raise serial.SerialException("write timeout")
+            except OSError as e:
+                raise serial.SerialException(f"write failed: {e}")
+        return len(data)
+
+    def reset_input_buffer(self):
+        """Discard what arrived so far"""
+        buf = bytearray(CHUNK)
+        while self.readinto(buf):
+            pass
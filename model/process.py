@@ -0,0 +1,425 @@
+"""
+File: process.py
+Purpose: Serial capture and raw logging in a separate process
+
+The capture process reads the port, logs every line, parses CV samples
+into a SampleRing in shared memory and sends raw lines to the GUI
+process over a pipe, so GUI stalls never delay reading or logging.
+"""
+
+import multiprocessing
+import threading
+import time
+from collections import deque
+import re
+import numpy as np
+import serial
+from multiprocessing import shared_memory
+from .main import Model, LineBuffer, Backoff
+from .network import open_port
+from logger import SerialLogger
+from perf import STATS
+
+SAMPLE_REGEX = re.compile(rb"\d+:\s+\d+")
+NUMBER_REGEX = re.compile(rb"\d+")
+MARKERS = ("log_alarm", "log_alarm_clear")  # SerialLogger methods remote loggers may call
+
+
+class SampleRing:
+    """Ring of (t, channel, value) float64 rows in shared memory, for
+    one writer and one reader process. The header holds the total rows
+    written and the writer's RX backlog in bytes.
+
+    Args:
+        name (str): Attach to an existing ring, else create one.
+    """
+    HEADER = 2  # int64 slots
+
+    def __init__(self, capacity=1 << 20, name=None):
+        self.capacity = capacity
+        self.owner = name is None
+        size = 8 * self.HEADER + 24 * capacity
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        self.header = np.ndarray((self.HEADER,), dtype=np.int64, buffer=self.shm.buf)
+        self.rows = np.ndarray((capacity, 3), dtype=np.float64, buffer=self.shm.buf,
+                               offset=8 * self.HEADER)
+        if self.owner:
+            self.header[:] = 0
+        self.read_count = 0
+        self.lost = 0  # rows overwritten before read
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, rows: np.ndarray):
+        """Append rows, overwriting the oldest when full"""
+        written = int(self.header[0])
+        rows = rows[-self.capacity:]
+        index = (written + np.arange(len(rows))) % self.capacity
+        self.rows[index] = rows
+        self.header[0] = written + len(rows)  # publish after the data
+
+    def read(self) -> np.ndarray:
+        """Copy of rows written since the last read"""
+        written = int(self.header[0])
+        start = max(self.read_count, written - self.capacity)
+        rows = self.rows[np.arange(start, written) % self.capacity]
+        # rows overwritten while copying are dropped
+        overwritten = int(self.header[0]) - self.capacity - start
+        if overwritten > 0:
+            rows = rows[overwritten:]
+            start += overwritten
+        self.lost += start - self.read_count
+        self.read_count = written
+        return rows
+
+    def close(self):
+        if self.rows is None:
+            return
+        self.header = self.rows = None  # release views of the buffer
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class EventSender(threading.Thread):
+    """Capture process end of the events pipe, sending from its own
+    thread so a stalled GUI never blocks capture. Once max_rx 'rx'
+    events are waiting, further ones are dropped (their lines are
+    logged and samples in the ring regardless) and counted, sent as
+    ('lost', count) ahead of the next event. Other events are never
+    dropped."""
+    def __init__(self, events, max_rx=256):
+        super().__init__()
+        self.daemon = True  # threading.Thread
+        self.events = events
+        self.max_rx = max_rx
+        self.lost = 0
+        self._queue = deque()
+        self._rx = 0  # 'rx' events in queue
+        self._closed = False
+        self._cond = threading.Condition()
+        self.start()
+
+    def send(self, event):
+        with self._cond:
+            if event[0] == 'rx':
+                if self._rx >= self.max_rx:
+                    self.lost += 1
+                    return
+                self._rx += 1
+            self._queue.append(event)
+            self._cond.notify()
+
+    def run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._closed)
+                if not self._queue:
+                    return
+                event = self._queue.popleft()
+                if event[0] == 'rx':
+                    self._rx -= 1
+                lost, self.lost = self.lost, 0
+            try:
+                if lost:
+                    self.events.send(('lost', lost))
+                self.events.send(event)
+            except (OSError, ValueError):
+                return  # GUI gone
+
+    def close(self, timeout=1.0):
+        """Send the queued events (for up to timeout seconds) and stop"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self.join(timeout)
+
+
+def capture_main(port, baudrate, ring_name, capacity, commands, events,
+                 sample_filter=b"DBG CV", buffer_size=65536):
+    """Capture process: read, log and parse until a 'stop' command.
+
+    Commands (tuples on the commands pipe): ('tx', str), ('log', path
+    or None), ('mark', (method, text)), ('filter', bytes or None),
+    ('stop', None). Events sent back (see EventSender): ('connected', 
+    None), ('rx', (read time, lines joined by newline)), ('tx', (time,
+    str)), ('dropped', error), ('reconnected', downtime), ('error', 
+    error) of opening the port (ending the process) or of the logger 
+    (ending logging only), ('lost', rx events dropped).
+    
+    While the port is down, commands are still handled and TX is
+    queued, to be written (and acknowledged by 'tx') once reconnected.
+    """
+    ring = SampleRing(capacity, name=ring_name)
+    sender = EventSender(events)
+    try:
+        ser = open_port(port, baudrate)
+    except (serial.SerialException, OSError) as e:
+        sender.send(('error', str(e)))
+        sender.close()
+        ring.close()
+        return
+    rx = LineBuffer(buffer_size)
+    backoff = Backoff()
+    logger = None
+    tx_queue = deque()
+    sender.send(('connected', None))
+
+    def log(method, *args):
+        """Call a logger method, a logger error (e.g. disk full) is
+        reported and ends logging rather than dropping the port"""
+        nonlocal logger
+        if not logger:
+            return
+        try:
+            getattr(logger, method)(*args)
+        except (OSError, ValueError) as e:
+            sender.send(('error', f"Logger: {e}"))
+            logger = None
+
+    def handle(cmd, arg) -> bool:
+        """Act on a command, False if 'stop'"""
+        nonlocal logger, sample_filter
+        if cmd == 'tx':
+            tx_queue.append(arg)
+        elif cmd == 'log':
+            log('close')
+            logger = None
+            if arg:
+                try:
+                    logger = SerialLogger(arg)
+                except OSError as e:
+                    sender.send(('error', f"Logger: {e}"))
+        elif cmd == 'mark':
+            method, text = arg
+            if method in MARKERS:
+                log(method, text)
+        elif cmd == 'filter':
+            sample_filter = arg
+        elif cmd == 'stop':
+            return False
+        return True
+
+    running = True
+    while running:
+        try:
+            while running and commands.poll():
+                running = handle(*commands.recv())
+            if not running:
+                break
+            while tx_queue:
+                ser.write(tx_queue[0].encode('utf-8'))
+                t = time.time()
+                arg = tx_queue.popleft()  # once written, else resent after reconnect
+                log('log_tx', arg, t)
+                sender.send(('tx', (t, arg)))
+            waiting = ser.in_waiting
+            if waiting <= 0:
+                commands.poll(0.01)  # idle, wake early on commands
+                continue
+            rx.read(ser, waiting)
+            t = time.time()
+            lines, samples = [], []
+            for line in rx.lines():
+                line = bytes(line)
+                lines.append(line)
+                log('log_rx', line, t)
+                if (sample_filter is None or sample_filter in line) and SAMPLE_REGEX.search(line):
+                    channel, value = NUMBER_REGEX.findall(line)[-2:]
+                    samples.append((t, int(channel), int(value)))
+            if samples:
+                ring.write(np.array(samples, dtype=np.float64))
+            ring.header[1] = ser.in_waiting
+            if lines:
+                sender.send(('rx', (t, b'\n'.join(lines))))
+        except (serial.SerialException, OSError) as e:
+            down_since = time.monotonic()
+            sender.send(('dropped', str(e)))
+            log('log_gap', str(e))
+            rx.reset()
+            try:
+                ser.close()
+            except Exception:
+                pass  # port already gone
+            backoff.reset()
+            while running:
+                retry = time.monotonic() + backoff.next()
+                while running and commands.poll(max(retry - time.monotonic(), 0)):
+                    running = handle(*commands.recv())
+                if not running:
+                    break
+                try:
+                    ser.open()
+                except (serial.SerialException, OSError):
+                    continue
+                downtime = time.monotonic() - down_since
+                log('log_reconnect', downtime)
+                sender.send(('reconnected', downtime))
+                break
+
+    log('close')
+    ser.close()
+    sender.close()
+    ring.close()
+
+
+class CaptureThread(threading.Thread):
+    """GUI side of a capture process, in place of SerialThread: starts
+    the process and turns its events into the model's events.
+    NOTE: A port that fails to open is reported as 'disconnected'. An
+    open port given as ser is closed for the process to reopen."""
+    def __init__(self, port, baudrate, model: 'ProcessModel', capacity=1 << 20,
+                 sample_filter=b"DBG CV", ser=None):
+        super().__init__()
+        if ser is not None:
+            ser.close()  # handles do not cross processes
+        self.model = model
+        self.daemon = True  # threading.Thread
+        self.ring = SampleRing(capacity)
+        ctx = multiprocessing.get_context("spawn")  # never fork the GUI
+        self._commands_recv, self._commands = ctx.Pipe(duplex=False)
+        self._events, self._events_send = ctx.Pipe(duplex=False)
+        self.process = ctx.Process(target=capture_main, daemon=True, args=(
+            port, baudrate, self.ring.name, capacity, self._commands_recv,
+            self._events_send, sample_filter))
+        self._stop_event = threading.Event()
+        self._tx_pending = 0
+        self._lock = threading.Lock()  # pipe sends from any thread
+
+    def send(self, cmd, arg=None):
+        with self._lock:
+            try:
+                self._commands.send((cmd, arg))
+            except (OSError, ValueError):
+                pass  # process gone
+
+    def run(self):
+        self.process.start()
+        model = self.model
+        while not self._stop_event.is_set():
+            model.requests.expire()
+            if not self._events.poll(0.02):
+                if not self.process.is_alive():
+                    break
+                continue
+            try:
+                kind, arg = self._events.recv()
+            except (EOFError, OSError):
+                break
+            if kind == 'rx':
+                t, data = arg
+                t_ns = model.clock.from_wall(t)
+                lines = data.split(b'\n')
+                STATS.count("rx lines", len(lines))
+                for line in lines:
+                    model.set_rx(line, t_ns)
+                samples = self.ring.read()
+                if len(samples):
+                    model.last_samples = samples
+                    model.trigger_event('samples')
+            elif kind == 'tx':
+                self._tx_pending = max(self._tx_pending - 1, 0)
+                t, model.last_tx = arg
+                model.last_tx_ns = model.clock.from_wall(t)
+                model.trigger_event('tx')
+            elif kind == 'connected':
+                model.trigger_event('connected')
+            elif kind == 'dropped':
+                STATS.count("port drops")
+                model.last_error = arg
+                model.requests.fail_all(ConnectionError(arg))
+                model.trigger_event('dropped')
+            elif kind == 'reconnected':
+                model.last_downtime = arg
+                model.trigger_event('reconnected')
+            elif kind == 'lost':
+                STATS.count("capture rx events lost", arg)
+            elif kind == 'error':  # the process ends after an open error
+                print(f"CaptureProcess Error: {arg}")
+                model.last_error = arg
+        if not self._stop_event.is_set():
+            self.stop()
+
+    def write(self, data: str):
+        self._tx_pending += 1
+        self.send('tx', data)
+
+    def rx_backlog(self) -> int:
+        return int(self.ring.header[1])
+
+    def tx_backlog(self) -> int:
+        return self._tx_pending
+
+    def stop(self):
+        if self._stop_event.is_set():
+            return
+        self._stop_event.set()
+        self.send('stop')
+        if self.process.is_alive():
+            self.process.join(1.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.model.requests.fail_all(ConnectionError("Capture process stopped"))
+        self.model.trigger_event('disconnected')
+
+
+class RemoteLogger:
+    """SerialLogger stand-in for a ProcessModel: lines, gaps and
+    reconnects are logged by the capture process itself"""
+    def __init__(self, thread: CaptureThread, filepath):
+        if not filepath.endswith(('.csv', '.txt')):
+            raise OSError("SerialLogger invalid file extension: {}".format(filepath))
+        self.thread = thread
+        thread.send('log', filepath)
+
+    def log_tx(self, data, t=None):
+        pass
+
+    def log_rx(self, data, t=None):
+        pass
+
+    def log_gap(self, reason):
+        pass
+
+    def log_reconnect(self, downtime):
+        pass
+
+    def log_alarm(self, text):
+        self.thread.send('mark', ('log_alarm', text))
+
+    def log_alarm_clear(self, text):
+        self.thread.send('mark', ('log_alarm_clear', text))
+
+    def close(self):
+        self.thread.send('log', None)
+
+
+class ProcessModel(Model):
+    """Model capturing in a separate process (see capture_main).
+
+    Parsed CV samples arrive by the 'samples' event as last_samples,
+    an array of (t, channel, value) rows, instead of being parsed from
+    'rx' lines. last_rx_raw is bytes.
+    """
+    thread_class = CaptureThread
+    parses_samples = True
+    snapshot_fields = Model.snapshot_fields + ('last_samples',)
+
+    def __init__(self, port, baudrate, ser=None):
+        super().__init__(port, baudrate, ser)
+        self.last_samples = np.empty((0, 3))
+
+    def open_logger(self, filepath) -> RemoteLogger:
+        return RemoteLogger(self._thread, filepath)
+
+    def set_sample_filter(self, sample_filter: bytes):
+        """Parse samples only from lines containing sample_filter, None for all"""
+        self._thread.send('filter', sample_filter)
+
+    def stop(self):
+        self._thread.stop()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(1.0)
+        self._thread.ring.close()
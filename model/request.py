@@ -0,0 +1,116 @@
+import threading
+import time
+import re
+from concurrent.futures import Future, InvalidStateError
+
+
+class PendingRequest:
+    """Response being collected for a single request.
+    
+    The response starts at the first line matching expect and ends at the
+    first line matching until (inclusive), or immediately if until is None.
+    Lines in between are part of the response if they match body (all 
+    lines if None). The future resolves with the list of response lines 
+    (see resolve()).
+    """
+    def __init__(self, expect: str, until: str = None, timeout: float = None,
+                 body: str = None):
+        self.expect = re.compile(expect)
+        self.until = re.compile(until) if until else None
+        self.body = re.compile(body) if body else None
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.lines: list[str] = []
+        self.complete = False  # response ended, to resolve
+        self.future = Future()
+    
+    def starts(self, line: str) -> bool:
+        """True if line is the first line of the response"""
+        return not self.lines and self.expect.search(line) is not None
+    
+    def ends(self, line: str) -> bool:
+        """True if line is the last line of a response being collected"""
+        return bool(self.lines) and self.until.search(line) is not None
+    
+    def continues(self, line: str) -> bool:
+        """True if line is in the body of a response being collected"""
+        return bool(self.lines) and (self.body is None or self.body.search(line) is not None)
+        
+    def offer(self, line: str):
+        """Add an accepted RX line (see starts(), ends(), continues())"""
+        self.lines.append(line)
+        self.complete = self.until is None or self.until.search(line) is not None
+    
+    def resolve(self, error: Exception = None):
+        """Resolve the future with the lines (or error), unless the
+        caller cancelled it. NOTE: Not under the tracker lock, done
+        callbacks may make requests."""
+        if self.future.done():
+            return
+        try:
+            if error is None:
+                self.future.set_result(self.lines)
+            else:
+                self.future.set_exception(error)
+        except InvalidStateError:
+            pass  # cancelled meanwhile
+    
+    def is_expired(self, now: float) -> bool:
+        return self.deadline is not None and now > self.deadline
+
+
+class RequestTracker:
+    """Correlates RX lines with outstanding requests.
+    
+    Any number of requests may be outstanding (pipelined). Each line is 
+    consumed by the oldest request it ends, else the oldest request it
+    starts, else the oldest request collecting a multiline response, so 
+    identical requests resolve in the order they were sent and responses 
+    of other requests are not collected into a multiline response. 
+    """
+    def __init__(self):
+        self._pending: list[PendingRequest] = []
+        self._lock = threading.Lock()
+        
+    def add(self, request: PendingRequest):
+        with self._lock:
+            self._pending.append(request)
+        
+    def feed(self, line: str):
+        """Offer an RX line to outstanding requests"""
+        complete = None
+        with self._lock:
+            if any(req.future.done() for req in self._pending):  # cancelled
+                self._pending = [req for req in self._pending if not req.future.done()]
+            for accepts in (PendingRequest.ends, PendingRequest.starts, PendingRequest.continues):
+                req = next((req for req in self._pending if accepts(req, line)), None)
+                if req:
+                    req.offer(line)
+                    if req.complete:
+                        self._pending.remove(req)
+                        complete = req
+                    break
+        if complete:
+            complete.resolve()
+    
+    def expire(self):
+        """Fail outstanding requests past their deadline with TimeoutError"""
+        if not self._pending:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not any(req.is_expired(now) for req in self._pending):
+                return
+            expired = [req for req in self._pending if req.is_expired(now)]
+            self._pending = [req for req in self._pending if not req.is_expired(now)]
+        for req in expired:
+            req.resolve(TimeoutError(f"No response matching '{req.expect.pattern}'"))
+    
+    def fail_all(self, error: Exception):
+        """Fail every outstanding request (e.g. on disconnect)"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for req in pending:
+            req.resolve(error)
+            
+    def __len__(self):
+        return len(self._pending)
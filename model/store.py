@@ -0,0 +1,181 @@
+import threading
+import tempfile
+import array
+import os
+import numpy as np
+
+
+class Chunk:
+    """Sealed block of samples, in memory or spilled to .npy files"""
+    def __init__(self, times: np.ndarray, values: np.ndarray):
+        self.t0 = times[0]
+        self.t1 = times[-1]
+        self.times = times
+        self.values = values
+        self.path = None  # prefix of spilled files
+
+    def spill(self, path):
+        np.save(path + "_t.npy", self.times)
+        np.save(path + "_v.npy", self.values)
+        self.path = path
+        self.times = None
+        self.values = None
+
+    def arrays(self):
+        """Get (times, values), memory-mapped if spilled"""
+        if self.path:
+            return (np.load(self.path + "_t.npy", mmap_mode='r'),
+                    np.load(self.path + "_v.npy", mmap_mode='r'))
+        return self.times, self.values
+
+
+class ChannelSeries:
+    """Append-only time and value columns of one channel.
+
+    Samples accumulate in an array and are sealed into Chunks of
+    chunk_size. Only the newest keep_chunks stay in memory, older ones are
+    spilled to spill_dir. NOTE: times must be appended in order.
+    """
+    def __init__(self, name, chunk_size, spill_dir, keep_chunks):
+        self.name = name
+        self.chunk_size = chunk_size
+        self.spill_dir = spill_dir
+        self.keep_chunks = keep_chunks
+        self.chunks: list[Chunk] = []
+        self.times = array.array('d')
+        self.values = array.array('d')
+
+    def __len__(self):
+        return len(self.chunks) * self.chunk_size + len(self.times)
+
+    def append(self, t, value):
+        self.times.append(t)
+        self.values.append(value)
+        if len(self.times) >= self.chunk_size:
+            self._seal()
+
+    def _seal(self):
+        self.chunks.append(Chunk(np.frombuffer(self.times, dtype=np.float64).copy(),
+                                 np.frombuffer(self.values, dtype=np.float64).copy()))
+        self.times = array.array('d')
+        self.values = array.array('d')
+        if len(self.chunks) > self.keep_chunks:
+            ndx = len(self.chunks) - self.keep_chunks - 1
+            path = os.path.join(self.spill_dir(), f"{self.name}_{ndx}")
+            self.chunks[ndx].spill(path)
+
+    def window(self, t0=None, t1=None):
+        """Get (times, values) arrays of samples with t0 <= time <= t1"""
+        parts = [chunk.arrays() for chunk in self.chunks
+                 if (t0 is None or chunk.t1 >= t0) and (t1 is None or chunk.t0 <= t1)]
+        if self.times:
+            parts.append((np.frombuffer(self.times, dtype=np.float64),
+                          np.frombuffer(self.values, dtype=np.float64)))
+        if not parts:
+            return np.empty(0), np.empty(0)
+        times = np.concatenate([p[0] for p in parts])
+        values = np.concatenate([p[1] for p in parts])
+        lo = 0 if t0 is None else np.searchsorted(times, t0, 'left')
+        hi = len(times) if t1 is None else np.searchsorted(times, t1, 'right')
+        return times[lo:hi], values[lo:hi]
+
+
+class ChannelStore:
+    """Columnar per-channel time-series store.
+
+    Times are float seconds since epoch. Thread-safe for one writer
+    and any number of readers.
+
+    Args:
+        chunk_size (int): Samples per sealed chunk.
+        keep_chunks (int): Sealed chunks per channel kept in memory.
+        spill_dir (str): Directory of spilled chunks, default a temporary
+            directory removed on clear().
+    """
+    def __init__(self, chunk_size=65536, keep_chunks=8, spill_dir=None):
+        self.chunk_size = chunk_size
+        self.keep_chunks = keep_chunks
+        self.series: dict[object, ChannelSeries] = {}
+        self._spill_dir = spill_dir
+        self._tempdir = None
+        self._lock = threading.Lock()
+
+    def _get_spill_dir(self):
+        if self._spill_dir:
+            return self._spill_dir
+        if not self._tempdir:
+            self._tempdir = tempfile.TemporaryDirectory(prefix="vsb_store_")
+        return self._tempdir.name
+
+    def append(self, channel, t, value):
+        with self._lock:
+            if channel not in self.series:
+                self.series[channel] = ChannelSeries(channel, self.chunk_size,
+                                                     self._get_spill_dir, self.keep_chunks)
+            self.series[channel].append(t, value)
+
+    def channels(self) -> list:
+        return list(self.series.keys())
+
+    def window(self, channel, t0=None, t1=None):
+        """Get (times, values) of channel with t0 <= time <= t1"""
+        with self._lock:
+            if channel not in self.series:
+                return np.empty(0), np.empty(0)
+            return self.series[channel].window(t0, t1)
+
+    def clear(self):
+        with self._lock:
+            self.series.clear()
+            if self._tempdir:
+                self._tempdir.cleanup()
+                self._tempdir = None
+
+    def export(self, path):
+        """Export all channels, format by extension (.npz, .parquet, .h5)"""
+        if path.endswith('.npz'):
+            self.export_npz(path)
+        elif path.endswith('.parquet'):
+            self.export_parquet(path)
+        elif path.endswith(('.h5', '.hdf5')):
+            self.export_hdf5(path)
+        else:
+            raise ValueError(f"ChannelStore unsupported export format: {path}")
+
+    def export_npz(self, path):
+        """Arrays named '<channel>_time' and '<channel>_value'"""
+        arrays = {}
+        for channel in self.channels():
+            arrays[f"{channel}_time"], arrays[f"{channel}_value"] = self.window(channel)
+        np.savez(path, **arrays)
+
+    def export_parquet(self, path):
+        """Long table of columns time, channel, value (requires pyarrow)"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet export requires pyarrow (pip install pyarrow)")
+        with pq.ParquetWriter(path, pa.schema([('time', pa.float64()),
+                                               ('channel', pa.string()),
+                                               ('value', pa.float64())])) as writer:
+            for channel in self.channels():
+                times, values = self.window(channel)
+                writer.write_table(pa.table({
+                    'time': times,
+                    'channel': pa.array([str(channel)] * len(times), pa.string()),
+                    'value': values,
+                }))
+
+    def export_hdf5(self, path):
+        """Group per channel with datasets time and value (requires h5py)"""
+        try:
+            import h5py
+        except ImportError:
+            raise ImportError("HDF5 export requires h5py (pip install h5py)")
+        with h5py.File(path, 'w') as file:
+            for channel in self.channels():
+                times, values = self.window(channel)
+                group = file.create_group(str(channel))
+                group.create_dataset('time', data=times, compression='gzip')
+                group.create_dataset('value', data=values, compression='gzip')
@@ -0,0 +1,205 @@
+"""
+File: perf.py
+Purpose: Per-stage timing, counters and optional profilers
+
+Stages are timed with `with STATS.stage("name"):` or @timed("name"),
+events counted with STATS.count("name") and queue depths registered as
+gauges with STATS.gauge("name", func). STATS is shared by the whole app.
+"""
+
+import threading
+import time
+import io
+import cProfile
+import pstats
+import tracemalloc
+
+BUCKETS = 24  # histogram buckets, powers of 2 microseconds
+
+
+class Stage:
+    """Timings of a stage: count, total, max and a log2(µs) histogram.
+    NOTE: A stage is timed by one thread at a time."""
+    __slots__ = ("name", "calls", "total_ns", "max_ns", "histogram", "_start")
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.histogram = [0] * BUCKETS
+        self._start = 0
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.record(time.perf_counter_ns() - self._start)
+        return False
+
+    def record(self, ns):
+        self.calls += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        self.histogram[min((ns // 1000).bit_length(), BUCKETS - 1)] += 1
+
+    def percentile(self, p) -> float:
+        """Upper bound (µs) of the histogram bucket holding percentile p"""
+        target = self.calls * p / 100
+        seen = 0
+        for bucket, n in enumerate(self.histogram):
+            seen += n
+            if n and seen >= target:
+                return float(1 << bucket)
+        return 0.0
+
+    def reset(self):
+        self.calls = self.total_ns = self.max_ns = 0
+        self.histogram = [0] * BUCKETS
+
+
+class PerfStats:
+    """Registry of stages, counters and gauges"""
+    def __init__(self):
+        self.stages: dict[str, Stage] = {}
+        self.counters: dict[str, int] = {}
+        self.gauges: dict[str, object] = {}  # name to func() -> number
+        self._lock = threading.Lock()
+        self._since = time.monotonic()
+        self._last = (self._since, {})  # (time, counters) of last rates()
+
+    def stage(self, name) -> Stage:
+        """Get (creating) the stage, usable as a context manager"""
+        stage = self.stages.get(name)
+        if stage is None:
+            with self._lock:
+                stage = self.stages.setdefault(name, Stage(name))
+        return stage
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name, func):
+        """Register func() returning a current value, e.g. a queue depth"""
+        self.gauges[name] = func
+
+    def remove_gauge(self, name):
+        self.gauges.pop(name, None)
+
+    def rates(self) -> dict:
+        """Counter increments per second since the previous call"""
+        now = time.monotonic()
+        last_t, last = self._last
+        counters = dict(self.counters)
+        self._last = (now, counters)
+        dt = max(now - last_t, 1e-9)
+        return {name: (n - last.get(name, 0)) / dt for name, n in counters.items()}
+
+    def read_gauges(self) -> dict:
+        values = {}
+        for name, func in list(self.gauges.items()):
+            try:
+                values[name] = func()
+            except Exception:
+                values[name] = None  # e.g. port closed
+        return values
+
+    def reset(self):
+        for stage in list(self.stages.values()):
+            stage.reset()
+        self.counters.clear()
+        self._since = time.monotonic()
+        self._last = (self._since, {})
+
+    def report(self, rates: dict = None) -> str:
+        """Text table of all stages, counters and gauges"""
+        rates = rates if rates is not None else self.rates()
+        lines = [f"{'stage':<16}{'calls':>9}{'mean us':>10}{'p99 us':>9}{'max us':>10}{'busy %':>8}"]
+        elapsed = max(time.monotonic() - self._since, 1e-9)
+        for name, s in sorted(self.stages.items()):
+            mean = s.total_ns / s.calls / 1000 if s.calls else 0.0
+            lines.append(f"{name:<16}{s.calls:>9}{mean:>10.1f}{s.percentile(99):>9.0f}"
+                         f"{s.max_ns / 1000:>10.0f}{s.total_ns / 1e7 / elapsed:>8.2f}")
+        lines.append("")
+        lines.append(f"{'counter':<25}{'total':>12}{'per s':>10}")
+        for name, n in sorted(self.counters.items()):
+            lines.append(f"{name:<25}{n:>12}{rates.get(name, 0.0):>10.1f}")
+        lines.append("")
+        for name, value in sorted(self.read_gauges().items()):
+            lines.append(f"{name:<25}{'-' if value is None else value:>12}")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """Write report() with a timestamp to path"""
+        with open(path, 'a') as file:
+            file.write(f"# {time.strftime('%Y-%m-%d %H:%M:%S')}\n{self.report()}\n\n")
+
+
+STATS = PerfStats()
+
+
+def timed(name):
+    """Decorator timing each call of a function as stage name"""
+    def decorator(func):
+        stage = STATS.stage(name)
+        def wrapper(*args, **kwargs):
+            with stage:
+                return func(*args, **kwargs)
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+    return decorator
+
+
+class Profiler:
+    """Start/stop cProfile (of the calling thread, i.e. the GUI) and
+    tracemalloc, saving results as text"""
+    def __init__(self):
+        self.profile = None
+
+    @property
+    def is_profiling(self) -> bool:
+        return self.profile is not None
+
+    @property
+    def is_tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start_profile(self):
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop_profile(self, path=None, limit=40) -> str:
+        """Stop profiling, returning (and writing to path) the top
+        functions by cumulative time"""
+        if not self.profile:
+            return ""
+        self.profile.disable()
+        out = io.StringIO()
+        pstats.Stats(self.profile, stream=out).sort_stats("cumulative").print_stats(limit)
+        self.profile = None
+        return self._save(out.getvalue(), path)
+
+    def start_trace(self, frames=1):
+        tracemalloc.start(frames)
+
+    def stop_trace(self, path=None, limit=25) -> str:
+        """Stop tracing, returning (and writing to path) the top
+        allocating lines"""
+        if not tracemalloc.is_tracing():
+            return ""
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        lines = [f"traced current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB"]
+        lines += [str(stat) for stat in snapshot.statistics("lineno")[:limit]]
+        return self._save("\n".join(lines) + "\n", path)
+
+    @staticmethod
+    def _save(text, path):
+        if path:
+            with open(path, 'w') as file:
+                file.write(text)
+        return text
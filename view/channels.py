@@ -0,0 +1,35 @@
+import tkinter as tk
+from .widgets.channel_table import ChannelTable
+
+class ChannelWindow(tk.Toplevel):
+    """Per-channel readouts popout (tk.Toplevel) of a ChannelTable, as a
+    table or heatmap. NOTE: Closing only hides the window."""
+    def __init__(self, master):
+        super().__init__(master)
+
+        self.title("Channels")
+        self.geometry("360x480")
+        self.protocol("WM_DELETE_WINDOW", self.withdraw)
+        self.withdraw()
+
+        buttons = tk.Frame(self)
+        buttons.pack(fill="x", padx=5, pady=5)
+        self.layout = tk.StringVar(self, value="table")
+        for label, value in (("Table", "table"), ("Heatmap", "heatmap")):
+            tk.Radiobutton(buttons, text=label, value=value, variable=self.layout,
+                           command=lambda: self.table.set_layout(self.layout.get())).pack(side="left")
+        self.reset_button = tk.Button(buttons, text="Reset Min/Max")
+        self.reset_button.pack(side="right")
+
+        self.table = ChannelTable(self)
+        self.table.pack(fill="both", expand=True, padx=5, pady=5)
+
+    def show(self):
+        self.deiconify()
+        self.lift()
+
+    def set_summary(self, summary):
+        self.table.set_summary(summary)
+
+    def set_reset_command(self, func):
+        self.reset_button.configure(command=func)
@@ -12,7 +12,8 @@ class VSBControls(tk.Frame):
         # list[column][row] of each type
         self.ctrl_names = [["Run", "Stop", "Balance", "ExtBus", "MQ Dump", "Show DN"], 
                       ["Debug", "Debug2", "Trace", "Trace2", "Info", "Error"]]
-        self.stat_names = [["PVM", "CTC", "Last CV", "Last CV DN", "Last Err", "Errs"]]
+        self.stat_names = [["PVM", "CTC", "Last CV", "Last CV DN", "Last Err", "Errs"],
+                           ["Min V", "Max V", "Mean V", "Imbalance", "Max dV/dt", "Alarm"]]
         
         self.but_grid = WidgetGrid(self, LEDButton, self.ctrl_names)
         self.but_grid.pack(side='left', fill='both', expand=True)
@@ -31,6 +32,11 @@ class VSBControls(tk.Frame):
         status = self.stat_grid.get_widget(name)
         if status and isinstance(status, StatusBox):
             status.set_readout(readout)
+            
+    def set_alert(self, name, state):
+        status = self.stat_grid.get_widget(name)
+        if status and isinstance(status, StatusBox):
+            status.set_alert(state)
 
     def set_led(self, button_name, state):
         button = self.but_grid.get_widget(button_name)
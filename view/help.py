@@ -2,12 +2,15 @@ import tkinter as tk
 
 class HelpWindow(tk.Toplevel):
     """Help popout for VSB Logger (tk.Toplevel)"""
-    def __init__(self, master):
+    def __init__(self, master, on_stats=None):
         super().__init__(master)
         
         self.title("Help")
         self.geometry("500x500")
 
+        if on_stats:
+            self.stats_button = tk.Button(self, text="Performance Stats", command=on_stats)
+            self.stats_button.pack(side="bottom", fill="x", padx=5, pady=5)
         self.text = tk.Text(self, wrap="word", state="disabled")
         self.text.pack(fill="both", expand=True, padx=5, pady=5)
 
@@ -52,17 +55,37 @@ STATUS PANEL:
 
     A panel of readouts for various VSB states
     taken directly from incoming VSB data strings.
+    
+    The second column is derived each second from
+    the last 64 samples of every graphed channel, 
+    in volts: pack min/max/mean, imbalance (max - 
+    min of latest cell volts) and the steepest 
+    dV/dt (V/s). DN are converted as 0-4095 DN = 
+    0-5 V unless a calibration CSV (rows of 
+    channel,dn,volts) is loaded from the Tools menu.
 
 LOGGING PANEL:
 -------------------
     A file browser for selecting a file to log 
     data to, and a button to toggle logging on/off.
+    
+    Tools > Log Format selects raw lines (default),
+    a wide CSV with one row per second and one 
+    column per channel plus readouts, or both (the 
+    wide CSV is then written to <file>_wide.csv).
         
 SERIAL TERMINAL:
 -------------------
     A command-line interface for displaying, 
     receiving, and sending custom commands to the 
     VSB unit.
+    
+    The terminal keeps the last 5000 lines. If 
+    lines arrive faster than it can show them, 
+    Tools > Terminal Overload picks what is 
+    dropped from the display: newest lines (with 
+    a "N lines skipped" note), oldest lines, or 
+    every other line. Logging is never affected.
         
 SERIAL SETUP:
 -------------------
@@ -70,6 +93,28 @@ SERIAL SETUP:
     and baud rate, discovering ports (refresh) and 
     connecting to a selected port. Note you may type 
     your own port name if it is not listed.
+    
+    Serial-to-Ethernet bridges are connected by 
+    URL: socket://HOST:PORT for raw TCP or 
+    rfc2217://HOST:PORT for a Telnet COM port 
+    server (edit the templates in the list).
+    
+    Baud "Auto" tries each rate (fastest first) 
+    for up to 0.2 s, sending "SS" if the port is 
+    quiet, and connects at the rate receiving 
+    readable lines. The scores are printed to the
+    terminal.
+    
+    Tools > Capture in Separate Process (applied
+    on the next connect) reads, raw logs and parses
+    the port in its own process, so a busy display 
+    never delays capture and a second core is used.
+    
+    Tools > Binary Framed Samples (applied on the
+    next connect, not with a separate process) 
+    decodes CV samples sent by the firmware as 
+    binary frames (see model/frames.py) between 
+    its text lines. Corrupted frames are skipped.
         
 GRAPH PANEL:
 -------------------
@@ -87,6 +132,84 @@ GRAPH PANEL:
     - The "Update Units" button must be pressed
     after changing units in the dropdown for it to
     take effect.
+    - The graph redraws only when new data arrives,
+    refreshes less often when drawing is slow,
+    and pauses while the window is minimized.
+
+CHANNEL TABLE (Tools menu):
+-------------------
+    Latest value, min/max (since "Reset Min/Max")
+    and age in seconds of every graphed channel,
+    as a table or a heatmap of tiles colored from
+    0 (blue) to 4095 DN (red). Channels without
+    samples for 5 s are greyed out.
+        
+STATE JOURNAL (Tools menu):
+-------------------
+    Every change of an LED, probed readout (PVM, 
+    CTC, Errs, Last Err...), alarm or connection 
+    is recorded with its time to vsb_journal.db.
+    Query the changes of a field between From and 
+    To, or "State At From" for the value of every
+    field at that time.
+        
+ALARMS (Tools menu):
+-------------------
+    Samples are checked against alarm rules in 
+    volts. An alarm highlights the "Alarm" readout, 
+    is printed to the terminal, marked in the raw 
+    log (ALARM/CLEAR lines) and may send a command.
+    By default only stale channels (no sample for 
+    10s) and a rising "Errs" count alarm.
+    
+    "Load Alarms..." takes a JSON list of rules:
+        [{"type": "threshold", "name": "OV",
+          "high": 4.25, "command": "ST"},
+         {"type": "threshold", "name": "UV",
+          "low": 2.8, "channels": [0, 1]},
+         {"type": "rate", "name": "Fast",
+          "max_rate": 0.5},
+         {"type": "stale", "name": "Stale",
+          "timeout": 10},
+         {"type": "counter", "name": "Errors",
+          "readout": "Errs"}]
+
+PERFORMANCE STATS (Tools menu, or below):
+-------------------
+    Timings of each processing stage (serial 
+    read, RX listeners, log writes, terminal 
+    inserts, graph frames): calls, mean/p99/max 
+    microseconds and % of time busy, plus line 
+    rates and queue depths. "Dump..." appends 
+    the table to a text file. 
+    
+    cProfile profiles the GUI thread and 
+    tracemalloc traces allocations until toggled
+    off, then saves the top entries to a file.
+
+SCRIPT RUNNER (Tools menu):
+-------------------
+    Runs a file of commands against the connected 
+    VSB unit, one statement per line ('#' comments):
+    
+        send CMD            send a command
+        send CMD => REGEX   send, wait for reply
+        await REGEX         wait for a matching line
+        timeout SEC         timeout of waits (> 0, def. 5)
+        wait SEC            pause
+        at SEC              pause until SEC after start
+        loop N ... end      repeat
+        if A OP B ... [else ...] end
+        echo TEXT           print, {name} = variable
+        abort TEXT          stop with an error
+    
+    Named regex groups store variables, e.g.
+        send SS => Err count :\\s*(?P<errs>\\d+)
+        if errs > 0
+            send ST
+        end
+    
+    Press "Run Script" again to stop a running script.
 """
 
         self.text.configure(state="normal")
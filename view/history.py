@@ -0,0 +1,110 @@
+import tkinter as tk
+import os
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from .live_graph.history import HistoryLoader
+from .live_graph.helpers import LegendHandler, to_local_datetime64, from_local_datenum
+
+class HistoryWindow(tk.Toplevel):
+    """Recorded log viewer popout (tk.Toplevel).
+
+    Zoom/pan with the toolbar. Spans up to raw_seconds show raw samples,
+    longer spans a min/max envelope of at most max_points per channel.
+    """
+    def __init__(self, master, log_path, max_points=2000, raw_seconds=600):
+        super().__init__(master)
+
+        self.title(f"History: {os.path.basename(log_path)}")
+        self.geometry("1000x600")
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.max_points = max_points
+        self.raw_seconds = raw_seconds
+        self._redraw_pending = False
+        self._tiles_poll = None  # after id while raw tiles load
+        self._has_range = False
+
+        self.fig = Figure()
+        self.ax = self.fig.add_subplot()
+        self.ax.grid()
+        self.ax.tick_params(axis='x', rotation=45)
+        self.fig.subplots_adjust(bottom=0.2)
+        self.lines = {}  # channel to Line2D
+        self.legend = LegendHandler(self.ax, self.fig, enable_pick_event=True)
+
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.toolbar = NavigationToolbar2Tk(self.canvas, self, pack_toolbar=False)
+        self.toolbar.update()
+        self.toolbar.pack(fill="x")
+        self.status = tk.Label(self, anchor="w", text="Indexing...")
+        self.status.pack(fill="x")
+
+        self.ax.callbacks.connect('xlim_changed', lambda ax: self.schedule_redraw())
+        self.loader = HistoryLoader(log_path)
+        self.loader.start()
+        self._poll()
+
+    def on_close(self):
+        self.loader.stop()
+        if self._tiles_poll:
+            self.after_cancel(self._tiles_poll)
+        self.destroy()
+
+    def _poll(self):
+        """Show new channels and loading progress until loaded"""
+        loader = self.loader
+        for channel in loader.channels():
+            if channel not in self.lines:
+                self.lines[channel] = self.ax.plot([], [], label=str(channel))[0]
+                self.legend.refresh_map(list(self.lines.values()))
+        if not self._has_range and loader.t_first is not None and loader.t_last > loader.t_first:
+            self._has_range = True
+            self._set_full_range()
+        self.schedule_redraw()  # show newly loaded data
+
+        if loader.error:
+            self.status.config(text=f"Error: {loader.error}")
+        elif loader.done:
+            self.status.config(text=f"Loaded {len(self.lines)} channels")
+        else:
+            self.status.config(text=f"Loading {loader.progress:.0%}")
+            self.after(500, self._poll)
+
+    def _poll_tiles(self):
+        """Redraw once the raw tiles requested by _redraw are loaded"""
+        self._tiles_poll = None
+        if self.loader.tiles_pending():
+            self._tiles_poll = self.after(100, self._poll_tiles)
+        else:
+            self.schedule_redraw()
+
+    def _set_full_range(self):
+        lower, upper = to_local_datetime64([self.loader.t_first, self.loader.t_last])
+        self.ax.set_xlim(lower, upper)
+
+    def schedule_redraw(self):
+        """Redraw once when idle, however many times limits change"""
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.after_idle(self._redraw)
+
+    def _redraw(self):
+        self._redraw_pending = False
+        lower, upper = (from_local_datenum(x) for x in self.ax.get_xlim())
+        ymin, ymax = None, None
+        for channel, line in self.lines.items():
+            if not line.get_visible():
+                continue
+            if upper - lower <= self.raw_seconds:
+                times, values = self.loader.raw(channel, lower, upper)
+            else:
+                times, values = self.loader.summary(channel, lower, upper, self.max_points)
+            line.set_data(to_local_datetime64(times), values)
+            if len(values):
+                ymin = min(values.min(), ymin) if ymin is not None else values.min()
+                ymax = max(values.max(), ymax) if ymax is not None else values.max()
+        if ymin is not None and ymax > ymin:
+            self.ax.set_ylim(ymin, ymax)
+        self.canvas.draw_idle()
+        if self.loader.tiles_pending() and not self._tiles_poll:
+            self._tiles_poll = self.after(100, self._poll_tiles)
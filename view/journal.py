@@ -0,0 +1,98 @@
+import tkinter as tk
+import tkinter.ttk as ttk
+import datetime
+from journal import Journal, format_time
+
+class JournalWindow(tk.Toplevel):
+    """State journal query popout (tk.Toplevel): changes of a field (or
+    all) between From and To, or the state of every field at From.
+    Times are local "YYYY-MM-DD HH:MM:SS", blank for unbounded.
+    NOTE: Closing only hides the window."""
+    def __init__(self, master):
+        super().__init__(master)
+
+        self.title("State Journal")
+        self.geometry("640x480")
+        self.protocol("WM_DELETE_WINDOW", self.withdraw)
+        self.withdraw()
+        self.journal = None
+
+        form = tk.Frame(self)
+        form.pack(fill="x", padx=5, pady=5)
+        tk.Label(form, text="Field:").grid(row=0, column=0, sticky="e")
+        self.field_var = tk.StringVar(self, value="All")
+        self.field_box = ttk.Combobox(form, textvariable=self.field_var, width=14,
+                                      postcommand=self._refresh_fields)
+        self.field_box.grid(row=0, column=1, sticky="w")
+        tk.Label(form, text="From:").grid(row=0, column=2, sticky="e")
+        self.start_entry = tk.Entry(form, width=20)
+        self.start_entry.grid(row=0, column=3)
+        tk.Label(form, text="To:").grid(row=0, column=4, sticky="e")
+        self.end_entry = tk.Entry(form, width=20)
+        self.end_entry.grid(row=0, column=5)
+        tk.Button(form, text="Query", command=self.query).grid(row=0, column=6, padx=2)
+        tk.Button(form, text="State At From", command=self.state_at).grid(row=0, column=7, padx=2)
+
+        columns = ("time", "field", "value", "previous")
+        self.table = ttk.Treeview(self, columns=columns, show="headings")
+        for name, width in zip(columns, (170, 110, 160, 160)):
+            self.table.heading(name, text=name.capitalize())
+            self.table.column(name, width=width, anchor="w")
+        scrollbar = tk.Scrollbar(self, orient="vertical", command=self.table.yview)
+        self.table.configure(yscrollcommand=scrollbar.set)
+        self.status = tk.Label(self, anchor="w")
+        self.status.pack(side="bottom", fill="x", padx=5)
+        scrollbar.pack(side="right", fill="y")
+        self.table.pack(fill="both", expand=True, padx=5, pady=5)
+
+    def show(self):
+        self.deiconify()
+        self.lift()
+
+    def set_journal(self, journal: Journal):
+        self.journal = journal
+
+    def _refresh_fields(self):
+        if self.journal:
+            self.field_box["values"] = ["All"] + self.journal.fields()
+
+    def _parse(self, entry: tk.Entry):
+        """Entry time as seconds since epoch, None if blank"""
+        text = entry.get().strip()
+        return datetime.datetime.fromisoformat(text).timestamp() if text else None
+
+    def _show(self, rows, status):
+        self.table.delete(*self.table.get_children())
+        for row in rows:
+            self.table.insert("", "end", values=row)
+        self.status.config(text=status)
+
+    def query(self):
+        if not self.journal:
+            self.status.config(text="No journal open")
+            return
+        try:
+            t0, t1 = self._parse(self.start_entry), self._parse(self.end_entry)
+        except ValueError as e:
+            self.status.config(text=f"Error: {e}")
+            return
+        field = self.field_var.get()
+        rows = self.journal.query(None if field in ("", "All") else field, t0, t1)
+        self._show([(format_time(t), f, value, previous) for t, f, value, previous in rows],
+                   f"{len(rows)} changes")
+
+    def state_at(self):
+        if not self.journal:
+            self.status.config(text="No journal open")
+            return
+        try:
+            t = self._parse(self.start_entry)
+        except ValueError as e:
+            self.status.config(text=f"Error: {e}")
+            return
+        if t is None:
+            self.status.config(text="Enter a From time")
+            return
+        state = self.journal.state_at(t)
+        self._show([(format_time(t), field, value, "") for field, value in sorted(state.items())],
+                   f"State of {len(state)} fields at {format_time(t)}")
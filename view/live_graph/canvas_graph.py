@@ -0,0 +1,216 @@
+"""
+File: canvas_graph.py
+Purpose: Live graph drawn directly on a tkinter Canvas, without matplotlib
+"""
+
+from .helpers import LimitHandler
+from perf import timed
+import tkinter as tk
+import numpy as np
+import array
+import bisect
+import time
+
+# matplotlib's default (tab10) color cycle, so both renderers look alike
+COLORS = ("#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+          "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf")
+
+
+def decimate(times: np.ndarray, values: np.ndarray, t0, t1, pixels: int):
+    """Reduce sorted samples to the min and max of each pixel column,
+    unchanged if there are at most two samples per column"""
+    if len(times) <= 2 * pixels:
+        return times, values
+    cols = ((times - t0) * (pixels / (t1 - t0))).astype(np.int64)
+    firsts = np.concatenate(([0], np.flatnonzero(np.diff(cols)) + 1))
+    out_t = np.repeat(times[firsts], 2)
+    out_v = np.empty(len(out_t))
+    out_v[0::2] = np.minimum.reduceat(values, firsts)
+    out_v[1::2] = np.maximum.reduceat(values, firsts)
+    return out_t, out_v
+
+
+class CanvasAxes:
+    """Limits set by LimitHandler, in place of a matplotlib Axes"""
+    def __init__(self):
+        self.xlim = (None, None)
+        self.ylim = (None, None)
+
+    def set_xlim(self, lower, upper):
+        self.xlim = (lower, upper)
+
+    def set_ylim(self, lower, upper):
+        self.ylim = (lower, upper)
+
+
+class CanvasLine:
+    """Appended data of a line and its canvas items"""
+    def __init__(self, canvas: tk.Canvas, color):
+        self.times = array.array('d')
+        self.values = array.array('d')
+        self.visible = True
+        self.color = color
+        self.item = canvas.create_line(0, 0, 0, 0, fill=color, state="hidden")
+        self.legend = None  # legend text item
+
+    def append(self, t, y):
+        self.times.append(t)
+        self.values.append(y)
+
+    def window(self, t0, t1):
+        """Get (times, values) from t0 to t1, plus one sample either side"""
+        lo = max(bisect.bisect_left(self.times, t0) - 1, 0)
+        hi = bisect.bisect_right(self.times, t1) + 1
+        return np.array(self.times[lo:hi]), np.array(self.values[lo:hi])
+
+
+class CanvasGraph:
+    """Live graph on a tk.Canvas with the interface of LiveGraph. Each
+    frame (see draw_frame) updates line item coordinates in place, at
+    most two points per pixel column per line. Legend entries toggle 
+    line visibility.
+
+    NOTE: x values are datetimes, like LiveGraphTk gives LiveGraph.
+
+    Args:
+        width (timedelta): Width of the graph.
+        source (function): Optional source(line_name, t0, t1) returning
+            (times, values) with times in seconds since epoch, read
+            every refresh instead of keeping appended data.
+    """
+    def __init__(self, master, width, source=None, margins=(60, 10, 15, 45), ticks=5):
+        self.widget = tk.Canvas(master, bg="white", highlightthickness=0)
+        self.axes = CanvasAxes()
+        self.limits = LimitHandler(self.axes, width)
+        self.lines: dict[object, CanvasLine] = {}
+        self.is_auto = True
+        self.source = source
+        self.margins = margins  # left, top, right, bottom pixels
+
+        canvas = self.widget
+        self.frame = canvas.create_rectangle(0, 0, 0, 0, outline="black")
+        self.grid = [canvas.create_line(0, 0, 0, 0, fill="#e0e0e0") for _ in range(2 * ticks)]
+        self.xlabels = [canvas.create_text(0, 0, anchor="n", font=("TkDefaultFont", 8))
+                        for _ in range(ticks)]
+        self.ylabels = [canvas.create_text(0, 0, anchor="e", font=("TkDefaultFont", 8))
+                        for _ in range(ticks)]
+
+    def append(self, line_name, x, y):
+        """Append data to the graph at line"""
+        self.limits.track_data(x, y)
+        line = self._line(line_name)
+        if not self.source:
+            line.append(x.timestamp(), y)
+
+    def append_batch(self, line_name, xs, ys):
+        """Append sorted xs and their ys to the graph at line"""
+        self.limits.track_data(xs[0], min(ys))
+        self.limits.track_data(xs[-1], max(ys))
+        line = self._line(line_name)
+        if not self.source:
+            for x, y in zip(xs, ys):
+                line.append(x.timestamp(), y)
+
+    def set_source(self, source):
+        """Set source(line_name, t0, t1) of line data, see __init__"""
+        self.source = source
+
+    def set_width(self, width):
+        """Set the width of the graph (timedelta)"""
+        self.limits.set_width(width)
+
+    def set_auto(self, is_auto):
+        """Set the graph to autoshift mode, else
+        x-axis remains still until manually updated"""
+        self.is_auto = is_auto
+
+    def set_xlim_to_relx(self, percent: float):
+        """View graph at relative x between 0.0 (xmin) and 1.0 (xmax)."""
+        self.limits.set_xlim_to_relx(percent)
+
+    def clear(self):
+        """Clear all lines from graph"""
+        for line in self.lines.values():
+            self.widget.delete(line.item, line.legend)
+        self.lines.clear()
+        self.limits.clear_tracked()
+
+    def _line(self, name) -> CanvasLine:
+        """Get line named name, adding it and its legend entry if new"""
+        line = self.lines.get(name)
+        if line is None:
+            color = COLORS[len(self.lines) % len(COLORS)]
+            line = self.lines[name] = CanvasLine(self.widget, color)
+            left, top = self.margins[0], self.margins[1]
+            line.legend = self.widget.create_text(
+                left + 6, top + 4 + 13 * (len(self.lines) - 1), anchor="nw",
+                text=f"— {name}", fill=color, font=("TkDefaultFont", 8, "bold"))
+            self.widget.tag_bind(line.legend, "<Button-1>", lambda _: self._toggle(name))
+            for other in self.lines.values():  # legend above all lines
+                self.widget.tag_raise(other.legend)
+        return line
+
+    def _toggle(self, name):
+        """Toggle visibility of a line, dimming its legend entry"""
+        line = self.lines[name]
+        line.visible = not line.visible
+        self.widget.itemconfigure(line.legend, fill=line.color if line.visible else "#c0c0c0")
+        if not line.visible:
+            self.widget.itemconfigure(line.item, state="hidden")
+
+    @timed("graph frame")
+    def draw_frame(self):
+        """Update and draw the graph now"""
+        if self.is_auto:
+            self.limits.set_xlim_to_newest()
+        self.limits.set_ylim()
+        lower, upper = self.axes.xlim
+        ymin, ymax = self.axes.ylim
+        w, h = self.widget.winfo_width(), self.widget.winfo_height()
+        if lower is None or ymin is None or w < 100 or h < 100:
+            return
+        t0, t1 = lower.timestamp(), upper.timestamp()
+        if t1 <= t0:
+            t1 = t0 + 1
+        if ymax <= ymin:
+            ymin, ymax = ymin - 1, ymax + 1
+        left, top = self.margins[0], self.margins[1]
+        right, bottom = w - self.margins[2], h - self.margins[3]
+        sx = (right - left) / (t1 - t0)
+        sy = (bottom - top) / (ymax - ymin)
+
+        for name, line in self.lines.items():
+            if not line.visible:
+                continue
+            if self.source:
+                times, values = self.source(name, t0, t1)
+            else:
+                times, values = line.window(t0, t1)
+            times, values = decimate(np.asarray(times, dtype=np.float64),
+                                     np.asarray(values, dtype=np.float64), t0, t1, right - left)
+            if len(times) < 2:
+                self.widget.itemconfigure(line.item, state="hidden")
+                continue
+            xy = np.empty(2 * len(times))
+            xy[0::2] = np.clip(left + (times - t0) * sx, left, right)
+            xy[1::2] = bottom - (values - ymin) * sy
+            self.widget.coords(line.item, np.rint(xy).astype(np.int64).tolist())
+            self.widget.itemconfigure(line.item, state="normal")
+        self._draw_axes(t0, t1, ymin, ymax, left, top, right, bottom)
+
+    def _draw_axes(self, t0, t1, ymin, ymax, left, top, right, bottom):
+        """Move frame, grid lines and tick labels in place"""
+        canvas = self.widget
+        canvas.coords(self.frame, left, top, right, bottom)
+        ticks = len(self.xlabels)
+        fmt = "%H:%M:%S" if t1 - t0 < 86400 else "%m-%d %H:%M"
+        for n in range(ticks):
+            frac = n / (ticks - 1)
+            x = left + frac * (right - left)
+            canvas.coords(self.grid[n], x, top, x, bottom)
+            canvas.coords(self.xlabels[n], x, bottom + 4)
+            canvas.itemconfigure(self.xlabels[n], text=time.strftime(fmt, time.localtime(t0 + frac * (t1 - t0))))
+            y = bottom - frac * (bottom - top)
+            canvas.coords(self.grid[ticks + n], left, y, right, y)
+            canvas.coords(self.ylabels[n], left - 4, y)
+            canvas.itemconfigure(self.ylabels[n], text=f"{ymin + frac * (ymax - ymin):.4g}")
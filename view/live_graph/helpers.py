@@ -5,6 +5,21 @@ Purpose: Helpers for the live matplotlib graphs
 """
 
 import matplotlib.pyplot as plt
+import numpy as np
+import time
+
+
+def to_local_datetime64(times):
+    """Convert seconds since epoch to naive local datetime64, 
+    plotted the same as datetime.datetime.now() values"""
+    local = (np.asarray(times, dtype=np.float64) + time.localtime().tm_gmtoff) * 1e6
+    return local.astype('datetime64[us]')
+
+
+def from_local_datenum(x: float) -> float:
+    """Convert matplotlib date number of a naive local datetime to seconds since epoch"""
+    return x * 86400 - time.localtime().tm_gmtoff
+
 
 class Line:
     """Line object to encapsulate iterative appending"""
@@ -19,6 +34,10 @@ class Line:
         self.y.append(y)
         self.line2d.set_data(self.x, self.y)
         
+    def set_data(self, x, y):
+        """Replace plotted data, bypassing appended data"""
+        self.line2d.set_data(x, y)
+        
     def __del__(self):
         self.line2d.remove()
         
@@ -33,11 +52,15 @@ class LinesHandler:
         """Return lines as list[plt.Line2D]"""
         return [ln.line2d for ln in self.lines.values()]
     
-    def append(self, name, x, y):
-        """Append data to line named 'name'."""
+    def add(self, name):
+        """Add line named 'name' if it does not exist."""
         if name not in self.lines:
             self.lines[name] = Line(name, self.ax)
             self.legendhandler.refresh_map(self.get_lines())
+    
+    def append(self, name, x, y):
+        """Append data to line named 'name'."""
+        self.add(name)
         self.lines[name].append(x, y)
         
     def clear_all(self):
@@ -93,6 +116,8 @@ class LimitHandler:
         self.ymin = None
         self.width = width
         self.cur_x = None  # halfway of upper & lower
+        self.lower = None
+        self.upper = None
         
     def set_width(self, width):
         self.width = width
@@ -151,8 +176,14 @@ class LimitHandler:
     def _set_xlim(self, lower, upper):
         """Wrapper to set x-axis limits, which also updates cur_x."""
         self.ax.set_xlim(lower, upper)
+        self.lower = lower
+        self.upper = upper
         self.cur_x = lower + (upper-lower)/2
     
+    def get_xlim(self):
+        """Get (lower, upper) x-axis limits last set, None if unset"""
+        return self.lower, self.upper
+    
     def _relx_to_x(self, relx: float):
         """Convert relative x (0.0 - 1.0) to a real x position."""
         if relx < 0:
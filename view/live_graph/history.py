@@ -0,0 +1,163 @@
+"""
+File: history.py
+Purpose: Background summary and on-demand loading of recorded logs
+"""
+
+from .pyramid import MinMaxPyramid
+from log_index import build_index
+from collections import OrderedDict
+import threading
+import queue
+import numpy as np
+
+
+class HistoryLoader(threading.Thread):
+    """Stoppable thread summarizing a recorded log into per-channel
+    MinMaxPyramids. Short spans are served as raw samples, loaded from
+    the log by time index in cached tiles, so the log is never fully
+    held in memory. Tiles are parsed by a second (tile) thread, see raw()."""
+    def __init__(self, log_path, widths=(10, 60, 600, 3600), tile_seconds=300,
+                 max_tiles=16, batch=65536):
+        super().__init__()
+        self.log_path = log_path
+        self.widths = widths
+        self.tile_seconds = tile_seconds
+        self.max_tiles = max_tiles
+        self.batch = batch
+        self.index = None
+        self.pyramids: dict[int, MinMaxPyramid] = {}
+        self.t_first = None
+        self.t_last = None
+        self.progress = 0.0
+        self.error = None
+        self.done = False
+        self.daemon = True
+        self._tiles = OrderedDict()  # LRU of tile number to {channel: (times, values)}
+        self._requested = set()  # tile numbers queued to the tile thread
+        self._tile_queue = queue.Queue()
+        self._tile_thread = threading.Thread(target=self._load_tiles, daemon=True)
+        self._indexed = threading.Event()  # index built (or failed)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def start(self):
+        super().start()
+        self._tile_thread.start()
+
+    def run(self):
+        try:
+            self.index = build_index(self.log_path)
+            self._indexed.set()
+            if len(self.index.times):
+                self.t_first = self.index.times[0]
+                self.t_last = self.index.times[-1]
+            pending: dict[int, tuple[list, list]] = {}
+            for n, (t, channel, value) in enumerate(self.index.samples(), start=1):
+                times, values = pending.setdefault(channel, ([], []))
+                times.append(t)
+                values.append(value)
+                if n % self.batch == 0:
+                    self._add_pending(pending, t)
+                    if self._stop_event.is_set():
+                        return
+            if pending:
+                self._add_pending(pending, max(times[-1] for times, _ in pending.values()))
+        except Exception as e:
+            self.error = e
+        finally:
+            self._indexed.set()
+            self.progress = 1.0
+            self.done = True
+
+    def _add_pending(self, pending, t):
+        with self._lock:
+            for channel, (times, values) in pending.items():
+                if channel not in self.pyramids:
+                    self.pyramids[channel] = MinMaxPyramid(self.widths)
+                self.pyramids[channel].add_batch(np.array(times), np.array(values))
+            if self.t_first is None:
+                self.t_first = t
+            self.t_last = max(self.t_last or t, t)
+            if self.t_last > self.t_first:
+                self.progress = (t - self.t_first) / (self.t_last - self.t_first)
+        pending.clear()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def channels(self) -> list:
+        with self._lock:
+            return sorted(self.pyramids.keys())
+
+    def summary(self, channel, t0, t1, max_points):
+        """Get min/max envelope (times, values) of the finest level
+        with at most max_points buckets from t0 to t1"""
+        with self._lock:
+            if channel not in self.pyramids:
+                return np.empty(0), np.empty(0)
+            return self.pyramids[channel].select(t0, t1, max_points).envelope(t0, t1)
+
+    def raw(self, channel, t0, t1):
+        """Get raw (times, values) of channel from t0 to t1 of the tiles
+        loaded so far, queuing the others to the tile thread (see
+        tiles_pending), so this never parses the log"""
+        empty = (np.empty(0), np.empty(0))
+        parts = [tile.get(channel, empty) for tile in
+                 (self._tile(n) for n in range(int(t0 // self.tile_seconds),
+                                               int(t1 // self.tile_seconds) + 1))
+                 if tile is not None]
+        if not parts:
+            return empty
+        times = np.concatenate([p[0] for p in parts])
+        values = np.concatenate([p[1] for p in parts])
+        keep = (times >= t0) & (times <= t1)
+        return times[keep], values[keep]
+
+    def tiles_pending(self) -> int:
+        """Tiles queued by raw() and not loaded yet"""
+        with self._lock:
+            return len(self._requested)
+
+    def _tile(self, n):
+        """Cached samples of tile number n, None if queued for loading"""
+        with self._lock:
+            if n in self._tiles:
+                self._tiles.move_to_end(n)
+                return self._tiles[n]
+            if n not in self._requested:
+                self._requested.add(n)
+                self._tile_queue.put(n)
+            return None
+
+    def _load_tiles(self):
+        """Tile thread: parse queued tiles into the cache"""
+        while not self._stop_event.is_set():
+            try:
+                n = self._tile_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            while not self._indexed.wait(0.5):
+                if self._stop_event.is_set():
+                    return
+            try:
+                tile = self._parse_tile(n)
+            except Exception as e:
+                print(f"HistoryLoader Error: {e}")
+                tile = {}
+            with self._lock:
+                self._tiles[n] = tile
+                self._requested.discard(n)
+                if len(self._tiles) > self.max_tiles:
+                    self._tiles.popitem(last=False)
+
+    def _parse_tile(self, n) -> dict:
+        """Samples of tile number n read from the log"""
+        if self.index is None:
+            return {}  # indexing failed
+        samples: dict[int, tuple[list, list]] = {}
+        t0 = n * self.tile_seconds
+        for t, channel, value in self.index.samples(t0, t0 + self.tile_seconds):
+            times, values = samples.setdefault(channel, ([], []))
+            times.append(t)
+            values.append(value)
+        return {ch: (np.array(ts), np.array(vs)) for ch, (ts, vs) in samples.items()}
@@ -2,15 +2,21 @@
 from .helpers import LinesHandler, LimitHandler
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
+from perf import timed
 
 class LiveGraph:
     """Live matplotlib graph with interactive interface."""
-    def __init__(self, width, interval=500, enable_pick_event=True):
+    def __init__(self, width, interval=500, enable_pick_event=True, source=None, animate=True):
         """NOTE: units/type of x must be consistent for all provided values.
         
         Args:
             width (Any): Width of the graph in x-axis units
             interval (int): Refresh interval millis.
+            animate (bool): Refresh on a fixed timer, else only by
+                draw_frame() (e.g. from a FrameScheduler).
+            source (function): Optional source(line_name, lower, upper)
+                returning (xs, ys) within x limits. Read every refresh 
+                instead of keeping appended data in the lines.
         """
         self.fig, self.ax = plt.subplots()
         self.ax.grid()
@@ -18,15 +24,35 @@ class LiveGraph:
         self.fig.subplots_adjust(bottom=0.2)
         
         self.lines = LinesHandler(self.ax, self.fig, enable_pick_event)
-        self.ani = FuncAnimation(self.fig, self._run, blit=False, 
-                                 interval=interval, repeat=False)
+        self.ani = None
+        if animate:
+            self.ani = FuncAnimation(self.fig, self._run, blit=False, 
+                                     interval=interval, repeat=False)
         self.limits = LimitHandler(self.ax, width)
         self.is_auto = True
+        self.source = source
         
     def append(self, line_name, x, y):
         """Append data to the graph at line"""
         self.limits.track_data(x, y)
-        self.lines.append(line_name, x, y)
+        if self.source:
+            self.lines.add(line_name)
+        else:
+            self.lines.append(line_name, x, y)
+    
+    def append_batch(self, line_name, xs, ys):
+        """Append sorted xs and their ys to the graph at line"""
+        self.limits.track_data(xs[0], min(ys))
+        self.limits.track_data(xs[-1], max(ys))
+        if self.source:
+            self.lines.add(line_name)
+        else:
+            for x, y in zip(xs, ys):
+                self.lines.append(line_name, x, y)
+    
+    def set_source(self, source):
+        """Set source(line_name, lower, upper) of line data, see __init__"""
+        self.source = source
         
     def set_width(self, width):
         """Set the width of the graph in x-axis units."""
@@ -55,8 +81,25 @@ class LiveGraph:
             self.limits.set_xlim_to_newest()
         self.limits.set_ylim()
         # Update lines
+        if self.source:
+            self._read_source()
         return self.lines.get_lines()
     
+    @timed("graph frame")
+    def draw_frame(self):
+        """Update and draw (rasterize) the graph now"""
+        self._run(None)
+        self.fig.canvas.draw()
+    
+    def _read_source(self):
+        """Set visible lines to source data within x limits"""
+        lower, upper = self.limits.get_xlim()
+        if lower is None:
+            return
+        for name, line in self.lines.lines.items():
+            if line.line2d.get_visible():
+                line.set_data(*self.source(name, lower, upper))
+    
     def show(self):
         """Show the graph if it is not 
         handled by any other mainloop (e.g. tkinter)"""
@@ -0,0 +1,182 @@
+"""
+File: pyramid.py
+Purpose: Multi-resolution min/max summaries of long time series
+"""
+
+import threading
+import array
+import bisect
+import numpy as np
+
+
+class MinMaxLevel:
+    """Fixed width time buckets of min, max, sum and count, the newest
+    max_buckets kept (None for all).
+    NOTE: Samples must be added in time order."""
+    def __init__(self, width: float, max_buckets: int = None):
+        self.width = width
+        self.max_buckets = max_buckets
+        self.starts = array.array('d')
+        self.mins = array.array('d')
+        self.maxs = array.array('d')
+        self.sums = array.array('d')
+        self.counts = array.array('d')
+
+    def __len__(self):
+        return len(self.starts)
+
+    def covers(self, t) -> bool:
+        """True if no bucket before t was dropped (see max_buckets)"""
+        return not self.starts or self.starts[0] <= t
+
+    def _trim(self):
+        """Drop the oldest buckets over max_buckets, a quarter at a time"""
+        if self.max_buckets and len(self.starts) > self.max_buckets + self.max_buckets // 4:
+            excess = len(self.starts) - self.max_buckets
+            for column in (self.starts, self.mins, self.maxs, self.sums, self.counts):
+                del column[:excess]
+
+    def add(self, t, v):
+        start = t - t % self.width
+        if self.starts and self.starts[-1] == start:
+            if v < self.mins[-1]:
+                self.mins[-1] = v
+            if v > self.maxs[-1]:
+                self.maxs[-1] = v
+            self.sums[-1] += v
+            self.counts[-1] += 1
+        else:
+            self.starts.append(start)
+            self.mins.append(v)
+            self.maxs.append(v)
+            self.sums.append(v)
+            self.counts.append(1)
+            self._trim()
+
+    def add_batch(self, times: np.ndarray, values: np.ndarray):
+        """Vectorized add of sorted samples"""
+        if not len(times):
+            return
+        starts = times - times % self.width
+        edges = np.flatnonzero(np.diff(starts)) + 1
+        firsts = np.concatenate(([0], edges))
+        mins = np.minimum.reduceat(values, firsts)
+        maxs = np.maximum.reduceat(values, firsts)
+        sums = np.add.reduceat(values, firsts)
+        counts = np.diff(np.concatenate((firsts, [len(values)])))
+        starts = starts[firsts]
+        if self.starts and self.starts[-1] == starts[0]:  # merge into open bucket
+            self.mins[-1] = min(self.mins[-1], mins[0])
+            self.maxs[-1] = max(self.maxs[-1], maxs[0])
+            self.sums[-1] += sums[0]
+            self.counts[-1] += counts[0]
+            starts, mins, maxs, sums, counts = starts[1:], mins[1:], maxs[1:], sums[1:], counts[1:]
+        for column, data in ((self.starts, starts), (self.mins, mins), (self.maxs, maxs),
+                             (self.sums, sums), (self.counts, counts)):
+            column.frombytes(np.asarray(data, dtype=np.float64).tobytes())
+        self._trim()
+
+    def count(self, t0, t1) -> int:
+        """Number of buckets overlapping t0 to t1"""
+        return bisect.bisect_right(self.starts, t1) - bisect.bisect_left(self.starts, t0 - self.width)
+
+    def samples(self, t0, t1) -> int:
+        """Number of samples in buckets overlapping t0 to t1"""
+        lo = bisect.bisect_left(self.starts, t0 - self.width)
+        hi = bisect.bisect_right(self.starts, t1)
+        return int(sum(self.counts[lo:hi]))
+
+    def window(self, t0, t1):
+        """Get copies of (starts, mins, maxs, means) of buckets overlapping t0 to t1"""
+        lo = bisect.bisect_left(self.starts, t0 - self.width)
+        hi = bisect.bisect_right(self.starts, t1)
+        starts = np.array(self.starts[lo:hi])
+        sums = np.array(self.sums[lo:hi])
+        counts = np.array(self.counts[lo:hi])
+        return starts, np.array(self.mins[lo:hi]), np.array(self.maxs[lo:hi]), sums / counts
+
+    def envelope(self, t0, t1):
+        """Get (times, values) tracing min then max of each bucket, so a
+        single line drawn through them covers the full range of the data"""
+        starts, mins, maxs, _ = self.window(t0, t1)
+        times = np.repeat(starts + self.width / 2, 2)
+        values = np.empty(len(times))
+        values[0::2] = mins
+        values[1::2] = maxs
+        return times, values
+
+
+class MinMaxPyramid:
+    """Min/max levels of increasing bucket width, all updated as samples
+    arrive, to draw any time span with a bounded number of points.
+    With max_buckets per level, memory is bounded and older spans are
+    served by coarser levels (the coarsest covering the longest)."""
+    def __init__(self, widths=(1, 10, 60, 600, 3600), max_buckets=None):
+        self.levels = [MinMaxLevel(w, max_buckets) for w in sorted(widths)]
+
+    def add(self, t, v):
+        for level in self.levels:
+            level.add(t, v)
+
+    def add_batch(self, times, values):
+        for level in self.levels:
+            level.add_batch(times, values)
+
+    def select(self, t0, t1, max_points) -> MinMaxLevel:
+        """Get the finest level covering t0 with at most max_points
+        buckets from t0 to t1"""
+        for level in self.levels:
+            if level.covers(t0) and level.count(t0, t1) <= max_points:
+                return level
+        return self.levels[-1]
+
+
+class DecimatedSource:
+    """Graph data of named lines, switching between raw data and 
+    MinMaxPyramid levels maintained as samples arrive, so each frame
+    draws at most about max_points per line regardless of history.
+    
+    Args:
+        raw (function): raw(name, t0, t1) returning (times, values).
+        max_buckets (int): Buckets kept per level, e.g. a day of 1 s
+            buckets (about 3.5 MB per line for the finest level).
+    """
+    def __init__(self, raw, widths=(1, 10, 60, 600), max_points=2000, max_buckets=86400):
+        self.raw = raw
+        self.widths = widths
+        self.max_points = max_points
+        self.max_buckets = max_buckets
+        self.pyramids: dict[object, MinMaxPyramid] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, t, v):
+        with self._lock:
+            if name not in self.pyramids:
+                self.pyramids[name] = MinMaxPyramid(self.widths, self.max_buckets)
+            self.pyramids[name].add(t, v)
+
+    def add_batch(self, name, times, values):
+        """Add sorted samples of a line at once"""
+        with self._lock:
+            if name not in self.pyramids:
+                self.pyramids[name] = MinMaxPyramid(self.widths, self.max_buckets)
+            self.pyramids[name].add_batch(np.asarray(times, dtype=np.float64),
+                                          np.asarray(values, dtype=np.float64))
+
+    def clear(self):
+        with self._lock:
+            self.pyramids.clear()
+
+    def window(self, name, t0, t1):
+        """Get (times, values) of line from t0 to t1"""
+        with self._lock:
+            pyramid = self.pyramids.get(name)
+            if pyramid is not None:
+                finest = pyramid.levels[0]
+                if not finest.covers(t0):  # trimmed, judge by span
+                    wide = (t1 - t0) / finest.width > self.max_points
+                else:  # bucket count first, samples summed only over few buckets
+                    wide = finest.count(t0, t1) > self.max_points or finest.samples(t0, t1) > self.max_points
+                if wide:
+                    return pyramid.select(t0, t1, self.max_points // 2).envelope(t0, t1)
+        return self.raw(name, t0, t1)
@@ -0,0 +1,96 @@
+"""
+File: scheduler.py
+Purpose: Adaptive frame timing of the live graphs in the Tk main loop
+"""
+
+from perf import STATS
+import time
+
+
+class FrameScheduler:
+    """Calls frame() from the Tk main loop, only when marked dirty.
+
+    The interval between frames backs off to keep rendering at most
+    load of the time, between min_interval and max_interval millis,
+    and recovers gradually when frames get cheaper. Frames are
+    suspended while the window is iconified or the widget is fully
+    obscured, and resume with a frame when shown again.
+    """
+    def __init__(self, widget, frame, min_interval=100, max_interval=5000, load=0.25):
+        self.widget = widget
+        self.frame = frame
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.load = load
+        self.interval = min_interval
+        self.dirty = True
+        self._hidden = False
+        self._obscured = False
+        self._after = None
+        self._stage = STATS.stage("graph render")
+
+        top = widget.winfo_toplevel()
+        top.bind("<Unmap>", lambda e: e.widget is top and self._set_hidden(True), add="+")
+        top.bind("<Map>", lambda e: e.widget is top and self._set_hidden(False), add="+")
+        widget.bind("<Visibility>", self._on_visibility, add="+")
+        widget.bind("<Configure>", lambda e: self.mark_dirty(), add="+")
+
+    @property
+    def suspended(self) -> bool:
+        return self._hidden or self._obscured
+
+    def start(self):
+        if self._after is None and not self.suspended:
+            self._after = self.widget.after(self.interval, self._tick)
+
+    def stop(self):
+        if self._after is not None:
+            self.widget.after_cancel(self._after)
+            self._after = None
+
+    def mark_dirty(self):
+        """Something to draw, e.g. new data or limits changed"""
+        self.dirty = True
+
+    def _set_hidden(self, hidden):
+        self._hidden = hidden
+        self._update_suspended()
+
+    def _on_visibility(self, event):
+        self._obscured = event.state == "VisibilityFullyObscured"
+        self._update_suspended()
+
+    def _update_suspended(self):
+        if self.suspended:
+            self.stop()
+        else:
+            self.mark_dirty()
+            self.start()
+
+    def _tick(self):
+        self._after = None
+        if self.suspended:
+            return
+        try:
+            if self.dirty:
+                self.dirty = False
+                start = time.perf_counter_ns()
+                try:
+                    self.frame()
+                finally:
+                    elapsed = time.perf_counter_ns() - start
+                    self._stage.record(elapsed)
+                    self._adapt(elapsed / 1e6)
+            else:
+                STATS.count("graph frames skipped")
+        finally:
+            self.start()  # next frame even if this one failed
+
+    def _adapt(self, render_ms):
+        """Back off at once when frames are slow, recover by 20% per frame"""
+        target = render_ms / self.load
+        if target > self.interval:
+            interval = target
+        else:
+            interval = max(target, self.interval * 0.8)
+        self.interval = int(min(max(interval, self.min_interval), self.max_interval))
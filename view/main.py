@@ -7,21 +7,69 @@ from view.widgets.led_button import LEDButton
 from view.widgets.file_action import FileAction
 from view.widgets.live_graph_tk import LiveGraphTk
 from view.help import HelpWindow
-from tkinter import Button
+from view.script import ScriptWindow
+from view.history import HistoryWindow
+from view.perf import PerfWindow
+from view.channels import ChannelWindow
+from view.journal import JournalWindow
+from tkinter import Button, Menu, StringVar, BooleanVar, filedialog
 
 class View:
-    """VSB View"""
-    def __init__(self):
+    """VSB View
+    
+    Args:
+        graph_backend (str): "matplotlib", or "canvas" for the lighter
+            Tk canvas graph (refreshed up to 10 times a second).
+    """
+    def __init__(self, graph_backend="matplotlib"):
         super().__init__()
         self.root = Root()
         self.controls = VSBControls(self.root)
         self.log = FileAction(self.root, text="Log CPI")
         self.cli = CLI(self.root)
         self.serial = SerialConnector(self.root)
-        self.graph = LiveGraphTk(self.root, interval=1000)
+        self.graph = LiveGraphTk(self.root, interval=100 if graph_backend == "canvas" else 1000,
+                                 backend=graph_backend)
         self.mode_button = LEDButton(self.root, text="Generic Mode")
-        self.help_button = Button(self.root, text="HELP", command=lambda: HelpWindow(self.root))
+        self.perf = PerfWindow(self.root)
+        self.help_button = Button(self.root, text="HELP", 
+                                  command=lambda: HelpWindow(self.root, on_stats=self.perf.show))
         self.exit_button = Button(self.root, text="EXIT", command=self.root.on_close)
+        self.script = ScriptWindow(self.root)
+        self.channels = ChannelWindow(self.root)
+        self.journal = JournalWindow(self.root)
+        
+        self.tools_menu = Menu(self.root, tearoff=0)
+        self.tools_menu.add_command(label="Script Runner", command=self.script.show)
+        self.tools_menu.add_command(label="Open Log...", command=self.open_history)
+        self.tools_menu.add_command(label="Channel Table", command=self.channels.show)
+        self.tools_menu.add_command(label="State Journal", command=self.journal.show)
+        self.tools_menu.add_command(label="Performance Stats", command=self.perf.show)
+        # enabled by bind_export, bind_calibration and bind_alarms
+        self.tools_menu.add_command(label="Export Data...", state="disabled")
+        self.tools_menu.add_command(label="Load Calibration...", state="disabled")
+        self.tools_menu.add_command(label="Load Alarms...", state="disabled")
+        self.log_format = StringVar(self.root, value="raw")
+        self.log_format_menu = Menu(self.tools_menu, tearoff=0)
+        for label, value in (("Raw", "raw"), ("Wide CSV", "wide"), ("Raw + Wide CSV", "both")):
+            self.log_format_menu.add_radiobutton(label=label, value=value, variable=self.log_format)
+        self.tools_menu.add_cascade(label="Log Format", menu=self.log_format_menu)
+        self.overload_policy = StringVar(self.root, value="summarize")
+        self.overload_menu = Menu(self.tools_menu, tearoff=0)
+        for label, value in (("Skip, Show Count", "summarize"), ("Drop Oldest", "drop_oldest"),
+                             ("Decimate", "decimate")):
+            self.overload_menu.add_radiobutton(label=label, value=value, 
+                                               variable=self.overload_policy)
+        self.tools_menu.add_cascade(label="Terminal Overload", menu=self.overload_menu)
+        self.capture_process = BooleanVar(self.root, value=False)
+        self.tools_menu.add_checkbutton(label="Capture in Separate Process", 
+                                        variable=self.capture_process)
+        self.binary_frames = BooleanVar(self.root, value=False)
+        self.tools_menu.add_checkbutton(label="Binary Framed Samples", 
+                                        variable=self.binary_frames)
+        self.menubar = Menu(self.root)
+        self.menubar.add_cascade(label="Tools", menu=self.tools_menu)
+        self.root.config(menu=self.menubar)
             
         self.controls.grid(row=0, column=0, sticky="nsew")
         self.log.grid(row=1, column=0, sticky="nsew")
@@ -44,6 +92,16 @@ class View:
         
     def start(self):
         self.root.mainloop()
+        
+    def schedule(self, ms, func):
+        """Call func once after ms milliseconds, in the GUI thread"""
+        self.root.after(ms, func)
+    
+    def open_history(self):
+        """Open a recorded log in a new HistoryWindow"""
+        path = filedialog.askopenfilename(filetypes=[("Logs", "*.csv *.txt"), ("All", "*")])
+        if path:
+            HistoryWindow(self.root, path)
     
     def bind_mode_button(self, func):
         self.mode_button.set_command(func)
@@ -59,6 +117,42 @@ class View:
         
     def bind_log(self, func):
         self.log.set_command(func)
+        
+    def bind_script(self, func):
+        self.script.set_command(func)
+        
+    def bind_calibration(self, func):
+        """Bind func(path) to load a user selected calibration CSV"""
+        def ask_calibration():
+            path = filedialog.askopenfilename(filetypes=[("CSV", "*.csv"), ("All", "*")])
+            if path:
+                func(path)
+        self.tools_menu.entryconfigure("Load Calibration...", command=ask_calibration, state="normal")
+        
+    def bind_alarms(self, func):
+        """Bind func(path) to load a user selected alarm rules JSON"""
+        def ask_alarms():
+            path = filedialog.askopenfilename(filetypes=[("JSON", "*.json"), ("All", "*")])
+            if path:
+                func(path)
+        self.tools_menu.entryconfigure("Load Alarms...", command=ask_alarms, state="normal")
+        
+    def bind_overload_policy(self, func):
+        """Bind func(policy) to changes of the terminal overload policy"""
+        self.overload_policy.trace_add("write", lambda *_: func(self.overload_policy.get()))
+        
+    def bind_export(self, func):
+        """Bind func(path) to export data to a user selected file"""
+        def ask_export():
+            path = filedialog.asksaveasfilename(defaultextension=".npz", filetypes=[
+                ("NumPy", "*.npz"), ("Parquet", "*.parquet"), ("HDF5", "*.h5")])
+            if path:
+                func(path)
+        self.tools_menu.entryconfigure("Export Data...", command=ask_export, state="normal")
+
+    def bind_channel_reset(self, func):
+        """Bind func() to reset channel min/max"""
+        self.channels.set_reset_command(func)
 
     def get_cli_entry(self):
         return self.cli.get_entry()
@@ -69,6 +163,21 @@ class View:
     def get_baud(self):
         return self.serial.get_baud()
     
+    def get_readout_names(self) -> list:
+        return [name for col in self.controls.stat_names for name in col]
+    
+    def get_capture_process(self) -> bool:
+        """Capture and raw logging in a separate process (on next connect)"""
+        return self.capture_process.get()
+    
+    def get_binary_frames(self) -> bool:
+        """Decode binary sample frames between RX lines (on next connect)"""
+        return self.binary_frames.get()
+    
+    def get_log_format(self):
+        """'raw', 'wide' (one column per channel) or 'both'"""
+        return self.log_format.get()
+    
     def get_led(self, name):
         return self.controls.get_led(name)
     
@@ -78,8 +187,30 @@ class View:
     def append_cli(self, data):
         self.cli.insert(data)
         
-    def append_graph(self, channel, val):
-        self.graph.append(channel, val)
+    def append_cli_lines(self, lines: list):
+        self.cli.insert_lines(lines)
+        
+    def append_graph(self, channel, val, t=None):
+        self.graph.append(channel, val, t)
+        
+    def append_graph_batch(self, samples: list):
+        """Append (channel, val, t) samples, in time order"""
+        by_channel = {}
+        for channel, val, t in samples:
+            vals, times = by_channel.setdefault(channel, ([], []))
+            vals.append(val)
+            times.append(t)
+        for channel, (vals, times) in by_channel.items():
+            self.graph.append_batch(channel, vals, times)
+        
+    def set_graph_store(self, store):
+        self.graph.set_store(store)
+        
+    def set_channel_summary(self, summary):
+        self.channels.set_summary(summary)
+        
+    def set_journal(self, journal):
+        self.journal.set_journal(journal)
         
     def set_connected(self, is_connected: bool):
         self.serial.set_state(is_connected)
@@ -95,3 +226,6 @@ class View:
 
     def set_readout(self, name, readout):
         self.controls.set_readout(name, readout)
+        
+    def set_alert(self, name, state: bool):
+        self.controls.set_alert(name, state)
@@ -0,0 +1,75 @@
+import tkinter as tk
+from tkinter import filedialog
+from .widgets.led_button import LEDButton
+from perf import STATS, Profiler
+
+class PerfWindow(tk.Toplevel):
+    """Performance stats popout (tk.Toplevel) of perf.STATS, refreshed
+    every interval millis while shown, with cProfile/tracemalloc toggles.
+    NOTE: Closing only hides the window."""
+    def __init__(self, master, interval=1000):
+        super().__init__(master)
+
+        self.title("Performance Stats")
+        self.geometry("620x480")
+        self.protocol("WM_DELETE_WINDOW", self.withdraw)
+        self.withdraw()
+        self.interval = interval
+        self.profiler = Profiler()
+
+        buttons = tk.Frame(self)
+        buttons.pack(fill="x", padx=5, pady=5)
+        tk.Button(buttons, text="Reset", command=self.reset).pack(side="left")
+        tk.Button(buttons, text="Dump...", command=self.dump).pack(side="left")
+        self.profile_button = LEDButton(buttons, text="cProfile")
+        self.profile_button.set_command(self.toggle_profile)
+        self.profile_button.pack(side="left", padx=5)
+        self.trace_button = LEDButton(buttons, text="tracemalloc")
+        self.trace_button.set_command(self.toggle_trace)
+        self.trace_button.pack(side="left", padx=5)
+
+        self.out_txt = tk.Text(self, font=("Courier", 9), state=tk.DISABLED)
+        self.out_txt.pack(fill="both", expand=True, padx=5, pady=5)
+        self._refresh()
+
+    def show(self):
+        self.deiconify()
+        self.lift()
+
+    def reset(self):
+        STATS.reset()
+
+    def dump(self):
+        path = filedialog.asksaveasfilename(defaultextension=".txt",
+                                            filetypes=[("Text", "*.txt")])
+        if path:
+            STATS.dump(path)
+
+    def toggle_profile(self):
+        """Profile the GUI thread, on stop save the top functions"""
+        if self.profiler.is_profiling:
+            path = filedialog.asksaveasfilename(defaultextension=".txt",
+                                                filetypes=[("Text", "*.txt")])
+            self.profiler.stop_profile(path or None)
+        else:
+            self.profiler.start_profile()
+        self.profile_button.set_led(self.profiler.is_profiling)
+
+    def toggle_trace(self):
+        """Trace allocations, on stop save the top allocating lines"""
+        if self.profiler.is_tracing:
+            path = filedialog.asksaveasfilename(defaultextension=".txt",
+                                                filetypes=[("Text", "*.txt")])
+            self.profiler.stop_trace(path or None)
+        else:
+            self.profiler.start_trace()
+        self.trace_button.set_led(self.profiler.is_tracing)
+
+    def _refresh(self):
+        if self.winfo_viewable():
+            report = STATS.report()
+            self.out_txt.config(state=tk.NORMAL)
+            self.out_txt.delete("1.0", tk.END)
+            self.out_txt.insert("1.0", report)
+            self.out_txt.config(state=tk.DISABLED)
+        self.after(self.interval, self._refresh)
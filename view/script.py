@@ -0,0 +1,52 @@
+import tkinter as tk
+import tkinter.ttk as ttk
+from .widgets.file_action import FileAction
+
+class ScriptWindow(tk.Toplevel):
+    """Script runner popout (tk.Toplevel).
+    NOTE: Closing only hides the window, so a running script keeps reporting."""
+    def __init__(self, master):
+        super().__init__(master)
+
+        self.title("Script Runner")
+        self.geometry("500x300")
+        self.protocol("WM_DELETE_WINDOW", self.withdraw)
+        self.withdraw()
+
+        self.file = FileAction(self, text="Run Script")
+        self.file.pack(fill="x", padx=5, pady=5)
+
+        self.progress = ttk.Progressbar(self, orient=tk.HORIZONTAL, mode="determinate")
+        self.progress.pack(fill="x", padx=5)
+
+        self.step_label = tk.Label(self, anchor="w", text="Idle")
+        self.step_label.pack(fill="x", padx=5)
+
+        self.out_txt = tk.Text(self, height=10, state=tk.DISABLED)
+        self.out_txt.pack(fill="both", expand=True, padx=5, pady=5)
+
+    def show(self):
+        self.deiconify()
+        self.lift()
+
+    def set_command(self, func):
+        """Set command function for run/stop button"""
+        self.file.set_command(func)
+
+    def get_path(self):
+        return self.file.get_path()
+
+    def set_running(self, is_running: bool):
+        self.file.set_button_state(is_running)
+
+    def set_progress(self, line_no: int, total: int, text: str):
+        """Show current line out of total lines in script"""
+        self.progress.configure(maximum=max(total, 1), value=line_no)
+        self.step_label.config(text=f"{line_no}/{total}: {text}")
+
+    def insert(self, msg: str):
+        """Append a message to the output log"""
+        self.out_txt.config(state=tk.NORMAL)
+        self.out_txt.insert(tk.END, "{}\n".format(msg.rstrip('\n')))
+        self.out_txt.config(state=tk.DISABLED)
+        self.out_txt.see(tk.END)
@@ -0,0 +1,209 @@
+"""
+File: channel_table.py
+Purpose: Per-channel live readouts (table or heatmap) for any channel count
+"""
+
+from perf import timed
+import tkinter as tk
+import numpy as np
+import time
+
+ROW_H = 18  # table row height, pixels
+TILE_W, TILE_H = 64, 34  # heatmap tile size, pixels
+COLUMNS = (("Ch", 50), ("Value", 80), ("Min", 70), ("Max", 70), ("Age s", 60))
+STALE_COLOR = "#c0c0c0"
+
+
+def make_palette(n=256) -> list:
+    """Blue (low) to green to red (high) hex colors"""
+    x = np.linspace(0, 1, n)
+    rgb = np.stack([np.interp(x, (0, 0.5, 1), c) for c in
+                    ((40, 60, 230), (70, 200, 60), (230, 50, 40))], axis=1).astype(int)
+    return [f"#{r:02x}{g:02x}{b:02x}" for r, g, b in rgb]
+
+
+class ChannelTable(tk.Frame):
+    """Latest value, min/max and age of every channel of a ChannelSummary,
+    as a table or a heatmap of tiles, color mapped from lo to hi.
+
+    Only visible rows have canvas items, reused as the view scrolls,
+    and an item is reconfigured only when its text or color changed,
+    so a frame costs the same for 10 or 1000 channels.
+
+    Args:
+        summary (ChannelSummary): Channels to show, None until set_summary.
+        interval (int): Refresh interval millis, while viewable.
+        stale (float): Seconds without samples to grey a channel out.
+    """
+    def __init__(self, master, summary=None, interval=100, lo=0, hi=4095, stale=5.0):
+        super().__init__(master)
+        self.summary = summary
+        self.interval = interval
+        self.lo, self.hi = lo, hi
+        self.stale = stale
+        self.layout = "table"
+        self.palette = make_palette()
+        self.top = 0  # first visible row
+        self._slots = []  # canvas item ids per visible row
+        self._drawn = {}  # item to last (text, fill)
+        self._data = None  # snapshot in display order
+        self._version = -1
+
+        self.canvas = tk.Canvas(self, bg="white", highlightthickness=0)
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.canvas.bind("<Configure>", lambda e: self._build())
+        self.canvas.bind("<MouseWheel>", lambda e: self.yview("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda e: self.yview("scroll", -1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.yview("scroll", 1, "units"))
+        self._refresh()
+
+    def set_summary(self, summary):
+        self.summary = summary
+        self._version = -1
+
+    def set_layout(self, layout: str):
+        """'table' or 'heatmap'"""
+        self.layout = layout
+        self.top = 0
+        self._build()
+
+    def set_range(self, lo, hi):
+        """Set the values mapped to the lowest and highest colors"""
+        self.lo, self.hi = lo, hi
+        self._version = -1
+
+    def yview(self, *args):
+        """Scrollbar command: 'moveto', fraction or 'scroll', n, 'units'/'pages'"""
+        rows, visible = self._rows(), self._visible()
+        if args[0] == "moveto":
+            top = int(float(args[1]) * rows)
+        else:
+            step = visible if args[2] == "pages" else 1
+            top = self.top + int(args[1]) * step
+        self.top = max(0, min(top, rows - visible + 1))
+        self.draw_frame()
+
+    def _columns(self) -> int:
+        """Heatmap tiles per row"""
+        return max(self.canvas.winfo_width() // TILE_W, 1)
+
+    def _row_height(self) -> int:
+        return ROW_H if self.layout == "table" else TILE_H
+
+    def _header(self) -> int:
+        return ROW_H if self.layout == "table" else 0
+
+    def _visible(self) -> int:
+        """Rows fitting the canvas, the last partly"""
+        return max((self.canvas.winfo_height() - self._header()) // self._row_height() + 1, 1)
+
+    def _rows(self) -> int:
+        n = 0 if self._data is None else len(self._data[0])
+        return n if self.layout == "table" else -(-n // self._columns())
+
+    def _build(self):
+        """(Re)create the items of the visible rows"""
+        canvas = self.canvas
+        canvas.delete("all")
+        self._drawn.clear()
+        self._slots = []
+        if self.layout == "table":
+            x = 0
+            for name, width in COLUMNS:
+                canvas.create_rectangle(x, 0, x + width, ROW_H, fill="#e8e8e8", outline="#c0c0c0")
+                canvas.create_text(x + width / 2, ROW_H / 2, text=name, font=("TkDefaultFont", 8, "bold"))
+                x += width
+            for i in range(self._visible()):
+                y = ROW_H * (i + 1)
+                slot = []
+                x = 0
+                for name, width in COLUMNS:
+                    rect = canvas.create_rectangle(x, y, x + width, y + ROW_H,
+                                                   fill="white", outline="#e0e0e0", state="hidden")
+                    text = canvas.create_text(x + width - 4, y + ROW_H / 2, anchor="e",
+                                              font=("TkDefaultFont", 8), state="hidden")
+                    slot.append((rect, text))
+                    x += width
+                self._slots.append(slot)
+        else:
+            for i in range(self._visible()):
+                y = TILE_H * i
+                slot = []
+                for col in range(self._columns()):
+                    x = TILE_W * col
+                    rect = canvas.create_rectangle(x + 1, y + 1, x + TILE_W - 1, y + TILE_H - 1,
+                                                   fill="white", outline="", state="hidden")
+                    text = canvas.create_text(x + TILE_W / 2, y + TILE_H / 2, justify="center",
+                                              font=("TkDefaultFont", 8), fill="white", state="hidden")
+                    slot.append((rect, text))
+                self._slots.append(slot)
+        self.top = max(0, min(self.top, self._rows() - self._visible() + 1))
+        self.draw_frame()
+
+    def _set(self, item, text=None, fill=None):
+        """Configure item only if changed, shown"""
+        key = (text, fill)
+        if self._drawn.get(item) == key:
+            return
+        if self._drawn.get(item) is None:
+            self.canvas.itemconfigure(item, state="normal")
+        self._drawn[item] = key
+        if text is not None:
+            self.canvas.itemconfigure(item, text=text)
+        if fill is not None:
+            self.canvas.itemconfigure(item, fill=fill)
+
+    def _hide(self, item):
+        if item in self._drawn:
+            del self._drawn[item]
+            self.canvas.itemconfigure(item, state="hidden")
+
+    def _refresh(self):
+        if self.winfo_viewable():
+            self.draw_frame()
+        self.after(self.interval, self._refresh)
+
+    @timed("channel table frame")
+    def draw_frame(self):
+        """Update the visible rows now"""
+        if self.summary is None:
+            return
+        if self.summary.version != self._version:
+            self._version = self.summary.version
+            channels, last, minimum, maximum, times = self.summary.snapshot()
+            order = np.argsort(channels, kind="stable")
+            span = max(self.hi - self.lo, 1e-12)
+            shade = np.nan_to_num((last[order] - self.lo) / span * (len(self.palette) - 1))
+            shade = np.clip(shade, 0, len(self.palette) - 1).astype(np.int64)
+            self._data = (channels[order], last[order], minimum[order], maximum[order],
+                          times[order], shade)
+        if self._data is None:
+            return
+        channels, last, minimum, maximum, times, shade = self._data
+        now = time.time()
+        n = len(channels)
+        per_row = 1 if self.layout == "table" else self._columns()
+        for i, slot in enumerate(self._slots):
+            for j, (rect, text) in enumerate(slot):
+                k = (self.top + i) * per_row + (0 if self.layout == "table" else j)
+                if k >= n:
+                    self._hide(rect)
+                    self._hide(text)
+                    continue
+                age = now - times[k]
+                color = STALE_COLOR if age > self.stale else self.palette[shade[k]]
+                if self.layout == "table":
+                    cell = (str(channels[k]), f"{last[k]:.6g}", f"{minimum[k]:.6g}",
+                            f"{maximum[k]:.6g}", f"{age:.1f}" if age < 60 else f"{age:.0f}")[j]
+                    self._set(rect, fill=color if j == 1 else "white")
+                    self._set(text, text=cell, fill="white" if j == 1 else "black")
+                else:
+                    self._set(rect, fill=color)
+                    self._set(text, text=f"{channels[k]}\n{last[k]:.6g}")
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        rows = max(self._rows(), 1)
+        self.scrollbar.set(self.top / rows, min((self.top + self._visible() - 1) / rows, 1.0))
@@ -1,9 +1,11 @@
 import tkinter as tk
+from perf import STATS, timed
 
 class CLI(tk.Frame):
-    """Command line interface"""
-    def __init__(self, master, send_func=None):
+    """Command line interface, keeping the last max_lines lines"""
+    def __init__(self, master, send_func=None, max_lines=5000):
         super().__init__(master)
+        self.max_lines = max_lines
         super().configure(width=400, height=400)
         if not send_func:
             send_func = lambda _: print("send_func not bound")
@@ -24,6 +26,7 @@ class CLI(tk.Frame):
         self.is_scroll = True
         self.scroll_button = tk.Button(self, text="Scroll ON", command=self.pause_scroll)
         self.scroll_button.place(relx=0.33, rely=0.95, relwidth=0.33, relheight=0.05)
+        STATS.gauge("cli lines", self.line_count)
 
     def set_send_func(self, send_func):
         """Set the function called on <Return>"""
@@ -35,13 +38,35 @@ class CLI(tk.Frame):
         self.out_txt.delete("1.0", tk.END)
         self.out_txt.config(state=tk.DISABLED)
     
+    @timed("cli insert")
     def insert(self, msg: str):
         """Insert a message into the terminal"""
         self.out_txt.config(state=tk.NORMAL)
         self.out_txt.insert(tk.END, "{}\n".format(msg.rstrip('\n')))
+        self._trim()
         self.out_txt.config(state=tk.DISABLED)
         if self.is_scroll:
             self.out_txt.see(tk.END)
+    
+    @timed("cli insert")
+    def insert_lines(self, msgs: list):
+        """Insert many messages into the terminal in one update"""
+        self.out_txt.config(state=tk.NORMAL)
+        self.out_txt.insert(tk.END, "\n".join(msg.rstrip('\n') for msg in msgs) + "\n")
+        self._trim()
+        self.out_txt.config(state=tk.DISABLED)
+        if self.is_scroll:
+            self.out_txt.see(tk.END)
+    
+    def _trim(self):
+        """Delete the oldest lines beyond max_lines"""
+        excess = self.line_count() - 1 - self.max_lines
+        if excess > 0:
+            self.out_txt.delete("1.0", f"{excess + 1}.0")
+            
+    def line_count(self) -> int:
+        """Lines held in the terminal"""
+        return int(self.out_txt.index("end-1c").split('.')[0])
             
     def pause_scroll(self):
         """Toggle the scroll state"""
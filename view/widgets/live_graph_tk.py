@@ -1,22 +1,73 @@
 from ..live_graph.live_graph import LiveGraph
+from ..live_graph.canvas_graph import CanvasGraph
+from ..live_graph.helpers import to_local_datetime64
+from ..live_graph.pyramid import DecimatedSource
+from ..live_graph.scheduler import FrameScheduler
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 import tkinter as tk
 import datetime
 
 class LiveGraphTk(tk.Frame):
-    """Generic tkinter.Frame LiveGraph using graph.LiveGraph.
+    """Generic tkinter.Frame LiveGraph using graph.LiveGraph, or with
+    backend "canvas" the lighter CanvasGraph (no matplotlib toolbar).
+    
+    Frames are drawn by a FrameScheduler: only after new data or view
+    changes, every interval to max_interval millis depending on render 
+    time, and not while the window is minimized.
     
     NOTE: Enforces datetime units of width."""
         
-    def append(self, line_name, y):
-        x = datetime.datetime.now()
+    def append(self, line_name, y, t=None):
+        """Append y at t seconds since epoch, default now"""
+        if t is None:
+            x = datetime.datetime.now()
+        else:
+            x = datetime.datetime.fromtimestamp(t)
+        if self.decimated:
+            self.decimated.add(line_name, x.timestamp() if t is None else t, y)
         self.graph.append(line_name, x, y)
+        self.scheduler.mark_dirty()
+    
+    def append_batch(self, line_name, ys, ts):
+        """Append ys at sorted ts seconds since epoch"""
+        if self.decimated:
+            self.decimated.add_batch(line_name, ts, ys)
+        if self.graph.source:  # lines read from source, only limits needed
+            ts, ys = (ts[0], ts[-1]), (min(ys), max(ys))
+        self.graph.append_batch(line_name, [datetime.datetime.fromtimestamp(t) for t in ts], ys)
+        self.scheduler.mark_dirty()
+    
+    def set_store(self, store):
+        """Read line data from a ChannelStore (model.store) keyed 
+        by line name, instead of keeping it in the graph. Wide spans
+        are drawn from min/max levels kept as data is appended."""
+        self.store = store
+        self.decimated = DecimatedSource(store.window)
+        if isinstance(self.graph, CanvasGraph):  # seconds since epoch as is
+            self.graph.set_source(self.decimated.window)
+            return
+        def source(line_name, lower, upper):
+            # pad 1us for datetime rounding of sample times
+            times, values = self.decimated.window(line_name, lower.timestamp() - 1e-6,
+                                                  upper.timestamp() + 1e-6)
+            return to_local_datetime64(times), values
+        self.graph.set_source(source)
+    
+    def clear(self):
+        """Clear all lines from graph, and its store if set"""
+        if self.store:
+            self.store.clear()
+        if self.decimated:
+            self.decimated.clear()
+        self.graph.clear()
+        self.scheduler.mark_dirty()
         
-    def __init__(self, master, interval):
+    def __init__(self, master, interval, backend="matplotlib", max_interval=5000):
         super().__init__(master)
         
         def toggle_auto():
             self.graph.set_auto(not self.graph.is_auto)
+            self.scheduler.mark_dirty()
             txt = "Autoshift " + ("ON" if self.graph.is_auto else "OFF")
             self.auto_button.config(text=txt)
         
@@ -24,6 +75,7 @@ class LiveGraphTk(tk.Frame):
             if self.graph.is_auto:
                 return
             self.graph.set_xlim_to_relx(self.scroll_slider.get()/100)
+            self.scheduler.mark_dirty()
             
         def update_width(event=None):
             time_units = {
@@ -35,10 +87,24 @@ class LiveGraphTk(tk.Frame):
             unit = self.unit_var.get()
             width = self.width_slider.get() * time_units[unit]
             self.graph.set_width(datetime.timedelta(seconds=width))
+            self.scheduler.mark_dirty()
         default_seconds = 10
-        self.graph = LiveGraph(width=datetime.timedelta(seconds=default_seconds), interval=interval)
-        self.canvas = FigureCanvasTkAgg(self.graph.fig, master=self)
-        self.canvas.get_tk_widget().grid(row=0, column=0, columnspan=10, sticky=tk.NSEW)
+        self.store = None
+        self.decimated = None
+        width = datetime.timedelta(seconds=default_seconds)
+        if backend == "canvas":
+            self.graph = CanvasGraph(self, width=width)
+            widget = self.graph.widget
+        elif backend == "matplotlib":
+            self.graph = LiveGraph(width=width, interval=interval, animate=False)
+            self.canvas = FigureCanvasTkAgg(self.graph.fig, master=self)
+            widget = self.canvas.get_tk_widget()
+        else:
+            raise ValueError(f"Unknown graph backend: {backend}")
+        widget.grid(row=0, column=0, columnspan=10, sticky=tk.NSEW)
+        widget.bind("<Button-1>", lambda e: self.scheduler.mark_dirty(), add="+")  # legend clicks
+        self.scheduler = FrameScheduler(widget, self.graph.draw_frame, interval, max_interval)
+        self.scheduler.start()
             
         self.auto_button = tk.Button(self, text="Autoshift ON", command=toggle_auto)
         self.auto_button.grid(row=1, column=0, columnspan=2, sticky=tk.NSEW)
@@ -63,12 +129,13 @@ class LiveGraphTk(tk.Frame):
         self.width_slider.bind("<B1-Motion>", update_width)
         self.width_slider.set(default_seconds)
         
-        self.clear_button = tk.Button(self, text="Clear Graph", command=self.graph.clear)
+        self.clear_button = tk.Button(self, text="Clear Graph", command=self.clear)
         self.clear_button.grid(row=3, column=0, columnspan=2, sticky=tk.NSEW)
     
-        self.toolbar = NavigationToolbar2Tk(self.canvas, self, pack_toolbar=False)
-        self.toolbar.update()
-        self.toolbar.grid(row=4, column=0, columnspan=10, sticky=tk.NSEW)
+        if backend == "matplotlib":
+            self.toolbar = NavigationToolbar2Tk(self.canvas, self, pack_toolbar=False)
+            self.toolbar.update()
+            self.toolbar.grid(row=4, column=0, columnspan=10, sticky=tk.NSEW)
         
         self.grid_rowconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=1)
@@ -3,6 +3,9 @@ import tkinter.ttk as ttk
 from .led_button import LEDButton
 import serial.tools.list_ports
 
+# network port templates, edit HOST:PORT (see model/network.py)
+NETWORK_PORTS = ("socket://HOST:PORT", "rfc2217://HOST:PORT")
+
 class SerialConnector(tk.Frame):
     """User interface for setting up serial connection"""
     def __init__(self, parent):
@@ -13,7 +16,7 @@ class SerialConnector(tk.Frame):
         
         self.port_options = self.get_available_ports()
         self.port_var = tk.StringVar(self)
-        if self.port_options:
+        if self.port_options[0] not in NETWORK_PORTS:  # a local port
             self.port_var.set(self.port_options[0])
         self.port_dropdown = ttk.Combobox(self, textvariable=self.port_var, values=self.port_options)
         self.port_dropdown.pack(side='left', padx=5, pady=5)
@@ -21,9 +24,9 @@ class SerialConnector(tk.Frame):
         self.baud_label = tk.Label(self, text="Baud:")
         self.baud_label.pack(side='left', padx=5, pady=5)
 
-        self.baud_options = ['9600', '19200', '38400', '57600', '115200']
+        self.baud_options = ['Auto', '9600', '19200', '38400', '57600', '115200']
         self.baud_var = tk.StringVar(self)
-        self.baud_var.set(self.baud_options[4])
+        self.baud_var.set(self.baud_options[5])
         self.baud_dropdown = ttk.Combobox(self, textvariable=self.baud_var, values=self.baud_options)
         self.baud_dropdown.pack(side='left', padx=5, pady=5)
         
@@ -37,18 +40,19 @@ class SerialConnector(tk.Frame):
         self.connect_button.set_command(command=func)
     
     def get_available_ports(self):
-        """Get system available serial port names as list"""
+        """Get system available serial port names as list,
+        followed by network port templates"""
         ports = []
         for port in serial.tools.list_ports.comports():
             ports.append(port.device)
-        return ports
+        return ports + list(NETWORK_PORTS)
     
     def get_port(self):
         """Get selected port name string"""
         return self.port_var.get()
     
     def get_baud(self):
-        """Get selected baud rate string"""
+        """Get selected baud rate string, 'Auto' to detect"""
         return self.baud_var.get()
 
     def set_state(self, is_connected: bool):
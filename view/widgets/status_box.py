@@ -15,5 +15,9 @@ class StatusBox(tk.Frame):
 
     def set_readout(self, text):
         self.readout.configure(text=text)
+        
+    def set_alert(self, state: bool):
+        """Highlight the readout"""
+        self.readout.configure(bg="red" if state else self.label.cget("bg"))
 
 